@@ -9,8 +9,13 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'budget_project.settings')
+# Selects the ASGI settings profile (see SERVER_PROFILE in settings.py).
+os.environ.setdefault('SERVER_PROFILE', 'asgi')
 
-application = get_asgi_application()
+# Static files (the admin's) are served here rather than by WhiteNoise,
+# whose middleware is sync-only.
+application = ASGIStaticFilesHandler(get_asgi_application())
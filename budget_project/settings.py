@@ -7,6 +7,8 @@ import os
 from pathlib import Path
 from datetime import timedelta
 
+from .database import database_config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -63,8 +65,16 @@ INSTALLED_APPS = [
 
 AUTH_USER_MODEL = 'users.CustomUser'
 
+# 'wsgi' (gunicorn, runserver) or 'asgi'; budget_project/asgi.py sets the latter.
+SERVER_PROFILE = os.getenv('SERVER_PROFILE', 'wsgi')
+
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    # Inside MetricsMiddleware, so response sizes are recorded as sent.
+    'core.middleware.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    # After CorsMiddleware, so browsers can read the 429s it sends.
+    'core.middleware.AdmissionControlMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -74,6 +84,10 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
+if SERVER_PROFILE == 'asgi':
+    # WhiteNoise's middleware is sync-only and would move every request onto
+    # a thread; asgi.py serves static files instead.
+    MIDDLEWARE.remove('whitenoise.middleware.WhiteNoiseMiddleware')
 
 ROOT_URLCONF = 'budget_project.urls'
 
@@ -96,12 +110,49 @@ TEMPLATES = [
 WSGI_APPLICATION = 'budget_project.wsgi.application'
 
 # Database
+# See budget_project/database.py for the SQLite and PostgreSQL profiles.
 DATABASES = {
+    'default': database_config(
+        os.getenv('DATABASE_URL'),
+        default_sqlite_path=BASE_DIR / 'db.sqlite3',
+        timeout=int(os.getenv('DB_TIMEOUT', '20')),
+        # Async views query from per-request executor threads, where persistent
+        # connections would accumulate, so ASGI closes them after each request.
+        conn_max_age=int(os.getenv('CONN_MAX_AGE', '0' if SERVER_PROFILE == 'asgi' else '60')),
+    )
+}
+
+# Caches
+# The summary cache backend is selected with SUMMARY_CACHE_BACKEND:
+#   'locmem' (default) - per-process memory; each worker keeps its own copy.
+#   'file'             - shared through SUMMARY_CACHE_LOCATION on local disk.
+#   'db'               - shared through a database table (run `manage.py createcachetable`).
+# Every cached read checks the entry against the user's version counters in
+# the database, so writes made by other processes are seen at once with any
+# backend; shared ones spare each worker from building its own copy.
+SUMMARY_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'summary',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('SUMMARY_CACHE_LOCATION', str(BASE_DIR / '.cache' / 'summary')),
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': os.getenv('SUMMARY_CACHE_LOCATION', 'summary_cache'),
+    },
+}
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-        'TIMEOUT': 20,
-    }
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'summary': {
+        **SUMMARY_CACHE_BACKENDS[os.getenv('SUMMARY_CACHE_BACKEND', 'locmem')],
+        'TIMEOUT': int(os.getenv('SUMMARY_CACHE_TIMEOUT', '300')),
+    },
 }
 
 # Password validation
@@ -139,7 +190,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -148,10 +199,28 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend'
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        # Same output as rest_framework.renderers.JSONRenderer, via orjson when installed.
+        'core.renderers.FastJSONRenderer',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # Token buckets (see core.throttling); the auth views use the auth_* scopes.
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.throttling.UserRateThrottle',
+        'core.throttling.IPRateThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'auth_ip': os.getenv('THROTTLE_AUTH_IP', '20/min'),
+        'auth_user': os.getenv('THROTTLE_AUTH_USER', '5/min'),
+        'read_user': os.getenv('THROTTLE_READ_USER', '600/min'),
+        'write_user': os.getenv('THROTTLE_WRITE_USER', '120/min'),
+        'read_ip': os.getenv('THROTTLE_READ_IP', '1200/min'),
+        'write_ip': os.getenv('THROTTLE_WRITE_IP', '300/min'),
+    },
+    # Proxies in front of the app; client addresses are read from
+    # X-Forwarded-For accordingly. 0 (default): REMOTE_ADDR only, since
+    # clients can send any X-Forwarded-For and get a fresh bucket each time.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', '0')),
 }
 
 # JWT Configuration
@@ -175,6 +244,74 @@ SIMPLE_JWT = {
     'TOKEN_TYPE_CLAIM': 'token_type',
 }
 
+# Authenticated users are cached per worker process for AUTH_USER_CACHE_TTL
+# seconds (see users.authentication); saves evict them in the saving process.
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', '60'))
+AUTH_USER_CACHE_SIZE = int(os.getenv('AUTH_USER_CACHE_SIZE', '1024'))
+
+# Request metrics (see core.middleware.MetricsMiddleware), served to staff
+# users at /api/_metrics. Requests slower than METRICS_SLOW_REQUEST_MS are
+# logged with their slowest SQL, for a METRICS_SLOW_SAMPLE_RATE fraction of them.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+METRICS_SLOW_REQUEST_MS = int(os.getenv('METRICS_SLOW_REQUEST_MS', '500'))
+METRICS_SLOW_SAMPLE_RATE = float(os.getenv('METRICS_SLOW_SAMPLE_RATE', '1.0'))
+
+# API response compression (see core.middleware.CompressionMiddleware): brotli
+# or gzip for bodies of at least COMPRESSION_MIN_SIZE bytes. Tune the levels
+# with `manage.py benchmark_compression`.
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '4'))
+COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', '6'))
+
+# Rate limiting (see core.throttling): token buckets per user and per client
+# address, in each worker process, at REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'].
+# THROTTLE_STORE_SIZE bounds the buckets kept per process.
+THROTTLE_ENABLED = os.getenv('THROTTLE_ENABLED', 'True').lower() == 'true'
+THROTTLE_STORE_SIZE = int(os.getenv('THROTTLE_STORE_SIZE', '10000'))
+
+# Admission control (see core.middleware.AdmissionControlMiddleware): API
+# requests beyond ADMISSION_MAX_CONCURRENCY in progress per process, or queued
+# longer than ADMISSION_MAX_QUEUE_MS by the proxy (X-Request-Start), get a 429.
+ADMISSION_MAX_CONCURRENCY = int(os.getenv('ADMISSION_MAX_CONCURRENCY', '32'))
+ADMISSION_MAX_QUEUE_MS = int(os.getenv('ADMISSION_MAX_QUEUE_MS', '0'))
+ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', '1'))
+
+# Currencies (see core.fx): amounts without one are in the user's base
+# currency, DEFAULT_CURRENCY for new users. Summaries are converted to the base
+# currency at the rates loaded with `manage.py load_exchange_rates`, quoted
+# against FX_REFERENCE_CURRENCY. Rate lookups are memoized per process for
+# FX_RATE_CACHE_TTL seconds, keeping up to FX_RATE_CACHE_SIZE (currency, day) entries.
+DEFAULT_CURRENCY = os.getenv('DEFAULT_CURRENCY', 'USD')
+FX_REFERENCE_CURRENCY = os.getenv('FX_REFERENCE_CURRENCY', 'EUR')
+FX_RATE_CACHE_SIZE = int(os.getenv('FX_RATE_CACHE_SIZE', '4096'))
+FX_RATE_CACHE_TTL = int(os.getenv('FX_RATE_CACHE_TTL', '300'))
+
+# Recurring transactions (see core.recurring): creating or editing a schedule
+# writes at most RECURRING_REQUEST_LIMIT of its due occurrences in the request;
+# a materialize_recurring job writes the rest.
+RECURRING_REQUEST_LIMIT = int(os.getenv('RECURRING_REQUEST_LIMIT', '366'))
+
+# Delta sync (see core.sync): changes are sent once SYNC_SETTLE_SECONDS old,
+# so writes still committing when a token is issued are not skipped; it must
+# exceed the longest gap between a row's updated_at and its commit. Deletions
+# are remembered for SYNC_TOMBSTONE_RETENTION_DAYS; older tokens get a 410.
+SYNC_SETTLE_SECONDS = float(os.getenv('SYNC_SETTLE_SECONDS', '5'))
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv('SYNC_TOMBSTONE_RETENTION_DAYS', '90'))
+
+# Background jobs (see core.jobs), run by `manage.py runworkers` in JOB_WORKERS
+# processes, of which at most JOB_WRITE_SLOTS run jobs that write at a time
+# (1 suits SQLite's single writer). A job still running after JOB_TIMEOUT
+# seconds is taken over by another worker; failed attempts are retried after
+# JOB_RETRY_DELAY seconds, doubling each time, up to JOB_MAX_ATTEMPTS.
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+JOB_WRITE_SLOTS = int(os.getenv('JOB_WRITE_SLOTS', '1'))
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '1.0'))
+JOB_TIMEOUT = int(os.getenv('JOB_TIMEOUT', '600'))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+JOB_RETRY_DELAY = float(os.getenv('JOB_RETRY_DELAY', '10'))
+# Export job output files.
+JOB_FILES_ROOT = os.getenv('JOB_FILES_ROOT', str(BASE_DIR / '.cache' / 'jobs'))
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
@@ -247,5 +384,10 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'core.metrics': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
     },
 }
\ No newline at end of file
@@ -7,6 +7,7 @@ from rest_framework.permissions import AllowAny
 
 # Import our new custom login view
 from users.views import MyTokenObtainPairView
+from core.throttling import AuthIPThrottle
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -19,6 +20,7 @@ def api_root(request):
             'auth': '/api/token/',
             'refresh': '/api/token/refresh/',
             'register': '/api/user/register/',
+            'profile': '/api/user/me/',
             'categories': '/api/categories/',
             'transactions': '/api/transactions/',
             'budgets': '/api/budgets/',
@@ -40,5 +42,5 @@ urlpatterns = [
 
     # Authentication routes
     path('api/token/', MyTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/token/refresh/', TokenRefreshView.as_view(throttle_classes=(AuthIPThrottle,)), name='token_refresh'),
 ]
\ No newline at end of file
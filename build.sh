@@ -9,4 +9,7 @@ pip install -r requirements.txt
 python manage.py collectstatic --no-input
 
 # Apply database migrations
-python manage.py migrate
\ No newline at end of file
+python manage.py migrate
+
+# Create the database cache table (no-op unless a cache uses the DB backend)
+python manage.py createcachetable
\ No newline at end of file
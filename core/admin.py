@@ -1,5 +1,9 @@
+from django.conf import settings
 from django.contrib import admin
-from .models import Category, Transaction, Budget
+from django.db import transaction
+from .models import Category, Transaction, Budget, RecurringTransaction, Job, ExchangeRate, AlertRule, Notification
+from .summary import invalidate_summary_for
+from . import fx, jobs, recurring, rollups
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -7,15 +11,107 @@ class CategoryAdmin(admin.ModelAdmin):
     list_filter = ['user']
     search_fields = ['name', 'user__username']
 
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            rollups.release_category(obj)
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            for category in queryset:
+                rollups.release_category(category)
+            super().delete_queryset(request, queryset)
+
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
-    list_display = ['description', 'amount', 'type', 'category', 'user', 'date']
+    list_display = ['description', 'amount', 'currency', 'type', 'category', 'user', 'date']
     list_filter = ['type', 'category', 'date', 'user']
     search_fields = ['description', 'user__username']
     date_hierarchy = 'date'
 
+    # Admin edits go through the same rollup bookkeeping as the API.
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            if change:
+                previous = Transaction.objects.get(pk=obj.pk)
+                rollups.discard([previous])
+                # The post_save signal only sees the new date.
+                invalidate_summary_for(previous)
+            super().save_model(request, obj, form, change)
+            rollups.record([obj])
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            rollups.discard([obj])
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            rollups.discard(queryset)
+            super().delete_queryset(request, queryset)
+
 @admin.register(Budget)
 class BudgetAdmin(admin.ModelAdmin):
-    list_display = ['category', 'amount', 'month', 'year', 'user']
+    list_display = ['category', 'amount', 'currency', 'month', 'year', 'user']
     list_filter = ['month', 'year', 'user']
-    search_fields = ['category__name', 'user__username']
\ No newline at end of file
+    search_fields = ['category__name', 'user__username']
+
+
+@admin.register(RecurringTransaction)
+class RecurringTransactionAdmin(admin.ModelAdmin):
+    list_display = ['description', 'amount', 'type', 'frequency', 'interval', 'next_date', 'user']
+    list_filter = ['frequency', 'type', 'user']
+    search_fields = ['description', 'user__username']
+    readonly_fields = ['next_index', 'next_date']
+
+    # Same scheduling as the API: edits resume after the occurrences already written.
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            since = recurring.resume_date(RecurringTransaction.objects.get(pk=obj.pk)) if change else None
+            super().save_model(request, obj, form, change)
+            if recurring.reschedule(obj, since, limit=settings.RECURRING_REQUEST_LIMIT):
+                jobs.enqueue(jobs.MATERIALIZE_RECURRING, user=obj.user)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'status', 'attempts', 'user', 'created_at', 'finished_at']
+    list_filter = ['kind', 'status']
+    search_fields = ['user__username']
+    readonly_fields = ['result', 'error', 'attempts', 'locked_until', 'created_at', 'finished_at']
+
+
+@admin.register(ExchangeRate)
+class ExchangeRateAdmin(admin.ModelAdmin):
+    list_display = ['currency', 'date', 'rate']
+    list_filter = ['currency']
+    date_hierarchy = 'date'
+    readonly_fields = ['inverse']
+
+    def save_model(self, request, obj, form, change):
+        obj.inverse = fx.inverse(obj.rate)
+        super().save_model(request, obj, form, change)
+        fx.bump_rates_version()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        fx.bump_rates_version()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        fx.bump_rates_version()
+
+
+@admin.register(AlertRule)
+class AlertRuleAdmin(admin.ModelAdmin):
+    list_display = ['category', 'threshold_percent', 'is_active', 'user']
+    list_filter = ['is_active', 'user']
+    search_fields = ['category__name', 'user__username']
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ['message', 'threshold_percent', 'spent', 'budgeted', 'currency', 'user', 'created_at']
+    list_filter = ['user']
+    search_fields = ['message', 'user__username']
+    readonly_fields = ['key', 'created_at']
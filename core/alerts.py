@@ -0,0 +1,105 @@
+# backend/core/alerts.py
+from collections import defaultdict
+from datetime import date
+
+from .models import AlertRule, Budget, MonthlyRollup, Notification
+from . import fx
+
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def _message(category, percent, year, month):
+    return f'{category.name}: {percent}% of the {year}-{month:02d} budget spent.'
+
+
+def check(keys):
+    """
+    Records a notification for every active alert rule whose threshold the
+    spending of a `(user id, category id, year, month)` in `keys` has reached,
+    unless that rule already fired for the category and month.
+
+    Month-to-date spending is read from the monthly rollups, the running
+    per-category counters every write already updates, so a check costs the
+    same few indexed queries (rules, budgets, buckets and one INSERT) however
+    long the history. Spending and budgets in other currencies are converted
+    to the user's base currency at the month's rate (see core.fx.rate_date).
+    """
+    keys = {key for key in keys if key[1] is not None}
+    if not keys:
+        return
+    rules = defaultdict(list)
+    for rule in AlertRule.objects.filter(user_id__in={key[0] for key in keys}, is_active=True).select_related('user'):
+        rules[rule.user_id].append(rule)
+    keys = {key for key in keys if key[0] in rules}
+    if not keys:
+        return
+
+    # A superset of the keys' rows (as in rollups._apply_bulk), matched below.
+    users, categories, years, months = ({key[i] for key in keys} for i in range(4))
+    periods = {'user_id__in': users, 'category_id__in': categories, 'year__in': years, 'month__in': months}
+    budgets = {
+        (budget.user_id, budget.category_id, budget.year, budget.month): budget
+        for budget in Budget.objects.filter(**periods).select_related('category')
+    }
+    spent = defaultdict(list)
+    for row in MonthlyRollup.objects.filter(type='EXPENSE', **periods).values_list(
+        'user_id', 'category_id', 'year', 'month', 'currency', 'total',
+    ):
+        spent[row[:4]].append(row[4:])
+
+    notifications = []
+    for key in keys & budgets.keys():
+        budget = budgets[key]
+        user_id, category_id, year, month = key
+        currency = rules[user_id][0].user.base_currency
+        day = fx.rate_date(year, month)
+        budgeted = fx.convert(budget.amount, budget.currency, currency, day)
+        if budgeted is None or budgeted <= 0:
+            continue
+        # Amounts without a rate cannot be counted.
+        total = sum(fx.convert(amount, row_currency, currency, day) or 0 for row_currency, amount in spent[key])
+        for rule in rules[user_id]:
+            if rule.category_id not in (None, category_id) or total * 100 < budgeted * rule.threshold_percent:
+                continue
+            percent = int(total * 100 / budgeted)
+            notifications.append(Notification(
+                user_id=user_id, rule=rule, category_id=category_id, key=f'{rule.pk}:{category_id}:{year}-{month}',
+                year=year, month=month, threshold_percent=rule.threshold_percent, spent=total, budgeted=budgeted,
+                currency=currency, message=_message(budget.category, percent, year, month),
+            ))
+    # Rules that already fired are skipped by the unique key.
+    Notification.objects.bulk_create(notifications, ignore_conflicts=True)
+
+
+def check_spending(deltas):
+    """Checks the categories whose expenses grew in a batch of rollup `{bucket: [amount, count]}` deltas."""
+    check({
+        (user_id, category_id, year, month)
+        for (user_id, category_id, type_, _, year, month), (amount, _) in deltas.items()
+        if type_ == 'EXPENSE' and amount > 0
+    })
+
+
+def check_budgets(budgets):
+    """Checks the given (saved) budgets, which may now be below their spending."""
+    check({(budget.user_id, budget.category_id, budget.year, budget.month) for budget in budgets})
+
+
+def check_user(user_id, today=None):
+    """Checks every budget the user has for the current month, e.g. for a new rule."""
+    today = today or date.today()
+    check_budgets(Budget.objects.filter(user_id=user_id, year=today.year, month=today.month))
+
+
+def poll(user, after=None, limit=PAGE_SIZE):
+    """
+    The user's notifications with an id above `after`, oldest first, and the
+    id to pass as `after` next time (`after` again when there are none): one
+    range scan of the (user, id) index, however many notifications are kept.
+    """
+    queryset = Notification.objects.filter(user=user)
+    if after is not None:
+        queryset = queryset.filter(id__gt=after)
+    notifications = list(queryset.order_by('id')[:limit])
+    return notifications, notifications[-1].pk if notifications else after
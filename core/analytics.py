@@ -0,0 +1,199 @@
+# backend/core/analytics.py
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import DateField, Q, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek, TruncYear
+from rest_framework import serializers
+
+from .filters import TransactionFilterSet
+from .models import MonthlyRollup
+from . import fx
+
+TRUNCATE = {'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth, 'year': TruncYear}
+# Upper bound on the buckets one request may span, whatever its density.
+MAX_BUCKETS = 1000
+# TransactionFilterSet filters the rollup buckets can answer as well.
+ROLLUP_FILTERS = {'type', 'category'}
+CENT = Decimal('0.01')
+
+
+class TimeseriesQuerySerializer(serializers.Serializer):
+    bucket = serializers.ChoiceField(choices=list(TRUNCATE), default='month')
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    rolling = serializers.IntegerField(min_value=2, max_value=60, required=False)
+    density = serializers.ChoiceField(choices=['dense', 'sparse'], default='dense')
+
+    def validate(self, attrs):
+        # By default the twelve calendar months up to and including the current one.
+        attrs.setdefault('date_to', next_bucket(date.today().replace(day=1), 'month') - timedelta(days=1))
+        end = attrs['date_to']
+        attrs.setdefault('date_from', date(end.year - 1 + end.month // 12, end.month % 12 + 1, 1))
+        if attrs['date_from'] > attrs['date_to']:
+            raise serializers.ValidationError({'date_from': 'Must not be after date_to.'})
+        count = len(bucket_starts(attrs['date_from'], attrs['date_to'], attrs['bucket'], limit=MAX_BUCKETS + 1))
+        if count > MAX_BUCKETS:
+            raise serializers.ValidationError(
+                {'bucket': f'The range spans more than {MAX_BUCKETS} {attrs["bucket"]} buckets.'}
+            )
+        return attrs
+
+
+def bucket_start(day, bucket):
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    if bucket == 'year':
+        return day.replace(month=1, day=1)
+    return day
+
+
+def next_bucket(start, bucket):
+    if bucket == 'day':
+        return start + timedelta(days=1)
+    if bucket == 'week':
+        return start + timedelta(days=7)
+    if bucket == 'month':
+        return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return date(start.year + 1, 1, 1)
+
+
+def bucket_starts(start, end, bucket, limit=None):
+    """The start date of every bucket overlapping `[start, end]`, oldest first."""
+    starts = []
+    current = bucket_start(start, bucket)
+    while current <= end and (limit is None or len(starts) < limit):
+        starts.append(current)
+        current = next_bucket(current, bucket)
+    return starts
+
+
+def _uses_rollups(bucket, start, end, params):
+    # Month and year buckets over whole months can be read from the rollups,
+    # provided no filter needs the individual transactions.
+    whole_months = start.day == 1 and next_bucket(end, 'day').day == 1
+    narrowed = {name for name in TransactionFilterSet.base_filters if params.get(name)}
+    return bucket in ('month', 'year') and whole_months and narrowed <= ROLLUP_FILTERS | {'date_from', 'date_to'}
+
+
+def _rollup_rows(user, bucket, start, end, filterset):
+    rows = MonthlyRollup.objects.filter(user=user).filter(
+        Q(year__gt=start.year) | Q(year=start.year, month__gte=start.month),
+        Q(year__lt=end.year) | Q(year=end.year, month__lte=end.month),
+    )
+    data = filterset.form.cleaned_data
+    if data.get('type') in ('INCOME', 'EXPENSE'):
+        rows = rows.filter(type=data['type'])
+    if data.get('category'):
+        rows = rows.filter(category_id__in=data['category'])
+    period = ('year', 'month') if bucket == 'month' else ('year',)
+    rows = rows.values(*period, 'category_id', 'category__name', 'currency').annotate(
+        income=Sum('total', filter=Q(type='INCOME')),
+        expenses=Sum('total', filter=Q(type='EXPENSE')),
+    ).order_by()
+    for row in rows:
+        row['period'] = date(row['year'], row.get('month', 1), 1)
+        yield row
+
+
+def _transaction_rows(bucket, filterset, currency):
+    # Converted to `currency` within the aggregation (see core.fx).
+    return filterset.qs.alias(converted=fx.converted_amount(currency)).annotate(
+        period=TRUNCATE[bucket]('date', output_field=DateField()),
+    ).values('period', 'category_id', 'category__name').annotate(
+        income=Sum('converted', filter=Q(type='INCOME')),
+        expenses=Sum('converted', filter=Q(type='EXPENSE')),
+    ).order_by()
+
+
+def build_timeseries(user, params, queryset, currency=None):
+    """
+    Income, expense and per-category totals for `user`, bucketed by day, week,
+    month or year over `date_from..date_to` (both inclusive).
+
+    `params` are the request's query parameters: the bucketing options of
+    TimeseriesQuerySerializer plus any TransactionFilterSet filter; `queryset`
+    holds the user's transactions. The whole range comes from one grouped
+    aggregation: over the monthly rollups for month and year buckets covering
+    whole months, over the matching transactions otherwise, or when the range
+    holds amounts in currencies other than the user's base currency, which
+    are converted at their own day's rate (rows without a rate are left out).
+
+    `rolling=N` adds the trailing N-bucket mean of income and expenses (null
+    until N buckets are available). `density=dense` returns every bucket in
+    the range, zero-filled; `density=sparse` only the buckets with data.
+    Totals are in `currency`, by default the base currency as stored (see
+    core.fx.base_currency).
+    """
+    options = TimeseriesQuerySerializer(data=params)
+    options.is_valid(raise_exception=True)
+    options = options.validated_data
+    bucket, start, end = options['bucket'], options['date_from'], options['date_to']
+
+    filter_params = params.copy()
+    filter_params['date_from'], filter_params['date_to'] = start, end
+    filterset = TransactionFilterSet(filter_params, queryset=queryset)
+    if not filterset.is_valid():
+        raise serializers.ValidationError(filterset.errors)
+
+    currency = currency or fx.base_currency(user)
+    rows = None
+    if _uses_rollups(bucket, start, end, params):
+        rows = list(_rollup_rows(user, bucket, start, end, filterset))
+        if any(row['currency'] != currency for row in rows):
+            # Other currencies are converted at each transaction's own day.
+            rows = None
+    if rows is None:
+        rows = _transaction_rows(bucket, filterset, currency)
+
+    by_period = {}
+    for row in rows:
+        point = by_period.setdefault(row['period'], {'income': 0, 'expenses': 0, 'categories': []})
+        # Sums of converted amounts may come back from SQLite as floats.
+        income, expenses = round(row['income'] or 0, 2), round(row['expenses'] or 0, 2)
+        point['income'] += income
+        point['expenses'] += expenses
+        point['categories'].append({
+            'category_id': row['category_id'],
+            'category_name': row['category__name'],
+            'income': income,
+            'expenses': expenses,
+        })
+
+    results = []
+    window = options.get('rolling')
+    income_sum = expenses_sum = 0
+    for index, period in enumerate(bucket_starts(start, end, bucket)):
+        totals = by_period.get(period, {'income': 0, 'expenses': 0, 'categories': []})
+        point = {
+            'period': period,
+            'income': totals['income'],
+            'expenses': totals['expenses'],
+            'balance': totals['income'] - totals['expenses'],
+        }
+        if window:
+            income_sum += point['income']
+            expenses_sum += point['expenses']
+            if index >= window:
+                income_sum -= results[index - window]['income']
+                expenses_sum -= results[index - window]['expenses']
+            full = index + 1 >= window
+            point['income_avg'] = (Decimal(income_sum) / window).quantize(CENT) if full else None
+            point['expenses_avg'] = (Decimal(expenses_sum) / window).quantize(CENT) if full else None
+        point['categories'] = sorted(
+            totals['categories'], key=lambda item: (-item['expenses'], -item['income'], item['category_name'] or '')
+        )
+        results.append(point)
+
+    if options['density'] == 'sparse':
+        results = [point for point in results if point['period'] in by_period]
+    return {
+        'bucket': bucket,
+        'date_from': start,
+        'date_to': end,
+        'rolling': window,
+        'density': options['density'],
+        'results': results,
+    }
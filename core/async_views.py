@@ -0,0 +1,157 @@
+# backend/core/async_views.py
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .fastpath import row_encoder
+from .filters import TransactionFilterSet
+from .metrics import serializing
+from .models import Category, Transaction
+from .pagination import AsyncPageNumberPagination, TransactionCursorPagination
+from .renderers import FastJSONRenderer
+from .search import TransactionSearchFilter
+from .serializers import CategorySerializer, TransactionSerializer
+from .summary import abuild_financial_summary, aget_cached_summary, summary_period
+from . import versions
+
+
+class AsyncReadView(View):
+    """
+    Base for the read-only async endpoints under /api/async/. They answer the
+    same requests, with the same bytes, as their DRF counterparts, but query
+    through the async ORM so that under an ASGI server a request waiting on
+    the database does not hold a worker thread.
+
+    Authentication reuses the DRF authenticators (run in a thread, as they
+    are synchronous) and the default throttles; every view requires an
+    authenticated user and renders JSON only. Errors are formatted by DRF's
+    exception handler.
+    """
+    renderer = FastJSONRenderer()
+    # The DRF resource whose version counter drives ETag/Last-Modified, or
+    # None for views that compute their own validators.
+    resource = None
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return await super().dispatch(request, *args, **kwargs)
+        authenticators = [auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+        drf_request = Request(request, authenticators=authenticators)
+        try:
+            user = await sync_to_async(lambda: drf_request.user)()
+            if not user or not user.is_authenticated:
+                raise exceptions.NotAuthenticated()
+            self.check_throttles(drf_request)
+            return await self.get(drf_request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.handle_exception(drf_request, authenticators, exc)
+
+    def check_throttles(self, request):
+        # As APIView.check_throttles; the token buckets need no I/O.
+        waits = [
+            throttle.wait() for throttle in (cls() for cls in api_settings.DEFAULT_THROTTLE_CLASSES)
+            if not throttle.allow_request(request, self)
+        ]
+        if waits:
+            raise exceptions.Throttled(max(waits))
+
+    def handle_exception(self, request, authenticators, exc):
+        # The same 401/403 choice as APIView.handle_exception.
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            auth_header = authenticators[0].authenticate_header(request) if authenticators else None
+            if auth_header:
+                exc.auth_header = auth_header
+            else:
+                exc.status_code = status.HTTP_403_FORBIDDEN
+        handler = api_settings.EXCEPTION_HANDLER
+        response = handler(exc, {'view': self, 'args': self.args, 'kwargs': self.kwargs, 'request': request})
+        if response is None:
+            raise exc
+        rendered = self.render(request, response.data, status=response.status_code)
+        for header, value in response.items():
+            rendered[header] = value
+        return rendered
+
+    def render(self, request, data, status=status.HTTP_200_OK):
+        return HttpResponse(self.renderer.render(data), status=status, content_type='application/json')
+
+    async def conditional_response(self, request, build, etag, last_modified):
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = await build(request)
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    async def get(self, request, *args, **kwargs):
+        version, updated_at = await versions.acurrent(request.user.pk, self.resource)
+        etag, last_modified = versions.validators(
+            request.user.pk, self.resource, version, updated_at, request.get_full_path(),
+        )
+        return await self.conditional_response(request, self.build, etag, last_modified)
+
+    async def paginated(self, request, paginator, encoder, queryset):
+        rows = await paginator.apaginate_queryset(encoder.values(queryset), request, view=self)
+        with serializing():
+            data = [encoder.encode(row) for row in rows]
+        return self.render(request, paginator.get_paginated_response(data).data)
+
+
+class AsyncFinancialSummaryView(AsyncReadView):
+    """Async FinancialSummaryView: the same parameters, cache entries and validators."""
+
+    async def get(self, request):
+        year, month = summary_period(request.query_params)
+        if TransactionFilterSet.narrows_period(request.query_params):
+            params = request.query_params.copy()
+            params['year'], params['month'] = year, month
+            filterset = TransactionFilterSet(params, queryset=Transaction.objects.filter(user=request.user), request=request)
+            if not filterset.is_valid():
+                raise ValidationError(filterset.errors)
+            data = await abuild_financial_summary(request.user, year, month, transactions=filterset.qs)
+            return self.render(request, data)
+        entry = await aget_cached_summary(request.user, year, month)
+
+        async def build(request):
+            return self.render(request, entry['data'])
+
+        return await self.conditional_response(request, build, entry['etag'], entry['last_modified'])
+
+
+class AsyncTransactionListView(AsyncReadView):
+    """Async TransactionViewSet list: the same filters, search and both pagination styles."""
+    resource = versions.TRANSACTION
+    # Used by TransactionSearchFilter's LIKE fallback on other databases.
+    search_fields = ['description', 'category__name']
+
+    async def build(self, request):
+        filterset = TransactionFilterSet(
+            request.query_params, queryset=Transaction.objects.filter(user=request.user), request=request,
+        )
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        queryset = TransactionSearchFilter().filter_queryset(request, filterset.qs, self)
+        params = request.query_params
+        if params.get('pagination') == 'cursor' or 'cursor' in params:
+            paginator = TransactionCursorPagination()
+        else:
+            paginator = AsyncPageNumberPagination()
+        return await self.paginated(request, paginator, row_encoder(TransactionSerializer), queryset)
+
+
+class AsyncCategoryListView(AsyncReadView):
+    """Async CategoryViewSet list."""
+    resource = versions.CATEGORY
+
+    async def build(self, request):
+        queryset = Category.objects.filter(user=request.user)
+        return await self.paginated(request, AsyncPageNumberPagination(), row_encoder(CategorySerializer), queryset)
@@ -0,0 +1,79 @@
+# backend/core/benchmarks.py
+import json
+import math
+import subprocess
+from datetime import datetime, timezone
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(timings, queries=None, errors=0, elapsed=None):
+    """
+    Reduces per-request timings (seconds) and query counts to the figures a
+    baseline stores: throughput, mean and p50/p95/p99 latency in ms, and the
+    median query count (None when queries were not observable).
+    """
+    ordered = sorted(timings)
+    elapsed = elapsed if elapsed is not None else sum(timings)
+    ms = lambda value: round(value * 1000, 3) if value is not None else None
+    return {
+        'requests': len(timings),
+        'errors': errors,
+        'throughput': round(len(timings) / elapsed, 1) if elapsed else None,
+        'mean_ms': ms(sum(ordered) / len(ordered)) if ordered else None,
+        'p50_ms': ms(percentile(ordered, 50)),
+        'p95_ms': ms(percentile(ordered, 95)),
+        'p99_ms': ms(percentile(ordered, 99)),
+        'queries': percentile(sorted(queries), 50) if queries else None,
+    }
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_baseline(path, results, **meta):
+    baseline = {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': current_commit(),
+        **meta,
+        'results': results,
+    }
+    with open(path, 'w') as handle:
+        json.dump(baseline, handle, indent=2, sort_keys=True)
+    return baseline
+
+
+def load_baseline(path):
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def compare(results, baseline, tolerance=0.2):
+    """
+    Lists regressions of `results` against a saved baseline: any scenario
+    whose p95 latency grew by more than `tolerance` (a fraction) or whose
+    query count grew at all. Scenarios missing from either side are skipped.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline['results'].get(name)
+        if previous is None:
+            continue
+        if previous.get('p95_ms') and current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']} ms -> {current['p95_ms']} ms")
+        if previous.get('queries') is not None and current.get('queries') is not None \
+                and current['queries'] > previous['queries']:
+            regressions.append(f"{name}: queries {previous['queries']} -> {current['queries']}")
+    return regressions
@@ -0,0 +1,83 @@
+# backend/core/exports.py
+import csv
+import io
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+EXPORT_FIELDS = ['id', 'date', 'type', 'amount', 'currency', 'category', 'category_name', 'description']
+
+# Rows fetched from the database per round trip, and rows per chunk sent to the client.
+CHUNK_SIZE = 2000
+
+
+def _values(txn):
+    return [
+        txn.id,
+        txn.date.isoformat(),
+        txn.type,
+        str(txn.amount),
+        txn.currency,
+        txn.category_id,
+        txn.category.name if txn.category_id else None,
+        txn.description,
+    ]
+
+
+def _batches(queryset):
+    # `.iterator()` streams rows with a server-side cursor instead of caching
+    # the whole result, so memory stays flat however long the history is.
+    batch = []
+    for txn in queryset.select_related('category').iterator(chunk_size=CHUNK_SIZE):
+        batch.append(_values(txn))
+        if len(batch) >= CHUNK_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stream_csv(queryset):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for batch in _batches(queryset):
+        writer.writerows(['' if value is None else value for value in row] for row in batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stream_ndjson(queryset):
+    for batch in _batches(queryset):
+        yield ''.join(
+            json.dumps(dict(zip(EXPORT_FIELDS, row)), ensure_ascii=False) + '\n' for row in batch
+        )
+
+
+class ExportRenderer(BaseRenderer):
+    """
+    Content negotiation target for the export action. The rows themselves are
+    streamed by the view; `render` is only used for error responses.
+    """
+    charset = 'utf-8'
+    stream = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return json.dumps(data).encode(self.charset)
+
+
+class CSVExportRenderer(ExportRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    stream = staticmethod(stream_csv)
+
+
+class NDJSONExportRenderer(ExportRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    stream = staticmethod(stream_ndjson)
@@ -0,0 +1,121 @@
+# backend/core/fastpath.py
+from datetime import date
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import F
+from rest_framework import serializers
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+from rest_framework.settings import ISO_8601, api_settings
+
+from .metrics import serializing
+
+
+class RowEncoder:
+    """
+    A read-only equivalent of `serializer_class(instance).data` over `.values()`
+    rows. The serializer's fields are inspected once; `encode` is then a
+    generated function that builds each output dict directly, with the same
+    keys, order and values the serializer would produce.
+
+    Supported fields: plain model fields (integer, char, choice, date and
+    decimal), primary-key relations, and read-only `relation.field` sources
+    (left out of the output when the relation is null, as DRF does).
+    """
+    def __init__(self, serializer_class):
+        self.fields = []
+        self.expressions = {}
+        namespace = {}
+        lines = ['def encode(row):', '    out = {}']
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            key = repr(name)
+            source = field.source_attrs
+            if len(source) == 2 and field.read_only:
+                relation = source[0]
+                self.expressions[name] = F('__'.join(source))
+                self.fields.append(relation)
+                lines.append(f'    if row[{relation!r}] is not None:')
+                lines.append(f'        out[{key}] = row[{key}]')
+                continue
+            if len(source) != 1:
+                raise ImproperlyConfigured(f'{serializer_class.__name__}.{name}: unsupported source {field.source!r}')
+            self.fields.append(source[0])
+            value = f'row[{source[0]!r}]'
+            converter = self.converter(serializer_class, name, field)
+            if converter is None:
+                lines.append(f'    out[{key}] = {value}')
+            else:
+                namespace[f'convert_{name}'] = converter
+                lines.append(f'    value = {value}')
+                lines.append(f'    out[{key}] = None if value is None else convert_{name}(value)')
+        lines.append('    return out')
+        exec('\n'.join(lines), namespace)
+        self.encode = namespace['encode']
+        self.fields = list(dict.fromkeys(self.fields))
+
+    @staticmethod
+    def converter(serializer_class, name, field):
+        # Values already in their output form need no call at all.
+        if isinstance(field, (serializers.IntegerField, serializers.PrimaryKeyRelatedField, serializers.CharField,
+                              serializers.ChoiceField)):
+            return None
+        if isinstance(field, serializers.DateField) and not isinstance(field, serializers.DateTimeField):
+            output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+            if output_format is None:
+                return None
+            if output_format.lower() == ISO_8601:
+                return date.isoformat
+            return field.to_representation
+        if isinstance(field, serializers.DecimalField):
+            return field.to_representation
+        raise ImproperlyConfigured(f'{serializer_class.__name__}.{name}: unsupported field {type(field).__name__}')
+
+    def values(self, queryset, *extra):
+        # `extra` fields are fetched alongside and ignored by `encode`.
+        return queryset.values(*self.fields, *extra, **self.expressions)
+
+
+_encoders = {}
+
+
+def row_encoder(serializer_class):
+    if serializer_class not in _encoders:
+        _encoders[serializer_class] = RowEncoder(serializer_class)
+    return _encoders[serializer_class]
+
+
+class ValuesReadMixin:
+    """
+    Serves `list` and `retrieve` from `.values()` rows encoded by a RowEncoder
+    built from `read_serializer_class`, skipping model instances and
+    per-row serializer field binding. Filtering, pagination and lookups are
+    the viewset's own. Writes keep using the full serializers.
+    """
+    read_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if self.read_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+        encoder = row_encoder(self.read_serializer_class)
+        queryset = encoder.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        rows = list(queryset) if page is None else page
+        with serializing():
+            data = [encoder.encode(row) for row in rows]
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        if self.read_serializer_class is None:
+            return super().retrieve(request, *args, **kwargs)
+        encoder = row_encoder(self.read_serializer_class)
+        queryset = encoder.values(self.filter_queryset(self.get_queryset()))
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        self.check_object_permissions(request, row)
+        with serializing():
+            data = encoder.encode(row)
+        return Response(data)
@@ -0,0 +1,60 @@
+# backend/core/filters.py
+from django_filters import rest_framework as filters
+
+from .models import Transaction
+from .utils import month_bounds
+
+
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    pass
+
+
+class TransactionFilterSet(filters.FilterSet):
+    """
+    Server-side filters for transactions, shared by the list, the export and
+    the summary. Each one maps onto an indexed predicate on core_transaction:
+
+        type=INCOME|EXPENSE              (user, type, date)
+        date_from=, date_to=             (user, date), both inclusive
+        year=&month=                     (user, date), as a half-open month range
+        category=1,2,3                   (user, category, date)
+        amount_min=, amount_max=         (user, amount), both inclusive
+    """
+    type = filters.CharFilter(method='filter_type')
+    date_from = filters.DateFilter(field_name='date', lookup_expr='gte')
+    date_to = filters.DateFilter(field_name='date', lookup_expr='lte')
+    year = filters.NumberFilter(method='filter_period')
+    month = filters.NumberFilter(method='filter_period')
+    category = NumberInFilter(field_name='category_id', lookup_expr='in')
+    amount_min = filters.NumberFilter(field_name='amount', lookup_expr='gte')
+    amount_max = filters.NumberFilter(field_name='amount', lookup_expr='lte')
+
+    class Meta:
+        model = Transaction
+        fields = []
+
+    def filter_type(self, queryset, name, value):
+        # Unknown values are ignored rather than rejected, as before.
+        if value in dict(Transaction.TRANSACTION_TYPE_CHOICES):
+            queryset = queryset.filter(type=value)
+        return queryset
+
+    def filter_period(self, queryset, name, value):
+        # Year and month only make sense together; see filter_queryset.
+        return queryset
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        year, month = self.form.cleaned_data.get('year'), self.form.cleaned_data.get('month')
+        if year and month:
+            try:
+                start, end = month_bounds(int(year), int(month))
+            except ValueError:
+                return queryset.none()
+            queryset = queryset.filter(date__gte=start, date__lt=end)
+        return queryset
+
+    @classmethod
+    def narrows_period(cls, params):
+        """True if `params` filter transactions beyond a plain year/month."""
+        return any(params.get(name) for name in cls.base_filters if name not in ('year', 'month'))
@@ -0,0 +1,233 @@
+# backend/core/fx.py
+import csv
+import heapq
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, OuterRef, Subquery, Value, When
+
+from .models import Budget, ExchangeRate, ExchangeRateVersion, Transaction, validate_currency
+from .utils import month_bounds
+from . import summary, versions
+
+CENT = Decimal('0.01')
+ONE = Decimal(1)
+# ExchangeRate's decimal places.
+RATE_PLACES = Decimal('1e-12')
+# RateCache.get's "not cached", as None is cached for missing rates.
+_MISSING = object()
+
+
+class RateCache:
+    """
+    Exchange rates by `(currency, day)` in a thread-safe memo, kept in each
+    worker process like users.authentication.UserCache. The memo belongs to
+    one ExchangeRateVersion: `sync` drops it once rates were loaded by any
+    process, and entries expire after `ttl` seconds regardless. Once
+    `maxsize` entries are held, those for the oldest days are evicted first,
+    as lookups mostly concern recent months.
+    """
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = None
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def sync(self, version):
+        """Drops the memo unless it holds rates of `version`."""
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+
+    def get(self, currency, day):
+        """The cached rate (None if known to be missing), or `_MISSING`."""
+        with self._lock:
+            entry = self._entries.get((currency, day))
+            if entry is None:
+                return _MISSING
+            expires_at, rate = entry
+            if expires_at <= time.monotonic():
+                del self._entries[(currency, day)]
+                return _MISSING
+            return rate
+
+    def set(self, currency, day, rate):
+        with self._lock:
+            self._entries[(currency, day)] = (time.monotonic() + self.ttl, rate)
+            if len(self._entries) > self.maxsize:
+                # A tenth at a time, so a full cache does not sort on every set.
+                excess = len(self._entries) - self.maxsize + max(self.maxsize // 10, 1)
+                for key in heapq.nsmallest(excess, self._entries, key=lambda key: key[1]):
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+rates = RateCache(maxsize=settings.FX_RATE_CACHE_SIZE, ttl=settings.FX_RATE_CACHE_TTL)
+
+
+def base_currency(user):
+    """
+    The user's base currency as stored, not as on a possibly cached
+    `request.user`, with `rates` synced to the current exchange-rate
+    version: one query, made before anything is converted for the user.
+    """
+    state = versions.state(user.pk)
+    rates.sync(state.rates_version)
+    return state.currency
+
+
+async def abase_currency(user):
+    state = await versions.astate(user.pk)
+    rates.sync(state.rates_version)
+    return state.currency
+
+
+def bump_rates_version():
+    """Marks the rates changed for every process (see RateCache.sync)."""
+    if not ExchangeRateVersion.objects.update(version=F('version') + 1):
+        ExchangeRateVersion.objects.get_or_create(pk=1, defaults={'version': 1})
+
+
+def inverse(rate):
+    return (ONE / rate).quantize(RATE_PLACES)
+
+
+def rate(currency, day):
+    """
+    `(rate, inverse)` of `currency` against FX_REFERENCE_CURRENCY in effect on
+    `day` (the latest on or before it), or None when there is none.
+    """
+    if currency == settings.FX_REFERENCE_CURRENCY:
+        return ONE, ONE
+    found = rates.get(currency, day)
+    if found is _MISSING:
+        found = (
+            ExchangeRate.objects.filter(currency=currency, date__lte=day)
+            .order_by('-date').values_list('rate', 'inverse').first()
+        )
+        rates.set(currency, day, found)
+    return found
+
+
+def convert(amount, currency, to, day):
+    """`amount` in `currency` converted to `to` at the rates of `day`, to the cent; None without rates."""
+    if currency == to:
+        return amount
+    from_rate, to_rate = rate(currency, day), rate(to, day)
+    if from_rate is None or to_rate is None:
+        return None
+    return (amount * from_rate[1] * to_rate[0]).quantize(CENT)
+
+
+def rate_date(year, month, today=None):
+    """The day whose rates convert a month's budgets: its last day, or today for the current month."""
+    _, end = month_bounds(year, month)
+    return min(end - timedelta(days=1), today or date.today())
+
+
+def _rate_subquery(currency, day, field):
+    return Subquery(
+        ExchangeRate.objects.filter(currency=currency, date__lte=day).order_by('-date').values(field)[:1]
+    )
+
+
+def converted_amount(to, amount='amount', currency='currency', day='date'):
+    """
+    An expression converting each row's `amount` from its `currency` to `to`
+    at the rates in effect on the row's `day`, for use inside an aggregation:
+    the rates are joined in by the database (one index seek per rate on the
+    (currency, date) constraint), so no row is read into Python. NULL where
+    a rate is missing. Rows already in `to` are passed through.
+    """
+    reference = settings.FX_REFERENCE_CURRENCY
+    day = OuterRef(day)
+    from_inverse = Case(
+        When(**{currency: reference}, then=Value(ONE)),
+        default=_rate_subquery(OuterRef(currency), day, 'inverse'),
+    )
+    to_rate = Value(ONE) if to == reference else _rate_subquery(to, day, 'rate')
+    return Case(
+        When(**{currency: to}, then=F(amount)),
+        default=F(amount) * from_inverse * to_rate,
+        output_field=DecimalField(max_digits=20, decimal_places=2),
+    )
+
+
+# --- Loading ---
+BATCH_SIZE = 1000
+
+
+def parse_rates(lines):
+    """
+    Yields `(currency, date, rate)` from CSV lines, either one rate per row
+    with `date`, `currency` and `rate` columns, or one day per row with a
+    column per currency after the date (the ECB's eurofxref-hist.csv).
+    Blank and N/A cells are skipped. Raises ValueError on a malformed row.
+    """
+    reader = csv.reader(lines)
+    header = [name.strip() for name in next(reader, [])]
+    long_format = {'date', 'currency', 'rate'} <= {name.lower() for name in header}
+    if long_format:
+        columns = {name.lower(): index for index, name in enumerate(header)}
+    for number, row in enumerate(reader, start=2):
+        cells = [cell.strip() for cell in row]
+        if not any(cells):
+            continue
+        try:
+            if long_format:
+                entries = [(cells[columns['currency']].upper(), cells[columns['date']], cells[columns['rate']])]
+            else:
+                entries = [(currency.upper(), cells[0], value) for currency, value in zip(header[1:], cells[1:]) if currency]
+            for currency, day, value in entries:
+                if value in ('', 'N/A'):
+                    continue
+                validate_currency(currency)
+                value = Decimal(value)
+                if value <= 0:
+                    raise ValueError('rates must be positive')
+                yield currency, date.fromisoformat(day), value
+        except (IndexError, InvalidOperation, ValidationError, ValueError) as exc:
+            message = exc.messages[0] if isinstance(exc, ValidationError) else str(exc) or type(exc).__name__
+            raise ValueError(f'Line {number}: {message}')
+
+
+def load_rates(entries):
+    """
+    Saves `(currency, date, rate)` entries, replacing the rates already held
+    for those days, and drops the memoized rates (in every process, through
+    the rates version) and the cached summaries that may have used them.
+    Returns the number of rates saved.
+    """
+    reference = settings.FX_REFERENCE_CURRENCY
+    objs = {
+        (currency, day): ExchangeRate(currency=currency, date=day, rate=value, inverse=inverse(value))
+        for currency, day, value in entries if currency != reference
+    }
+    with transaction.atomic():
+        ExchangeRate.objects.bulk_create(
+            objs.values(), batch_size=BATCH_SIZE,
+            update_conflicts=True, unique_fields=['currency', 'date'], update_fields=['rate', 'inverse'],
+        )
+        # Only the summaries and time series of users holding a foreign amount
+        # involve rates.
+        users = set()
+        for model in (Transaction, Budget):
+            users.update(
+                model.objects.exclude(currency=F('user__base_currency')).values_list('user_id', flat=True).distinct()
+            )
+        for user_id in users:
+            summary.invalidate_user_summaries(user_id)
+        versions.bump_many(users, versions.TRANSACTION)
+        bump_rates_version()
+    rates.clear()
+    return len(objs)
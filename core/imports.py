@@ -0,0 +1,147 @@
+# backend/core/imports.py
+import csv
+import io
+import re
+from datetime import datetime
+
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+
+from .models import Transaction, TransactionImport, validate_currency
+from .summary import invalidate_summary, invalidate_user_summaries
+from .utils import resolve_categories
+from . import rollups, versions
+
+# Rows written per INSERT statement.
+BATCH_SIZE = 500
+# Upper bound on the rows accepted by one import request.
+MAX_ROWS = 10000
+
+
+class TransactionImportRowSerializer(serializers.Serializer):
+    category_name = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2)
+    # Blank: the user's base currency.
+    currency = serializers.CharField(required=False, allow_blank=True, default='', validators=[validate_currency])
+    type = serializers.ChoiceField(choices=Transaction.TRANSACTION_TYPE_CHOICES)
+    date = serializers.DateField()
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+# --- File parsing ---
+OFX_TRANSACTION = re.compile(r'<STMTTRN>(.*?)</STMTTRN>', re.IGNORECASE | re.DOTALL)
+OFX_FIELD = re.compile(r'<(\w+)>([^<\r\n]*)')
+OFX_CURRENCY = re.compile(r'<CURDEF>\s*([A-Za-z]{3})', re.IGNORECASE)
+
+
+def parse_csv(text):
+    """
+    Reads CSV rows with a header naming the import fields
+    (`date, type, amount, currency, category_name, description`).
+    """
+    return [
+        {key.strip(): (value or '').strip() for key, value in row.items() if key}
+        for row in csv.DictReader(io.StringIO(text))
+    ]
+
+
+def parse_ofx(text):
+    """
+    Reads the `<STMTTRN>` blocks of an OFX/QFX statement. Negative amounts are
+    expenses, positive ones income; NAME (or MEMO) becomes the description.
+    Amounts are in the statement's CURDEF currency.
+    """
+    currency = OFX_CURRENCY.search(text)
+    currency = currency.group(1).upper() if currency else ''
+    rows = []
+    for block in OFX_TRANSACTION.findall(text):
+        fields = {tag.upper(): value.strip() for tag, value in OFX_FIELD.findall(block)}
+        amount = fields.get('TRNAMT', '')
+        posted = fields.get('DTPOSTED', '')[:8]
+        try:
+            posted = datetime.strptime(posted, '%Y%m%d').date().isoformat()
+        except ValueError:
+            pass
+        rows.append({
+            'amount': amount.lstrip('-+'),
+            'currency': currency,
+            'type': 'EXPENSE' if amount.startswith('-') else 'INCOME',
+            'date': posted,
+            'description': fields.get('NAME') or fields.get('MEMO', ''),
+        })
+    return rows
+
+
+def parse_upload(upload):
+    text = upload.read().decode('utf-8-sig', errors='replace')
+    if upload.name.lower().endswith(('.ofx', '.qfx')) or '<OFX>' in text[:4096].upper():
+        return parse_ofx(text)
+    return parse_csv(text)
+
+
+# --- Import ---
+def _write(user, rows):
+    by_name, created_categories = resolve_categories(user, {row['category_name'] for row in rows})
+    created = {name.lower() for name in created_categories}
+    objs = [
+        Transaction(
+            user=user,
+            category=by_name.get(row['category_name'].lower()),
+            amount=row['amount'],
+            currency=row['currency'] or user.base_currency,
+            type=row['type'],
+            date=row['date'],
+            description=row['description'],
+        )
+        for row in rows
+    ]
+    Transaction.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+    rollups.record(objs)
+    # bulk_create sends no signals, so drop the cached summaries and bump the version here.
+    versions.bump(user.pk, versions.TRANSACTION)
+    for period in {(obj.date.year, obj.date.month) for obj in objs}:
+        invalidate_summary(user.pk, *period)
+    if created_categories:
+        invalidate_user_summaries(user.pk)
+    # Stamped before thousands of INSERTs; see versions.touch().
+    versions.touch([category for name, category in by_name.items() if name in created] + objs)
+    return {'imported': len(objs), 'categories_created': created_categories}
+
+
+def import_transactions(user, data, idempotency_key=None):
+    """
+    Validates and imports a batch of transaction rows for `user`.
+
+    Returns `(created, result)`. `created` is False when `idempotency_key`
+    matches an earlier import, in which case nothing is written and the
+    earlier result is returned. Raises `serializers.ValidationError` with the
+    errors of each invalid row keyed by its index; nothing is written then.
+    """
+    if idempotency_key:
+        previous = TransactionImport.objects.filter(user=user, idempotency_key=idempotency_key).first()
+        if previous is not None:
+            return False, previous.result
+
+    # One list serializer validates the whole batch; its errors line up with the input rows.
+    serializer = TransactionImportRowSerializer(data=data, many=True, max_length=MAX_ROWS, allow_empty=False)
+    if not serializer.is_valid():
+        errors = serializer.errors
+        if isinstance(errors, list):
+            errors = {'rows': {index: row for index, row in enumerate(errors) if row}}
+        raise serializers.ValidationError(errors)
+
+    with transaction.atomic():
+        if idempotency_key:
+            # Claimed before writing, so a concurrent retry with the same key
+            # fails on the unique constraint instead of duplicating rows.
+            try:
+                with transaction.atomic():
+                    record = TransactionImport.objects.create(user=user, idempotency_key=idempotency_key)
+            except IntegrityError:
+                return False, TransactionImport.objects.get(user=user, idempotency_key=idempotency_key).result
+        result = _write(user, serializer.validated_data)
+        if idempotency_key:
+            record.row_count = result['imported']
+            record.result = result
+            record.save(update_fields=['row_count', 'result'])
+    return True, result
@@ -0,0 +1,184 @@
+# backend/core/jobs.py
+import logging
+import os
+from contextlib import nullcontext
+from datetime import date, timedelta
+from pathlib import Path
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+
+from .exports import CSVExportRenderer, NDJSONExportRenderer
+from .filters import TransactionFilterSet
+from .imports import import_transactions
+from .models import Job, RecurringTransaction, Transaction
+from .search import TransactionSearchFilter
+from . import recurring, rollups
+
+logger = logging.getLogger(__name__)
+
+IMPORT = 'import_transactions'
+EXPORT = 'export_transactions'
+REBUILD_ROLLUPS = 'rebuild_rollups'
+MATERIALIZE_RECURRING = 'materialize_recurring'
+
+EXPORT_RENDERERS = {renderer.format: renderer for renderer in (CSVExportRenderer, NDJSONExportRenderer)}
+
+# Due jobs looked at per claim; the first one not taken by another worker wins.
+CLAIM_CANDIDATES = 10
+
+# kind: (function(job) -> JSON result, whether it writes to the database)
+HANDLERS = {}
+
+
+def handler(kind, writes=True):
+    def register(func):
+        HANDLERS[kind] = (func, writes)
+        return func
+    return register
+
+
+def enqueue(kind, user=None, params=None):
+    if kind not in HANDLERS:
+        raise ValueError(f'Unknown job kind {kind!r}.')
+    return Job.objects.create(kind=kind, user=user, params=params or {}, max_attempts=settings.JOB_MAX_ATTEMPTS)
+
+
+def claim(now=None):
+    """
+    Marks the next due job as running and returns it, or None when no job is
+    due. Pending jobs are due at their `run_at`; running ones whose lease
+    (`locked_until`) ran out are taken over, their worker being presumed
+    dead. Each claim is a conditional UPDATE, so concurrent workers, in any
+    process, never take the same job.
+    """
+    now = now or timezone.now()
+    due = Job.objects.filter(
+        Q(status=Job.PENDING, run_at__lte=now) | Q(status=Job.RUNNING, locked_until__lt=now)
+    ).order_by('run_at', 'id')
+    for job in due[:CLAIM_CANDIDATES]:
+        current = Job.objects.filter(pk=job.pk, status=job.status, attempts=job.attempts)
+        if job.status == Job.RUNNING and job.attempts >= job.max_attempts:
+            current.update(status=Job.FAILED, error='The worker running the job stopped.', finished_at=now)
+            continue
+        if current.update(
+            status=Job.RUNNING, attempts=F('attempts') + 1,
+            locked_until=now + timedelta(seconds=settings.JOB_TIMEOUT),
+        ):
+            return Job.objects.get(pk=job.pk)
+    return None
+
+
+def _finish(job, **fields):
+    # Only while this worker still holds the job: one that outlived its lease
+    # may have been taken over, and the new attempt's outcome wins.
+    return Job.objects.filter(pk=job.pk, status=Job.RUNNING, attempts=job.attempts).update(**fields)
+
+
+def run(job, write_lock=None):
+    """
+    Runs a claimed job and records its outcome. Jobs that write hold
+    `write_lock` (shared by the worker processes) while they run. A failed
+    attempt is retried after JOB_RETRY_DELAY seconds, doubling each time,
+    until `max_attempts`; invalid parameters fail the job straight away.
+    """
+    func, writes = HANDLERS[job.kind]
+    try:
+        with write_lock if writes and write_lock is not None else nullcontext():
+            result = func(job)
+    except ValidationError as exc:
+        _finish(job, status=Job.FAILED, result=exc.detail, error='Invalid parameters.', finished_at=timezone.now())
+    except Exception as exc:
+        logger.exception('Job %s (%s) failed on attempt %s', job.pk, job.kind, job.attempts)
+        if job.attempts < job.max_attempts:
+            delay = settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+            run_at = timezone.now() + timedelta(seconds=delay)
+            _finish(job, status=Job.PENDING, error=repr(exc), run_at=run_at, locked_until=None)
+        else:
+            _finish(job, status=Job.FAILED, error=repr(exc), finished_at=timezone.now())
+    else:
+        _finish(job, status=Job.SUCCEEDED, result=result, error='', finished_at=timezone.now())
+
+
+def work(stop, write_lock=None, burst=False, poll_interval=1.0):
+    """
+    Claims and runs jobs until `stop` (an Event) is set, waiting
+    `poll_interval` seconds whenever the queue is empty; with `burst`,
+    returns as soon as it is. Returns the number of jobs run.
+    """
+    count = 0
+    while not stop.is_set():
+        job = claim()
+        if job is None:
+            if burst:
+                break
+            stop.wait(poll_interval)
+            continue
+        run(job, write_lock)
+        count += 1
+    return count
+
+
+# --- Handlers ---
+def export_path(job):
+    return Path(settings.JOB_FILES_ROOT) / 'exports' / f'{job.pk}.{job.params.get("format", "csv")}'
+
+
+@handler(IMPORT)
+def run_import(job):
+    # Keyed by the job, so a retry after an attempt that committed but never
+    # recorded its outcome replays that import instead of repeating it.
+    key = job.params.get('idempotency_key') or f'job:{job.pk}'
+    _, result = import_transactions(job.user, job.params.get('rows'), key)
+    return result
+
+
+class ExportSearchView:
+    # What TransactionSearchFilter's LIKE fallback reads from the view.
+    search_fields = ['description', 'category__name']
+
+
+@handler(EXPORT, writes=False)
+def run_export(job):
+    renderer = EXPORT_RENDERERS.get(job.params.get('format', 'csv'))
+    if renderer is None:
+        raise ValidationError({'format': f'Expected one of {", ".join(EXPORT_RENDERERS)}.'})
+    query = QueryDict(urlencode(job.params.get('filters', {}), doseq=True))
+    filterset = TransactionFilterSet(query, queryset=Transaction.objects.filter(user=job.user))
+    if not filterset.is_valid():
+        raise ValidationError(filterset.errors)
+    # The search filter reads its terms and user from a request.
+    http_request = HttpRequest()
+    http_request.GET = query
+    request = Request(http_request)
+    request.user = job.user
+    queryset = TransactionSearchFilter().filter_queryset(request, filterset.qs, view=ExportSearchView)
+
+    path = export_path(job)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_suffix(path.suffix + '.part')
+    with open(partial, 'w', encoding=renderer.charset, newline='') as file:
+        file.writelines(renderer.stream(queryset))
+    os.replace(partial, path)
+    return {'format': renderer.format, 'size': path.stat().st_size}
+
+
+@handler(REBUILD_ROLLUPS)
+def run_rebuild_rollups(job):
+    return {'buckets': rollups.rebuild(user=job.user)}
+
+
+@handler(MATERIALIZE_RECURRING)
+def run_materialize_recurring(job):
+    try:
+        today = date.fromisoformat(job.params['date']) if job.params.get('date') else None
+    except (TypeError, ValueError):
+        raise ValidationError({'date': 'Expected YYYY-MM-DD.'})
+    queryset = None if job.user is None else RecurringTransaction.objects.filter(user=job.user)
+    rules, created = recurring.materialize(today, queryset=queryset)
+    return {'recurring': rules, 'created': created}
@@ -0,0 +1,216 @@
+import http.client
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import date
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.benchmarks import compare, load_baseline, save_baseline, summarize
+
+
+def budget_sheet(context):
+    # The same 20-row sheet every time, so repeated runs exercise the upsert path.
+    return [
+        {'category_name': f'Bench budget {n}', 'amount': '150.00', 'year': context['year'], 'month': context['month']}
+        for n in range(20)
+    ]
+
+
+# name: (method, path, body factory, authenticated)
+SCENARIOS = {
+    'transactions': ('GET', '/api/transactions/', None, True),
+    'transactions_cursor': ('GET', '/api/transactions/?pagination=cursor', None, True),
+    'summary': ('GET', '/api/summary/?year={year}&month={month}', None, True),
+    'categories': ('GET', '/api/categories/', None, True),
+    'budgets_bulk': ('POST', '/api/budgets/', budget_sheet, True),
+    'token': ('POST', '/api/token/', lambda context: {'email': context['email'], 'password': context['password']}, False),
+}
+
+# Paths used instead with --async-views, keeping the scenario names so
+# baselines from both kinds of view (and server) can be compared directly.
+ASYNC_PATHS = {
+    'transactions': '/api/async/transactions/',
+    'transactions_cursor': '/api/async/transactions/?pagination=cursor',
+    'summary': '/api/async/summary/?year={year}&month={month}',
+    'categories': '/api/async/categories/',
+}
+
+
+class ClientDriver:
+    """Runs requests in-process through the Django test client, counting queries."""
+    concurrent = False
+
+    def __init__(self, accept_encoding=None):
+        # ALLOWED_HOSTS does not include the test client's default "testserver".
+        defaults = {'HTTP_ACCEPT_ENCODING': accept_encoding} if accept_encoding else {}
+        self.client = Client(HTTP_HOST='localhost', **defaults)
+
+    def request(self, method, path, body=None, token=None):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        data = json.dumps(body) if body is not None else None
+        with CaptureQueriesContext(connection) as queries:
+            if method == 'GET':
+                response = self.client.get(path, **headers)
+            else:
+                response = self.client.generic(method, path, data or '', content_type='application/json', **headers)
+        return response.status_code, response.content, len(queries)
+
+
+class HTTPDriver:
+    """Runs requests against a running server (e.g. gunicorn), one keep-alive connection per thread."""
+    concurrent = True
+
+    def __init__(self, base_url, accept_encoding=None):
+        self.accept_encoding = accept_encoding
+        parts = urlsplit(base_url)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.local = threading.local()
+
+    def request(self, method, path, body=None, token=None):
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        if self.accept_encoding:
+            headers['Accept-Encoding'] = self.accept_encoding
+        payload = json.dumps(body).encode() if body is not None else None
+        for attempt in range(2):
+            conn = getattr(self.local, 'conn', None)
+            if conn is None:
+                conn = self.local.conn = self.connection_class(self.netloc, timeout=30)
+            try:
+                conn.request(method, self.prefix + path, body=payload, headers=headers)
+                response = conn.getresponse()
+                content = response.read()
+                if response.getheader('Connection', '').lower() == 'close':
+                    conn.close()
+                    self.local.conn = None
+                return response.status, content, None
+            except (http.client.HTTPException, OSError):
+                # The server closed an idle connection; reconnect once.
+                conn.close()
+                self.local.conn = None
+                if attempt:
+                    raise
+
+
+THROTTLED = 429
+
+
+def check_throttled(status):
+    # A rate-limited run would time the 429s, not the endpoints.
+    if status == THROTTLED:
+        raise CommandError(
+            'The server is rate limiting the benchmark (429); run it with THROTTLE_ENABLED=False.'
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks the main API endpoints in-process (default) or against a running '
+        'server (--base-url), reporting throughput, p50/p95/p99 latency and query counts. '
+        'Use generate_data first; results can be saved as a JSON baseline and compared.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', default='bench0@example.com', help='User to authenticate as.')
+        parser.add_argument('--password', default='benchmark')
+        parser.add_argument('--scenario', action='append', choices=list(SCENARIOS),
+                            help='Scenario to run (repeatable); all by default.')
+        parser.add_argument('--iterations', type=int, default=200, help='Timed requests per scenario.')
+        parser.add_argument('--warmup', type=int, default=10, help='Untimed requests per scenario.')
+        parser.add_argument('--async-views', action='store_true',
+                            help='Request the /api/async/ versions of the read scenarios.')
+        parser.add_argument('--base-url', help='Benchmark a running server, e.g. http://127.0.0.1:8000.')
+        parser.add_argument('--concurrency', type=int, default=1, help='Parallel clients (with --base-url only).')
+        parser.add_argument('--accept-encoding', help='Accept-Encoding sent with every request, e.g. "br, gzip".')
+        parser.add_argument('--output', help='Save the results as a JSON baseline to this path.')
+        parser.add_argument('--compare', help='Compare against a JSON baseline; exit non-zero on regressions.')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Allowed p95 growth before --compare reports a regression (fraction).')
+
+    def handle(self, *args, **options):
+        if options['base_url']:
+            driver = HTTPDriver(options['base_url'], options['accept_encoding'])
+        else:
+            if options['concurrency'] > 1:
+                raise CommandError('--concurrency needs --base-url; the test client runs in-process.')
+            driver = ClientDriver(options['accept_encoding'])
+
+        # In-process, every request comes from one address at hundreds per
+        # second: the rate limits would measure themselves, not the endpoints.
+        with nullcontext() if options['base_url'] else override_settings(THROTTLE_ENABLED=False):
+            today = date.today()
+            context = {'email': options['email'], 'password': options['password'], 'year': today.year, 'month': today.month}
+            status, content, _ = driver.request('POST', '/api/token/', {'email': context['email'], 'password': context['password']})
+            check_throttled(status)
+            if status != 200:
+                raise CommandError(f'Could not log in as {context["email"]} ({status}); run generate_data first.')
+            token = json.loads(content)['access']
+
+            results = {}
+            for name in options['scenario'] or list(SCENARIOS):
+                results[name] = self.run_scenario(driver, name, context, token, options)
+                self.report(name, results[name])
+
+        if options['output']:
+            save_baseline(
+                options['output'], results,
+                mode=options['base_url'] or 'test-client', async_views=options['async_views'],
+                accept_encoding=options['accept_encoding'],
+                iterations=options['iterations'], concurrency=options['concurrency'],
+            )
+            self.stdout.write(f'Saved baseline to {options["output"]}')
+        if options['compare']:
+            regressions = compare(results, load_baseline(options['compare']), options['tolerance'])
+            if regressions:
+                raise CommandError('Regressions against the baseline:\n  ' + '\n  '.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
+
+    def run_scenario(self, driver, name, context, token, options):
+        method, path, body, authenticated = SCENARIOS[name]
+        if options['async_views']:
+            path = ASYNC_PATHS.get(name, path)
+        path = path.format(**context)
+
+        def call(_):
+            payload = body(context) if body else None
+            started = time.perf_counter()
+            status, _, queries = driver.request(method, path, payload, token if authenticated else None)
+            check_throttled(status)
+            return time.perf_counter() - started, status, queries
+
+        for _ in range(options['warmup']):
+            call(None)
+        started = time.perf_counter()
+        if options['concurrency'] > 1:
+            with ThreadPoolExecutor(options['concurrency']) as pool:
+                samples = list(pool.map(call, range(options['iterations'])))
+        else:
+            samples = [call(None) for _ in range(options['iterations'])]
+        elapsed = time.perf_counter() - started
+
+        return summarize(
+            [duration for duration, _, _ in samples],
+            queries=[queries for _, _, queries in samples if queries is not None],
+            errors=sum(1 for _, status, _ in samples if status >= 400),
+            elapsed=elapsed,
+        )
+
+    def report(self, name, result):
+        queries = '-' if result['queries'] is None else result['queries']
+        line = (
+            f"{name:<22} {result['throughput']:>8} req/s  p50 {result['p50_ms']:>8} ms  "
+            f"p95 {result['p95_ms']:>8} ms  p99 {result['p99_ms']:>8} ms  queries {queries}"
+        )
+        if result['errors']:
+            line += f"  errors {result['errors']}"
+        self.stdout.write(self.style.ERROR(line) if result['errors'] else line)
@@ -0,0 +1,75 @@
+import time
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.benchmarks import save_baseline
+from core.compression import BrotliCodec, GzipCodec, brotli
+
+# Responses compressed, as fetched uncompressed from the API.
+BODIES = {
+    'transactions': '/api/transactions/',
+    'transactions_cursor_100': '/api/transactions/?pagination=cursor&page_size=100',
+    'summary': '/api/summary/?year={year}&month={month}',
+    'export_ndjson': '/api/transactions/export/?format=ndjson',
+}
+GZIP_LEVELS = (1, 6, 9)
+BROTLI_QUALITIES = (1, 4, 5, 11)
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures the CPU time per response and the bytes saved by each gzip level and '
+        'brotli quality on real API responses, to choose COMPRESSION_GZIP_LEVEL and '
+        'COMPRESSION_BROTLI_QUALITY. Use generate_data first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', default='bench0@example.com', help='User whose responses are compressed.')
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--output', help='Save the results as a JSON baseline to this path.')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user {options["email"]}; run generate_data first.')
+        client = Client(HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        today = date.today()
+
+        codecs = [(f'gzip-{level}', GzipCodec(level)) for level in GZIP_LEVELS]
+        if brotli is None:
+            self.stdout.write('Brotli is not installed; measuring gzip only.')
+        else:
+            codecs += [(f'br-{quality}', BrotliCodec(quality)) for quality in BROTLI_QUALITIES]
+
+        results = {}
+        for name, path in BODIES.items():
+            response = client.get(path.format(year=today.year, month=today.month))
+            if response.status_code != 200:
+                raise CommandError(f'{name}: {path} returned {response.status_code}.')
+            body = b''.join(response.streaming_content) if response.streaming else response.content
+            self.stdout.write(f'{name}: {len(body)} bytes')
+            for label, codec in codecs:
+                started = time.process_time()
+                for _ in range(options['repeat']):
+                    compressed = codec.compress(body)
+                cpu_ms = (time.process_time() - started) * 1000 / options['repeat']
+                results[f'{name}_{label}'] = {
+                    'bytes': len(body),
+                    'compressed_bytes': len(compressed),
+                    'saved_percent': round(100 * (1 - len(compressed) / len(body)), 1),
+                    'cpu_ms': round(cpu_ms, 3),
+                }
+                result = results[f'{name}_{label}']
+                self.stdout.write(
+                    f'  {label:<10} {result["compressed_bytes"]:>9} bytes  saved {result["saved_percent"]:>5}%  '
+                    f'cpu {result["cpu_ms"]:>8} ms/response'
+                )
+
+        if options['output']:
+            save_baseline(options['output'], results, repeat=options['repeat'])
+            self.stdout.write(f'Saved baseline to {options["output"]}')
@@ -0,0 +1,68 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from core.benchmarks import save_baseline, summarize
+from core.fastpath import row_encoder
+from core.models import Budget, Transaction
+from core.renderers import FastJSONRenderer, orjson
+from core.serializers import BudgetSerializer, TransactionSerializer
+
+TARGETS = {
+    'transactions': (Transaction.objects.select_related('category'), TransactionSerializer),
+    'budgets': (Budget.objects.select_related('category'), BudgetSerializer),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Micro-benchmarks one page of rows through the ModelSerializer + JSONRenderer path '
+        'and the .values() + RowEncoder + FastJSONRenderer fast path, checking that both '
+        'produce the same bytes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', default='bench0@example.com', help='User whose rows are serialized.')
+        parser.add_argument('--rows', type=int, default=100, help='Rows per page.')
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--output', help='Save the results as a JSON baseline to this path.')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user {options["email"]}; run generate_data first.')
+        self.stdout.write(f'orjson: {"installed" if orjson else "not installed (stdlib json fallback)"}')
+
+        results = {}
+        for name, (queryset, serializer_class) in TARGETS.items():
+            queryset = queryset.filter(user=user)
+            rows = options['rows']
+            encoder = row_encoder(serializer_class)
+
+            def serializer_path():
+                return JSONRenderer().render(serializer_class(list(queryset[:rows]), many=True).data)
+
+            def fast_path():
+                return FastJSONRenderer().render([encoder.encode(row) for row in encoder.values(queryset)[:rows]])
+
+            if serializer_path() != fast_path():
+                raise CommandError(f'{name}: the fast path output differs from the serializer output.')
+            for label, run in (('serializer', serializer_path), ('fast', fast_path)):
+                timings = []
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    run()
+                    timings.append(time.perf_counter() - started)
+                results[f'{name}_{label}'] = summarize(timings)
+            serializer, fast = results[f'{name}_serializer'], results[f'{name}_fast']
+            self.stdout.write(
+                f'{name:<13} {rows} rows  serializer p50 {serializer["p50_ms"]} ms  '
+                f'fast p50 {fast["p50_ms"]} ms  ({serializer["p50_ms"] / fast["p50_ms"]:.1f}x)'
+            )
+
+        if options['output']:
+            save_baseline(options['output'], results, rows=options['rows'], orjson=bool(orjson))
+            self.stdout.write(f'Saved baseline to {options["output"]}')
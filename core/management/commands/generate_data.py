@@ -0,0 +1,146 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core import rollups, versions
+from core.models import Budget, Category, Transaction
+from core.summary import invalidate_user_summaries
+
+# name: (typical amount, spread, share of expense rows)
+EXPENSE_CATEGORIES = {
+    'Rent': (1200, 0.05, 0.02),
+    'Groceries': (60, 0.6, 0.30),
+    'Dining Out': (35, 0.7, 0.18),
+    'Transport': (20, 0.8, 0.15),
+    'Utilities': (90, 0.3, 0.04),
+    'Entertainment': (25, 0.9, 0.10),
+    'Health': (45, 0.8, 0.05),
+    'Shopping': (70, 1.0, 0.12),
+    'Travel': (400, 0.8, 0.02),
+    'Subscriptions': (12, 0.4, 0.02),
+}
+INCOME_CATEGORIES = {'Salary': (3500, 0.05), 'Freelance': (600, 0.6)}
+INCOME_SHARE = 0.05
+DESCRIPTIONS = {
+    'Rent': ['Monthly rent'],
+    'Groceries': ['Supermarket', 'Farmers market', 'Corner shop', 'Bakery'],
+    'Dining Out': ['Lunch with team', 'Pizza night', 'Coffee', 'Sushi dinner'],
+    'Transport': ['Metro card', 'Taxi ride', 'Fuel', 'Bike repair'],
+    'Utilities': ['Electricity bill', 'Water bill', 'Internet'],
+    'Entertainment': ['Cinema tickets', 'Concert', 'Board games'],
+    'Health': ['Pharmacy', 'Dentist', 'Gym membership'],
+    'Shopping': ['Clothes', 'Electronics', 'Books', 'Home goods'],
+    'Travel': ['Flight', 'Hotel', 'Train tickets'],
+    'Subscriptions': ['Music streaming', 'Video streaming', 'Cloud storage'],
+    'Salary': ['Monthly salary'],
+    'Freelance': ['Client invoice', 'Consulting'],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Generates synthetic users with categories, monthly budgets and transactions '
+        'for load testing. Users are named <prefix><n> and share one password.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--transactions', type=int, default=10000, help='Transactions per user.')
+        parser.add_argument('--months', type=int, default=24, help='How many months back the history reaches.')
+        parser.add_argument('--prefix', default='bench')
+        parser.add_argument('--password', default='benchmark')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT transaction.')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        prefix = options['prefix']
+        existing = User.objects.filter(username__startswith=prefix).count()
+        if existing:
+            raise CommandError(f'{existing} users named {prefix}* already exist; pick another --prefix.')
+        rng = random.Random(options['seed'])
+        today = date.today()
+        year, month = divmod(today.year * 12 + today.month - options['months'], 12)
+        start = date(year, month + 1, 1)
+        span = (today - start).days + 1
+        # Hashing is deliberately slow; every generated user gets the same hash.
+        password = make_password(options['password'])
+
+        users = User.objects.bulk_create([
+            User(username=f'{prefix}{n}', email=f'{prefix}{n}@example.com', password=password)
+            for n in range(options['users'])
+        ])
+        if users and users[0].pk is None:
+            # Backends that cannot return ids from bulk inserts.
+            users = list(User.objects.filter(username__startswith=prefix).order_by('id'))
+
+        total = 0
+        for user in users:
+            total += self.generate_user(user, rng, start, span, options)
+            self.stdout.write(f'{user.email}: {options["transactions"]} transactions')
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {len(users)} users and {total} transactions '
+            f'(password: {options["password"]}).'
+        ))
+
+    def generate_user(self, user, rng, start, span, options):
+        names = list(EXPENSE_CATEGORIES) + list(INCOME_CATEGORIES)
+        with transaction.atomic():
+            categories = {c.name: c for c in Category.objects.bulk_create(
+                [Category(user=user, name=name) for name in names]
+            )}
+            if any(category.pk is None for category in categories.values()):
+                categories = {c.name: c for c in Category.objects.filter(user=user)}
+
+            # Budgets sit around the expected monthly spend of each category.
+            months = sorted({(day.year, day.month) for day in (start + timedelta(days=d) for d in range(span))})
+            expenses_per_month = options['transactions'] * (1 - INCOME_SHARE) / len(months)
+            Budget.objects.bulk_create([
+                Budget(
+                    user=user, category=categories[name], year=year, month=month,
+                    amount=Decimal(round(typical * share * expenses_per_month * rng.uniform(0.9, 1.3))),
+                )
+                for year, month in months
+                for name, (typical, _, share) in EXPENSE_CATEGORIES.items()
+            ])
+
+        expense_names = list(EXPENSE_CATEGORIES)
+        expense_weights = [share for _, _, share in EXPENSE_CATEGORIES.values()]
+        batch = []
+        for _ in range(options['transactions']):
+            if rng.random() < INCOME_SHARE:
+                kind, name = 'INCOME', rng.choice(list(INCOME_CATEGORIES))
+                typical, spread = INCOME_CATEGORIES[name]
+            else:
+                kind, name = 'EXPENSE', rng.choices(expense_names, expense_weights)[0]
+                typical, spread, _ = EXPENSE_CATEGORIES[name]
+            amount = max(1.0, rng.lognormvariate(0, spread) * typical)
+            batch.append(Transaction(
+                user=user,
+                category=categories[name],
+                amount=Decimal(f'{amount:.2f}'),
+                type=kind,
+                date=start + timedelta(days=rng.randrange(span)),
+                description=rng.choice(DESCRIPTIONS[name]),
+            ))
+            if len(batch) >= options['batch_size']:
+                self.write_batch(batch)
+                batch = []
+        if batch:
+            self.write_batch(batch)
+
+        # bulk_create skips the rollup, version and cache bookkeeping of the API.
+        rollups.rebuild(user=user)
+        versions.bump(user.pk, versions.CATEGORY)
+        versions.bump(user.pk, versions.BUDGET)
+        invalidate_user_summaries(user.pk)
+        return options['transactions']
+
+    def write_batch(self, batch):
+        with transaction.atomic():
+            Transaction.objects.bulk_create(batch, batch_size=len(batch))
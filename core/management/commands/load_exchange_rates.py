@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import fx
+
+
+class Command(BaseCommand):
+    help = (
+        'Loads exchange rates from a CSV file into the ExchangeRate table, replacing the rates '
+        'already held for the same days. Rates are units of each currency per unit of '
+        'FX_REFERENCE_CURRENCY, either as `date,currency,rate` rows or one row per day with a '
+        'column per currency (the ECB\'s eurofxref-hist.csv).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file to load.')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as file:
+                count = fx.load_rates(fx.parse_rates(file))
+        except OSError as exc:
+            raise CommandError(f'Could not read {options["path"]}: {exc}')
+        except ValueError as exc:
+            raise CommandError(f'{options["path"]}: {exc}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Loaded {count} exchange rates against {settings.FX_REFERENCE_CURRENCY}.'
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = (
+        'Deletes the sync tombstones of deletions older than SYNC_TOMBSTONE_RETENTION_DAYS. '
+        'Clients holding older sync tokens are asked to sync from scratch.'
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(f'Pruned {prune_tombstones()} tombstones.'))
@@ -0,0 +1,27 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core import jobs, rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the monthly transaction rollups from the transaction table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Only rebuild the rollups of the user with this id.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--enqueue', action='store_true', help='Queue the rebuild for `runworkers` instead.')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user'] is not None:
+            try:
+                user = get_user_model().objects.get(pk=options['user'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"User {options['user']} does not exist.")
+        if options['enqueue']:
+            job = jobs.enqueue(jobs.REBUILD_ROLLUPS, user=user)
+            self.stdout.write(self.style.SUCCESS(f'Queued job {job.pk}.'))
+            return
+        count = rollups.rebuild(user=user, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} rollup buckets.'))
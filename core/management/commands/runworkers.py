@@ -0,0 +1,64 @@
+import multiprocessing
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core import jobs
+
+
+def _work(stop, write_lock, burst, poll_interval):
+    # Ctrl-C reaches every process in the group: finish the current job first.
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *args: stop.set())
+    try:
+        jobs.work(stop, write_lock, burst=burst, poll_interval=poll_interval)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs queued background jobs (imports, exports, rollup rebuilds, recurring materialization) '
+        'in a pool of worker processes until interrupted. Jobs that write take turns, '
+        'at most --write-slots at a time, so workers do not pile up on database locks.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.JOB_WORKERS,
+                            help='Worker processes; 0 runs jobs in this process.')
+        parser.add_argument('--write-slots', type=int, default=settings.JOB_WRITE_SLOTS,
+                            help='Jobs that write allowed to run at the same time.')
+        parser.add_argument('--poll-interval', type=float, default=settings.JOB_POLL_INTERVAL,
+                            help='Seconds to wait before checking an empty queue again.')
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty.')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 0 or options['write_slots'] < 1:
+            raise CommandError('--workers must be at least 0 and --write-slots at least 1.')
+        burst, poll_interval = options['burst'], options['poll_interval']
+        if options['workers'] == 0:
+            count = jobs.work(threading.Event(), burst=burst, poll_interval=poll_interval)
+            self.stdout.write(self.style.SUCCESS(f'Ran {count} jobs.'))
+            return
+
+        # Forked workers share the stop event and write semaphore; connections
+        # are closed first so none is shared across processes.
+        context = multiprocessing.get_context('fork')
+        stop = context.Event()
+        write_lock = context.BoundedSemaphore(options['write_slots'])
+        connections.close_all()
+        workers = [
+            context.Process(target=_work, args=(stop, write_lock, burst, poll_interval), name=f'job-worker-{index}')
+            for index in range(options['workers'])
+        ]
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: stop.set())
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f'Started {len(workers)} workers ({options["write_slots"]} write slots).')
+        for worker in workers:
+            worker.join()
+        self.stdout.write(self.style.SUCCESS('Workers stopped.'))
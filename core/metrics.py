@@ -0,0 +1,150 @@
+# backend/core/metrics.py
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+# Bucket upper bounds, Prometheus style (a value lands in every bucket >= it).
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+PREFIX = 'budget_'
+# name: (help text, buckets)
+HISTOGRAMS = {
+    'request_duration_seconds': ('Time spent handling a request.', SECONDS_BUCKETS),
+    'db_queries': ('SQL queries executed per request.', QUERY_BUCKETS),
+    'db_duration_seconds': ('Time spent in SQL per request.', SECONDS_BUCKETS),
+    'serializer_duration_seconds': ('Time spent encoding rows and rendering the response body.', SECONDS_BUCKETS),
+    'response_size_bytes': ('Response body size.', SIZE_BUCKETS),
+}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # One slot per bucket plus the +Inf overflow; made cumulative on export.
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _labels(pairs):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in pairs)
+
+
+class Registry:
+    """
+    In-process request metrics: one histogram per metric and (route, method),
+    plus a request counter per status. Each worker process keeps its own
+    registry, so a scrape reflects the worker that answered it.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+            self._requests = {}
+
+    def observe(self, route, method, status, values):
+        """Records one request; `values` maps HISTOGRAMS names to observations."""
+        labels = (('route', route), ('method', method))
+        with self._lock:
+            key = labels + (('status', status),)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            for name, value in values.items():
+                histogram = self._histograms.get((name, labels))
+                if histogram is None:
+                    histogram = self._histograms[(name, labels)] = Histogram(HISTOGRAMS[name][1])
+                histogram.observe(value)
+
+    def render(self):
+        """The registry in the Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            requests = sorted(self._requests.items())
+            histograms = sorted(
+                (name, labels, list(h.counts), h.sum, h.count, h.buckets)
+                for (name, labels), h in self._histograms.items()
+            )
+        lines = [
+            f'# HELP {PREFIX}requests_total Requests handled, by route, method and status.',
+            f'# TYPE {PREFIX}requests_total counter',
+        ]
+        lines += [f'{PREFIX}requests_total{{{_labels(labels)}}} {count}' for labels, count in requests]
+        for metric, (help_text, _) in HISTOGRAMS.items():
+            name = PREFIX + metric
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+            for entry, labels, counts, total, count, buckets in histograms:
+                if entry != metric:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(buckets + ('+Inf',), counts):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{{{_labels(labels + (("le", bound),))}}} {cumulative}')
+                lines.append(f'{name}_sum{{{_labels(labels)}}} {total}')
+                lines.append(f'{name}_count{{{_labels(labels)}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+class RequestSample:
+    """Measurements for one request."""
+    def __init__(self):
+        self.started = perf_counter()
+        self.serializer_time = 0
+        self.queries = []
+
+    @property
+    def sql_time(self):
+        return sum(duration for duration, _ in self.queries)
+
+    def slowest_queries(self, limit):
+        return sorted(self.queries, key=lambda query: query[0], reverse=True)[:limit]
+
+
+# The sample of the request being handled. A context variable rather than a
+# per-connection wrapper, because async views run their queries on another
+# thread (and connection) than the one handling the request; the context
+# travels with them.
+current_sample = ContextVar('metrics_sample', default=None)
+
+
+@contextmanager
+def serializing():
+    """Adds the time spent in the block to the current request's serializer time."""
+    sample = current_sample.get()
+    if sample is None:
+        yield
+        return
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        sample.serializer_time += perf_counter() - started
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    """`connection.execute_wrapper` hook timing statements into the current sample."""
+    sample = current_sample.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample.queries.append((perf_counter() - started, sql))
+
@@ -0,0 +1,315 @@
+# backend/core/middleware.py
+import logging
+import random
+import threading
+import time
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from .compression import BrotliCodec, GzipCodec, brotli, negotiate_encoding
+from .metrics import RequestSample, current_sample, registry
+
+logger = logging.getLogger('core.metrics')
+
+# Statements listed in a slow-request log entry, and the characters kept of each.
+SLOW_LOG_QUERIES = 5
+SLOW_LOG_SQL_LENGTH = 500
+
+# Content-Type prefixes worth compressing: JSON, CSV/NDJSON exports, text.
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/')
+
+
+class MetricsMiddleware:
+    """
+    Records latency, SQL count and time, serializer time (row encoding and
+    JSON rendering, timed where they run; compression is not included) and
+    response size of every request into `core.metrics.registry`, labelled by
+    the resolved URL name, and logs a sample of slow requests with their
+    slowest SQL statements.
+
+    Settings:
+        METRICS_ENABLED             turn recording off entirely (default True)
+        METRICS_SLOW_REQUEST_MS     threshold for the slow-request log (default 500)
+        METRICS_SLOW_SAMPLE_RATE    fraction of slow requests logged (default 1.0)
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            return self.get_response(request)
+        sample = request._metrics_sample = RequestSample()
+        token = current_sample.set(sample)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_sample.reset(token)
+        return self.finish(request, response, sample)
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            return await self.get_response(request)
+        sample = request._metrics_sample = RequestSample()
+        # Queries run through sync_to_async copy this context, so they are
+        # counted even though they execute on another thread.
+        token = current_sample.set(sample)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_sample.reset(token)
+        return self.finish(request, response, sample)
+
+    def finish(self, request, response, sample):
+        if response.streaming and not response.is_async:
+            # Streamed bodies (exports) run their queries while being sent, so
+            # the request is recorded once the last chunk has gone out.
+            response.streaming_content = self.stream(request, response, response.streaming_content, sample)
+        else:
+            size = 0 if response.streaming else len(response.content)
+            self.record(request, response, sample, size)
+        return response
+
+    def stream(self, request, response, content, sample):
+        size = 0
+        token = current_sample.set(sample)
+        try:
+            for chunk in content:
+                size += len(chunk)
+                yield chunk
+        finally:
+            current_sample.reset(token)
+            self.record(request, response, sample, size)
+
+    def record(self, request, response, sample, size):
+        finished = perf_counter()
+        duration = finished - sample.started
+        match = request.resolver_match
+        route = match.view_name if match is not None else '<unmatched>'
+        registry.observe(route, request.method, response.status_code, {
+            'request_duration_seconds': duration,
+            'db_queries': len(sample.queries),
+            'db_duration_seconds': sample.sql_time,
+            'serializer_duration_seconds': sample.serializer_time,
+            'response_size_bytes': size,
+        })
+        threshold = getattr(settings, 'METRICS_SLOW_REQUEST_MS', 500) / 1000
+        if duration >= threshold and random.random() < getattr(settings, 'METRICS_SLOW_SAMPLE_RATE', 1.0):
+            lines = [
+                f'Slow request: {request.method} {request.get_full_path()} -> {response.status_code} '
+                f'in {duration * 1000:.1f} ms, {len(sample.queries)} queries in {sample.sql_time * 1000:.1f} ms'
+            ]
+            for query_time, sql in sample.slowest_queries(SLOW_LOG_QUERIES):
+                lines.append(f'  {query_time * 1000:.1f} ms  {sql[:SLOW_LOG_SQL_LENGTH]}')
+            logger.warning('\n'.join(lines))
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compresses API responses with brotli (when installed) or gzip, as the
+    client's Accept-Encoding allows. Streamed responses (exports) are
+    compressed chunk by chunk as they are sent. Bodies under the size
+    threshold, 304s and other empty responses, non-text content and already
+    encoded responses go out unchanged. Strong ETags are weakened, as the
+    compressed bytes differ from the ones they were computed on; the
+    conditional GET checks compare them weakly.
+
+    Settings:
+        COMPRESSION_PATH_PREFIX     paths compressed (default '/api/')
+        COMPRESSION_MIN_SIZE        smallest body compressed, in bytes (default 1024)
+        COMPRESSION_BROTLI_QUALITY  brotli quality, 0-11 (default 4)
+        COMPRESSION_GZIP_LEVEL      gzip level, 1-9 (default 6)
+    """
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.codecs = {'gzip': GzipCodec(getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6))}
+        if brotli is not None:
+            self.codecs['br'] = BrotliCodec(getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 4))
+        # Preferred first when the client weighs them equally.
+        self.preference = [name for name in ('br', 'gzip') if name in self.codecs]
+
+    def process_response(self, request, response):
+        if not request.path.startswith(getattr(settings, 'COMPRESSION_PATH_PREFIX', '/api/')):
+            return response
+        if response.status_code in (204, 304) or response.has_header('Content-Encoding'):
+            return response
+        if not response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES):
+            return response
+        if 'no-transform' in response.get('Cache-Control', ''):
+            return response
+        if not response.streaming and len(response.content) < getattr(settings, 'COMPRESSION_MIN_SIZE', 1024):
+            return response
+
+        # The representation depends on Accept-Encoding whether or not this
+        # particular request gets it compressed.
+        patch_vary_headers(response, ('Accept-Encoding',))
+        name = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), self.preference)
+        if name is None:
+            return response
+        codec = self.codecs[name]
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = codec.astream(response.streaming_content)
+            else:
+                response.streaming_content = codec.stream(response.streaming_content)
+            del response['Content-Length']
+        else:
+            compressed = codec.compress(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = name
+        return response
+
+
+def request_queue_seconds(request, now=None):
+    """
+    Time a request spent in front of the application, from the proxy's
+    `X-Request-Start` header (`t=<epoch>` or a bare epoch, in seconds,
+    milliseconds or microseconds); None when the header is absent or invalid.
+    """
+    value = request.META.get('HTTP_X_REQUEST_START', '').strip()
+    if value.startswith('t='):
+        value = value[2:]
+    try:
+        started = float(value)
+    except ValueError:
+        return None
+    # Tell the unit by magnitude: epoch seconds are about 1.7e9.
+    if started > 1e14:
+        started /= 1e6
+    elif started > 1e11:
+        started /= 1e3
+    return max((time.time() if now is None else now) - started, 0)
+
+
+class HeldContent:
+    """Streamed content that calls `release` once, when it is closed."""
+
+    def __init__(self, content, release):
+        self.content = content
+        self._release = release
+
+    def __iter__(self):
+        return iter(self.content)
+
+    def close(self):
+        release, self._release = self._release, None
+        if release is not None:
+            release()
+
+
+class AsyncHeldContent(HeldContent):
+    def __aiter__(self):
+        return aiter(self.content)
+
+
+class AdmissionControlMiddleware:
+    """
+    Sheds load before it queues up: an API request is answered 429 with a
+    Retry-After header, without reaching a view or the database, when
+    ADMISSION_MAX_CONCURRENCY API requests are already in progress in this
+    process (threaded and ASGI workers), or when it has already waited longer
+    than ADMISSION_MAX_QUEUE_MS in the proxy's queue (sync workers too, given
+    an X-Request-Start header). A streamed response keeps its request counted
+    until the server closes it.
+
+    Settings:
+        ADMISSION_PATH_PREFIX       paths admitted this way (default '/api/')
+        ADMISSION_MAX_CONCURRENCY   requests in progress per process; 0 for no limit
+        ADMISSION_MAX_QUEUE_MS      longest queueing accepted; 0 to ignore X-Request-Start
+        ADMISSION_RETRY_AFTER       Retry-After sent with a 429, in seconds (default 1)
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        admitted = self.admit(request)
+        if admitted is None:
+            return self.get_response(request)
+        if not admitted:
+            return self.reject()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            self.release()
+            raise
+        return self.hold(response)
+
+    async def __acall__(self, request):
+        admitted = self.admit(request)
+        if admitted is None:
+            return await self.get_response(request)
+        if not admitted:
+            return self.reject()
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            self.release()
+            raise
+        return self.hold(response)
+
+    def admit(self, request):
+        """True if counted in, False if shed, None for requests not controlled."""
+        if not request.path.startswith(getattr(settings, 'ADMISSION_PATH_PREFIX', '/api/')):
+            return None
+        max_queue_ms = getattr(settings, 'ADMISSION_MAX_QUEUE_MS', 0)
+        if max_queue_ms:
+            queued = request_queue_seconds(request)
+            if queued is not None and queued * 1000 > max_queue_ms:
+                return False
+        limit = getattr(settings, 'ADMISSION_MAX_CONCURRENCY', 0)
+        with self._lock:
+            if limit and self.in_flight >= limit:
+                return False
+            self.in_flight += 1
+        return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def hold(self, response):
+        """Releases an admitted request's slot once its response is done with."""
+        if not response.streaming:
+            self.release()
+            return response
+        # Streamed bodies (exports) keep querying while they are sent: the
+        # slot is released when the server closes the response, which closes
+        # the content whether it was sent in full or the client went away.
+        held = AsyncHeldContent if response.is_async else HeldContent
+        response.streaming_content = held(response.streaming_content, self.release)
+        return response
+
+    def reject(self):
+        response = JsonResponse({'detail': 'The server is busy; retry shortly.'}, status=429)
+        response['Retry-After'] = str(getattr(settings, 'ADMISSION_RETRY_AFTER', 1))
+        return response
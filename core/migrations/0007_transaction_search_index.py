@@ -0,0 +1,84 @@
+from django.db import migrations
+
+# SQLite: an FTS5 table holding each transaction's description and category
+# name under the transaction's id, kept in sync by triggers so every writer
+# (API, admin, bulk_create, raw SQL) updates it.
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE core_transaction_fts USING fts5(
+        description, category_name, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER core_transaction_fts_insert AFTER INSERT ON core_transaction BEGIN
+        INSERT INTO core_transaction_fts (rowid, description, category_name)
+        VALUES (new.id, new.description, COALESCE((SELECT name FROM core_category WHERE id = new.category_id), ''));
+    END
+    """,
+    """
+    CREATE TRIGGER core_transaction_fts_update AFTER UPDATE OF description, category_id ON core_transaction BEGIN
+        UPDATE core_transaction_fts
+        SET description = new.description,
+            category_name = COALESCE((SELECT name FROM core_category WHERE id = new.category_id), '')
+        WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER core_transaction_fts_delete AFTER DELETE ON core_transaction BEGIN
+        DELETE FROM core_transaction_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER core_category_fts_rename AFTER UPDATE OF name ON core_category BEGIN
+        UPDATE core_transaction_fts SET category_name = new.name
+        WHERE rowid IN (SELECT id FROM core_transaction WHERE category_id = new.id);
+    END
+    """,
+    """
+    INSERT INTO core_transaction_fts (rowid, description, category_name)
+    SELECT t.id, t.description, COALESCE(c.name, '')
+    FROM core_transaction t LEFT JOIN core_category c ON c.id = t.category_id
+    """,
+]
+
+SQLITE_REVERSE = [
+    'DROP TRIGGER IF EXISTS core_category_fts_rename',
+    'DROP TRIGGER IF EXISTS core_transaction_fts_delete',
+    'DROP TRIGGER IF EXISTS core_transaction_fts_update',
+    'DROP TRIGGER IF EXISTS core_transaction_fts_insert',
+    'DROP TABLE IF EXISTS core_transaction_fts',
+]
+
+# PostgreSQL: a GIN index over the same expression SearchVector('description',
+# config='simple') compiles to, so the search filter can use it.
+POSTGRES_FORWARD = [
+    """
+    CREATE INDEX core_txn_description_fts_idx ON core_transaction
+    USING GIN (to_tsvector('simple'::regconfig, COALESCE(description, '')))
+    """,
+]
+
+POSTGRES_REVERSE = [
+    'DROP INDEX IF EXISTS core_txn_description_fts_idx',
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_resourceversion'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            _run({'sqlite': SQLITE_REVERSE, 'postgresql': POSTGRES_REVERSE}),
+        ),
+    ]
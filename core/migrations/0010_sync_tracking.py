@@ -0,0 +1,91 @@
+# Generated by Django 5.2.3 on 2026-10-17 01:26
+
+from importlib import import_module
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Adding a NOT NULL column makes SQLite rebuild core_category and
+# core_transaction. The full-text search triggers from 0007 reference both
+# tables and would block the rebuild's rename, so they are dropped around it
+# and created again afterwards (the FTS table itself is untouched).
+search_index = import_module('core.migrations.0007_transaction_search_index')
+SEARCH_TRIGGERS = [statement for statement in search_index.SQLITE_FORWARD if 'CREATE TRIGGER' in statement]
+DROP_SEARCH_TRIGGERS = [statement for statement in search_index.SQLITE_REVERSE if 'DROP TRIGGER' in statement]
+
+
+def _run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'sqlite':
+            for statement in statements:
+                schema_editor.execute(statement)
+    return run
+
+
+drop_search_triggers = _run_on_sqlite(DROP_SEARCH_TRIGGERS)
+create_search_triggers = _run_on_sqlite(SEARCH_TRIGGERS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_recurring_transactions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(max_length=32)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(drop_search_triggers, create_search_triggers),
+        migrations.AddField(
+            model_name='budget',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='budget',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='core_budget_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='core_category_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='core_txn_user_sync_idx'),
+        ),
+        migrations.AddField(
+            model_name='tombstone',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tombstones', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['user', 'deleted_at', 'id'], name='core_tombstone_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['deleted_at'], name='core_tombstone_deleted_idx'),
+        ),
+        migrations.RunPython(create_search_triggers, drop_search_triggers),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.3 on 2026-10-17 01:45
+
+from importlib import import_module
+
+import core.models
+import django.core.validators
+from django.conf import settings
+from django.db import migrations, models
+
+# core_transaction is rebuilt on SQLite for its new column; the search
+# triggers are dropped around it, as in 0010.
+sync_tracking = import_module('core.migrations.0010_sync_tracking')
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_job_queue'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='monthlyrollup',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='budget',
+            name='currency',
+            field=models.CharField(default=core.models.default_currency, max_length=3, validators=[django.core.validators.RegexValidator('^[A-Z]{3}\\Z', 'Expected a three-letter ISO 4217 currency code, e.g. USD.')]),
+        ),
+        migrations.AddField(
+            model_name='monthlyrollup',
+            name='currency',
+            field=models.CharField(default=core.models.default_currency, max_length=3),
+        ),
+        migrations.AddField(
+            model_name='recurringtransaction',
+            name='currency',
+            field=models.CharField(default=core.models.default_currency, max_length=3, validators=[django.core.validators.RegexValidator('^[A-Z]{3}\\Z', 'Expected a three-letter ISO 4217 currency code, e.g. USD.')]),
+        ),
+        migrations.RunPython(sync_tracking.drop_search_triggers, sync_tracking.create_search_triggers),
+        migrations.AddField(
+            model_name='transaction',
+            name='currency',
+            field=models.CharField(default=core.models.default_currency, max_length=3, validators=[django.core.validators.RegexValidator('^[A-Z]{3}\\Z', 'Expected a three-letter ISO 4217 currency code, e.g. USD.')]),
+        ),
+        migrations.RunPython(sync_tracking.create_search_triggers, sync_tracking.drop_search_triggers),
+        migrations.AlterUniqueTogether(
+            name='monthlyrollup',
+            unique_together={('user', 'category', 'type', 'currency', 'year', 'month')},
+        ),
+        migrations.CreateModel(
+            name='ExchangeRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(max_length=3, validators=[django.core.validators.RegexValidator('^[A-Z]{3}\\Z', 'Expected a three-letter ISO 4217 currency code, e.g. USD.')])),
+                ('date', models.DateField()),
+                ('rate', models.DecimalField(decimal_places=12, max_digits=24)),
+                ('inverse', models.DecimalField(decimal_places=12, max_digits=24)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('currency', 'date'), name='core_fx_rate_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-17 02:39
+
+from django.db import migrations, models
+
+
+def create_counter(apps, schema_editor):
+    # The single row core.fx bumps; rates loaded so far count as version 1.
+    ExchangeRateVersion = apps.get_model('core', 'ExchangeRateVersion')
+    ExchangeRateVersion.objects.create(pk=1, version=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_budget_alerts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExchangeRateVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_counter, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,76 @@
+from importlib import import_module
+
+from django.db import migrations
+
+search_index = import_module('core.migrations.0007_transaction_search_index')
+
+# SQLite: the FTS5 table from 0007, rebuilt with the owner's id as an indexed
+# column. The search filter puts `user_id : "<id>"` in the MATCH expression, so
+# FTS5 intersects the owner's doclist with the terms' instead of returning
+# every user's matches to filter afterwards. Later migrations that rebuild
+# core_transaction or core_category drop and recreate these triggers.
+SQLITE_FORWARD = [
+    'DROP TRIGGER IF EXISTS core_category_fts_rename',
+    'DROP TRIGGER IF EXISTS core_transaction_fts_delete',
+    'DROP TRIGGER IF EXISTS core_transaction_fts_update',
+    'DROP TRIGGER IF EXISTS core_transaction_fts_insert',
+    'DROP TABLE IF EXISTS core_transaction_fts',
+    """
+    CREATE VIRTUAL TABLE core_transaction_fts USING fts5(
+        description, category_name, user_id, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER core_transaction_fts_insert AFTER INSERT ON core_transaction BEGIN
+        INSERT INTO core_transaction_fts (rowid, description, category_name, user_id)
+        VALUES (new.id, new.description, COALESCE((SELECT name FROM core_category WHERE id = new.category_id), ''), new.user_id);
+    END
+    """,
+    """
+    CREATE TRIGGER core_transaction_fts_update AFTER UPDATE OF description, category_id, user_id ON core_transaction BEGIN
+        UPDATE core_transaction_fts
+        SET description = new.description,
+            category_name = COALESCE((SELECT name FROM core_category WHERE id = new.category_id), ''),
+            user_id = new.user_id
+        WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER core_transaction_fts_delete AFTER DELETE ON core_transaction BEGIN
+        DELETE FROM core_transaction_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER core_category_fts_rename AFTER UPDATE OF name ON core_category BEGIN
+        UPDATE core_transaction_fts SET category_name = new.name
+        WHERE rowid IN (SELECT id FROM core_transaction WHERE category_id = new.id);
+    END
+    """,
+    """
+    INSERT INTO core_transaction_fts (rowid, description, category_name, user_id)
+    SELECT t.id, t.description, COALESCE(c.name, ''), t.user_id
+    FROM core_transaction t LEFT JOIN core_category c ON c.id = t.category_id
+    """,
+]
+
+SQLITE_REVERSE = search_index.SQLITE_REVERSE + search_index.SQLITE_FORWARD
+
+# PostgreSQL: the search filter now builds one vector over the description and
+# the joined category name, which an expression index on core_transaction
+# cannot cover; it matches within the user's rows instead.
+POSTGRES_FORWARD = search_index.POSTGRES_REVERSE
+POSTGRES_REVERSE = search_index.POSTGRES_FORWARD
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_exchange_rate_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            search_index._run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            search_index._run({'sqlite': SQLITE_REVERSE, 'postgresql': POSTGRES_REVERSE}),
+        ),
+    ]
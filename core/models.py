@@ -1,13 +1,33 @@
 from django.db import models
 from django.conf import settings
+from django.core.validators import RegexValidator
+from django.utils import timezone
+
+
+def default_currency():
+    return settings.DEFAULT_CURRENCY
+
+
+# ISO 4217 alphabetic codes.
+validate_currency = RegexValidator(r'^[A-Z]{3}\Z', 'Expected a three-letter ISO 4217 currency code, e.g. USD.')
+
+
+def currency_field():
+    return models.CharField(max_length=3, default=default_currency, validators=[validate_currency])
+
 
 class Category(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='categories')
     name = models.CharField(max_length=100)
+    # Set on every save; read by the sync endpoint (see core.sync).
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         unique_together = ('user', 'name')
         verbose_name_plural = "Categories"
+        indexes = [
+            models.Index(fields=['user', 'updated_at', 'id'], name='core_category_sync_idx'),
+        ]
     
     def __str__(self):
         return self.name
@@ -18,12 +38,36 @@ class Transaction(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='transactions')
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='transactions')
     amount = models.DecimalField(max_digits=10, decimal_places=2)
+    currency = currency_field()
     type = models.CharField(max_length=7, choices=TRANSACTION_TYPE_CHOICES)
     date = models.DateField()
     description = models.TextField(blank=True)
+    # "<recurring transaction id>:<date>" for rows materialized from a
+    # RecurringTransaction, so each occurrence is written at most once.
+    occurrence_key = models.CharField(max_length=64, null=True, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
-        ordering = ['-date']
+        ordering = ['-date', '-id']
+        indexes = [
+            # List ordering and monthly range scans: (user, date) prefix.
+            models.Index(fields=['user', '-date', '-id'], name='core_txn_user_date_idx'),
+            # Type-filtered lists and per-type summaries.
+            models.Index(fields=['user', 'type', '-date', '-id'], name='core_txn_user_type_date_idx'),
+            # Category-filtered lists.
+            models.Index(fields=['user', 'category', '-date'], name='core_txn_user_cat_date_idx'),
+            # Amount range filters.
+            models.Index(fields=['user', 'amount'], name='core_txn_user_amount_idx'),
+            # Changes since a sync token.
+            models.Index(fields=['user', 'updated_at', 'id'], name='core_txn_user_sync_idx'),
+        ]
+        constraints = [
+            # Partial, so only materialized rows are indexed.
+            models.UniqueConstraint(
+                fields=['occurrence_key'], condition=models.Q(occurrence_key__isnull=False),
+                name='core_txn_occurrence_key_uniq',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.type} of {self.amount} on {self.date}"
@@ -32,11 +76,262 @@ class Budget(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='budgets')
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='budgets')
     amount = models.DecimalField(max_digits=10, decimal_places=2)
+    currency = currency_field()
     month = models.PositiveSmallIntegerField()
     year = models.PositiveSmallIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         unique_together = ('user', 'category', 'year', 'month')
+        indexes = [
+            models.Index(fields=['user', 'updated_at', 'id'], name='core_budget_sync_idx'),
+        ]
     
     def __str__(self):
-        return f"Budget for {self.category.name} in {self.year}-{self.month}: {self.amount}"
\ No newline at end of file
+        return f"Budget for {self.category.name} in {self.year}-{self.month}: {self.amount}"
+
+class MonthlyRollup(models.Model):
+    """
+    Per-user, per-month, per-category, per-type, per-currency totals of
+    transactions. Kept up to date incrementally by `core.rollups` and read by
+    the summary.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='monthly_rollups')
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='monthly_rollups')
+    type = models.CharField(max_length=7, choices=Transaction.TRANSACTION_TYPE_CHOICES)
+    currency = models.CharField(max_length=3, default=default_currency)
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'category', 'type', 'currency', 'year', 'month')
+        indexes = [
+            models.Index(fields=['user', 'year', 'month'], name='core_rollup_user_period_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.type} rollup for {self.year}-{self.month}: {self.total}"
+
+
+class TransactionImport(models.Model):
+    """
+    One completed bulk import, keyed by the client's idempotency key so a
+    retried request replays the original result instead of duplicating rows.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='transaction_imports')
+    idempotency_key = models.CharField(max_length=255)
+    row_count = models.PositiveIntegerField(default=0)
+    result = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'idempotency_key')
+
+    def __str__(self):
+        return f"Import {self.idempotency_key} ({self.row_count} rows)"
+
+
+class ResourceVersion(models.Model):
+    """
+    A per-user change counter for one API resource ('category', 'transaction',
+    'budget'), bumped on every write so conditional GETs can be answered
+    without loading or serializing the rows themselves.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='resource_versions')
+    resource = models.CharField(max_length=32)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'resource')
+
+    def __str__(self):
+        return f"{self.resource} v{self.version}"
+
+
+class Tombstone(models.Model):
+    """
+    Records that a category, transaction or budget was deleted, so the sync
+    endpoint can tell clients to drop it. Kept for
+    SYNC_TOMBSTONE_RETENTION_DAYS (see `manage.py prune_tombstones`).
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='tombstones')
+    resource = models.CharField(max_length=32)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at', 'id'], name='core_tombstone_sync_idx'),
+            # Pruning.
+            models.Index(fields=['deleted_at'], name='core_tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"Deleted {self.resource} {self.object_id}"
+
+
+class RecurringTransaction(models.Model):
+    """
+    A transaction repeated on an RRULE-like schedule: every `interval` days,
+    weeks, months or years from `start_date`, until `end_date` or for `count`
+    occurrences. Monthly and yearly rules fall on `day_of_month` (default:
+    the start date's day), clamped to the end of shorter months.
+
+    `core.recurring.materialize` writes due occurrences as transactions and
+    advances `next_index`/`next_date`; `next_date` is None once the schedule
+    has ended.
+    """
+    FREQUENCY_CHOICES = [('DAILY', 'Daily'), ('WEEKLY', 'Weekly'), ('MONTHLY', 'Monthly'), ('YEARLY', 'Yearly')]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='recurring_transactions')
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='recurring_transactions')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    currency = currency_field()
+    type = models.CharField(max_length=7, choices=Transaction.TRANSACTION_TYPE_CHOICES)
+    description = models.TextField(blank=True)
+    frequency = models.CharField(max_length=7, choices=FREQUENCY_CHOICES)
+    interval = models.PositiveSmallIntegerField(default=1)
+    day_of_month = models.PositiveSmallIntegerField(null=True, blank=True)
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    count = models.PositiveIntegerField(null=True, blank=True)
+    next_index = models.PositiveIntegerField(default=0)
+    next_date = models.DateField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The scheduler's scan for due rules.
+            models.Index(fields=['next_date'], name='core_recurring_next_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.frequency} {self.type} of {self.amount} from {self.start_date}"
+
+
+class Job(models.Model):
+    """
+    A unit of background work (an import, an export, a rollup rebuild or a
+    recurring materialization), queued in the database and run by
+    `manage.py runworkers` (see core.jobs). Jobs without a user are
+    system-wide ones queued from the management commands.
+    """
+    PENDING, RUNNING, SUCCEEDED, FAILED = 'PENDING', 'RUNNING', 'SUCCEEDED', 'FAILED'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (RUNNING, 'Running'), (SUCCEEDED, 'Succeeded'), (FAILED, 'Failed')]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name='jobs')
+    kind = models.CharField(max_length=32)
+    params = models.JSONField(default=dict)
+    status = models.CharField(max_length=9, choices=STATUS_CHOICES, default=PENDING)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    # When a pending job may run (later than created_at after a failed attempt).
+    run_at = models.DateTimeField(default=timezone.now)
+    # A running job whose worker has not finished it by then is taken over.
+    locked_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-id']
+        indexes = [
+            # The workers' scan for due jobs.
+            models.Index(fields=['status', 'run_at'], name='core_job_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} job {self.pk} ({self.status})"
+
+
+class ExchangeRate(models.Model):
+    """
+    The value of FX_REFERENCE_CURRENCY in `currency` from `date` on, until
+    the next rate: `rate` units of the currency buy one unit of the reference
+    currency, and `inverse` (1 / rate) is stored alongside so conversions in
+    SQL only multiply. Loaded with `manage.py load_exchange_rates`; read
+    through `core.fx`.
+    """
+    currency = models.CharField(max_length=3, validators=[validate_currency])
+    date = models.DateField()
+    rate = models.DecimalField(max_digits=24, decimal_places=12)
+    inverse = models.DecimalField(max_digits=24, decimal_places=12)
+
+    class Meta:
+        constraints = [
+            # Also the index behind "latest rate on or before a day".
+            models.UniqueConstraint(fields=['currency', 'date'], name='core_fx_rate_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.currency} {self.rate} on {self.date}"
+
+
+class ExchangeRateVersion(models.Model):
+    """
+    A single counter bumped whenever exchange rates are loaded or edited, so
+    each process can tell its memoized rates (core.fx.RateCache) and the
+    summaries and validators derived from them are out of date.
+    """
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"rates v{self.version}"
+
+
+class AlertRule(models.Model):
+    """
+    "Notify me when `threshold_percent`% of a category's monthly budget is
+    spent", for one category or (without one) every budgeted category.
+    Checked by `core.alerts` whenever spending or a budget changes.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='alert_rules')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True, related_name='alert_rules')
+    threshold_percent = models.PositiveSmallIntegerField(default=80)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'is_active'], name='core_alertrule_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.threshold_percent}% of {self.category or 'any category'} budget"
+
+
+class Notification(models.Model):
+    """
+    An outbox of alerts for clients to poll (`/api/notifications/?after=<id>`).
+    Each rule fires at most once per category and month (`key`).
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications')
+    rule = models.ForeignKey(AlertRule, on_delete=models.SET_NULL, null=True, blank=True, related_name='notifications')
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='notifications')
+    # "<rule id>:<category id>:<year>-<month>"
+    key = models.CharField(max_length=64)
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    threshold_percent = models.PositiveSmallIntegerField()
+    spent = models.DecimalField(max_digits=14, decimal_places=2)
+    budgeted = models.DecimalField(max_digits=14, decimal_places=2)
+    currency = models.CharField(max_length=3)
+    message = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='core_notification_key_uniq'),
+        ]
+        indexes = [
+            # Polling: the user's notifications after an id.
+            models.Index(fields=['user', 'id'], name='core_notification_poll_idx'),
+        ]
+
+    def __str__(self):
+        return self.message
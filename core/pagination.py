@@ -0,0 +1,120 @@
+# backend/core/pagination.py
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from datetime import date
+
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class TransactionCursorPagination(BasePagination):
+    """
+    Keyset pagination for transactions, ordered newest first on `(date, id)`.
+
+    The cursor is the `(date, id)` of the last row of the previous page, so
+    each page is an index range seek on (user, -date, -id): no OFFSET and no
+    COUNT(*), deep pages cost the same as the first one, and rows inserted
+    while a client is scrolling never shift or duplicate later pages.
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.finish_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self.finish_page([row async for row in self.page_queryset(queryset, request)])
+
+    def page_queryset(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        queryset = queryset.order_by('-date', '-id')
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            cursor_date, cursor_id = position
+            # The date__lte bound keeps this a range seek on the index; the OR
+            # only skips the rows sharing the cursor's date.
+            queryset = queryset.filter(Q(date__lt=cursor_date) | Q(id__lt=cursor_id), date__lte=cursor_date)
+        return queryset[:self.page_size + 1]
+
+    def finish_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_position = self.position(rows[-1]) if self.has_next else None
+        return rows
+
+    @staticmethod
+    def position(row):
+        # Rows are model instances, or dicts on the `.values()` fast path.
+        if isinstance(row, dict):
+            return row['date'], row['id']
+        return row.date, row.id
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw_date, raw_id = urlsafe_b64decode(encoded.encode('ascii')).decode('ascii').split(':')
+            return date.fromisoformat(raw_date), int(raw_id)
+        except (BinasciiError, UnicodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position):
+        cursor_date, cursor_id = position
+        encoded = urlsafe_b64encode(f'{cursor_date.isoformat()}:{cursor_id}'.encode('ascii')).decode('ascii')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position)
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class AsyncPageNumberPagination(PageNumberPagination):
+    """PageNumberPagination with an `apaginate_queryset` for async views."""
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Counted up front so the paginator never runs a synchronous COUNT(*).
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        self.page.object_list = [row async for row in self.page.object_list]
+        return self.page.object_list
@@ -0,0 +1,183 @@
+# backend/core/recurring.py
+import calendar
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import connection, transaction
+
+from .models import RecurringTransaction, Transaction
+from .summary import invalidate_summary
+from . import rollups, versions
+
+# Rules processed per database transaction, and rows per INSERT statement.
+RULE_BATCH_SIZE = 500
+BATCH_SIZE = 500
+
+
+def _add_months(start, months, day):
+    month_index = start.year * 12 + start.month - 1 + months
+    year, month = divmod(month_index, 12)
+    month += 1
+    return date(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+
+def occurrence_date(rule, index):
+    """The date of the rule's `index`-th occurrence (0 is the first), ignoring its end."""
+    step = index * rule.interval
+    if rule.frequency == 'DAILY':
+        return rule.start_date + timedelta(days=step)
+    if rule.frequency == 'WEEKLY':
+        return rule.start_date + timedelta(weeks=step)
+    day = rule.day_of_month or rule.start_date.day
+    if rule.frequency == 'MONTHLY':
+        return _add_months(rule.start_date, step, day)
+    return _add_months(rule.start_date, 12 * step, day)
+
+
+def _within_schedule(rule, index, day):
+    if rule.count is not None and index >= rule.count:
+        return False
+    return rule.end_date is None or day <= rule.end_date
+
+
+def schedule(rule, since=None):
+    """
+    Points `next_index`/`next_date` at the first occurrence on or after
+    `since` (default: the start date). Not saved.
+    """
+    index = 0
+    day = occurrence_date(rule, index)
+    # A day_of_month earlier than the start date's day falls before it in the first month.
+    while day < rule.start_date or (since is not None and day < since):
+        index += 1
+        day = occurrence_date(rule, index)
+    rule.next_index = index
+    rule.next_date = day if _within_schedule(rule, index, day) else None
+
+
+def resume_date(rule):
+    """
+    The day after the rule's last materialized occurrence (as currently
+    stored), from which an edited schedule picks up; None if it has none.
+    """
+    if not rule.next_index:
+        return None
+    return occurrence_date(rule, rule.next_index - 1) + timedelta(days=1)
+
+
+def reschedule(rule, since=None, today=None, limit=None):
+    """
+    Saves the rule's schedule from `since` on and materializes what is
+    already due, up to `limit` occurrences. Returns whether occurrences are
+    still due, for `materialize` to write later.
+    """
+    today = today or date.today()
+    schedule(rule, since)
+    rule.save(update_fields=['next_index', 'next_date'])
+    materialize(today, queryset=RecurringTransaction.objects.filter(pk=rule.pk), limit=limit)
+    rule.refresh_from_db(fields=['next_index', 'next_date'])
+    return rule.next_date is not None and rule.next_date <= today
+
+
+def occurrence_key(rule, day):
+    return f'{rule.pk}:{day.isoformat()}'
+
+
+def _due(rule, today, limit=None):
+    """
+    Yields the rule's unmaterialized occurrences up to `today`, at most
+    `limit` of them, advancing it past them.
+    """
+    index, day = rule.next_index, rule.next_date
+    stop = None if limit is None else index + limit
+    while day is not None and day <= today and index != stop:
+        yield Transaction(
+            user_id=rule.user_id,
+            category_id=rule.category_id,
+            amount=rule.amount,
+            currency=rule.currency,
+            type=rule.type,
+            date=day,
+            description=rule.description,
+            occurrence_key=occurrence_key(rule, day),
+        )
+        index += 1
+        day = occurrence_date(rule, index)
+        if not _within_schedule(rule, index, day):
+            day = None
+    rule.next_index, rule.next_date = index, day
+
+
+def _save_positions(rules):
+    # One prepared UPDATE run through executemany: bulk_update's CASE
+    # expressions cost far more to build than to execute at this size.
+    quote = connection.ops.quote_name
+    sql = (
+        f"UPDATE {quote(RecurringTransaction._meta.db_table)} "
+        f"SET {quote('next_index')} = %s, {quote('next_date')} = %s WHERE {quote('id')} = %s"
+    )
+    params = [
+        (rule.next_index, connection.ops.adapt_datefield_value(rule.next_date), rule.pk)
+        for rule in rules
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def _materialize_batch(due, last_pk, rule_batch_size, today, limit=None):
+    """Materializes the next batch of due rules; returns `(rules, transactions written)`."""
+    with transaction.atomic():
+        # Rules locked by an overlapping run (PostgreSQL) are left to it.
+        rules = list(due.filter(pk__gt=last_pk).select_for_update(skip_locked=True)[:rule_batch_size])
+        if not rules:
+            return rules, 0
+        objs = [txn for rule in rules for txn in _due(rule, today, limit)]
+        # Occurrences already written, e.g. by a run that overlapped this one,
+        # are skipped; the unique occurrence_key guards against the rest.
+        keys = [obj.occurrence_key for obj in objs]
+        existing = set()
+        for start in range(0, len(keys), BATCH_SIZE):
+            existing.update(
+                Transaction.objects.filter(occurrence_key__in=keys[start:start + BATCH_SIZE])
+                .values_list('occurrence_key', flat=True)
+            )
+        objs = [obj for obj in objs if obj.occurrence_key not in existing]
+        Transaction.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+        _save_positions(rules)
+
+        # bulk_create and bulk_update send no signals: update the rollups,
+        # versions and cached summaries in the same transaction.
+        rollups.record(objs)
+        versions.bump_many({rule.user_id for rule in rules}, versions.RECURRING)
+        versions.bump_many({obj.user_id for obj in objs}, versions.TRANSACTION)
+        periods = defaultdict(set)
+        for obj in objs:
+            periods[obj.user_id].add((obj.date.year, obj.date.month))
+        for user_id, months in periods.items():
+            for year, month in months:
+                invalidate_summary(user_id, year, month)
+        versions.touch(objs)
+    return rules, len(objs)
+
+
+def materialize(today=None, queryset=None, rule_batch_size=RULE_BATCH_SIZE, limit=None):
+    """
+    Writes every occurrence due on or before `today` (default: the current
+    date) of the given rules (default: all) as transactions, in batches of
+    rules: one transaction, a few bulk statements and one UPDATE per rollup
+    bucket per batch. With `limit`, at most that many occurrences per rule.
+    Safe to re-run; returns `(rules, transactions)` counts.
+    """
+    today = today or date.today()
+    queryset = queryset if queryset is not None else RecurringTransaction.objects.all()
+    due = queryset.filter(next_date__lte=today).order_by('pk')
+    rule_count = created = 0
+    last_pk = 0
+    while True:
+        rules, written = _materialize_batch(due, last_pk, rule_batch_size, today, limit)
+        if not rules:
+            break
+        last_pk = rules[-1].pk
+        rule_count += len(rules)
+        created += written
+    return rule_count, created
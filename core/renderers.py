@@ -0,0 +1,43 @@
+# backend/core/renderers.py
+from rest_framework.renderers import JSONRenderer
+
+from .metrics import serializing
+
+try:
+    import orjson
+except ImportError:  # optional: `pip install orjson`
+    orjson = None
+
+# Dict keys are stringified like json.dumps does; datetimes go through the DRF
+# encoder (which trims microseconds and writes UTC as "Z") instead of orjson's.
+ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed, producing the
+    same bytes as the stock renderer's compact, UTF-8 output. Types orjson
+    does not handle natively (Decimal, lazy strings, datetimes, ...) go
+    through the DRF encoder, and anything orjson rejects outright (indented
+    output, huge integers, lone surrogates) falls back to the stock renderer.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Timed as the request's serializer stage; see core.metrics.
+        with serializing():
+            return self._render(data, accepted_media_type, renderer_context)
+
+    def _render(self, data, accepted_media_type, renderer_context):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escaped like JSONRenderer does, so the output stays a JavaScript subset.
+        for raw, escaped in LINE_SEPARATORS:
+            if raw in ret:
+                ret = ret.replace(raw, escaped)
+        return ret
@@ -0,0 +1,168 @@
+# backend/core/rollups.py
+from collections import defaultdict
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from .models import MonthlyRollup, Transaction
+from . import alerts
+
+BUCKET_FIELDS = ('user_id', 'category_id', 'type', 'currency', 'year', 'month')
+# Touched buckets from which apply_deltas switches to batched statements, and
+# rows per INSERT statement there.
+BULK_MIN_BUCKETS = 20
+BULK_BATCH_SIZE = 500
+
+
+def _bucket(txn):
+    return (txn.user_id, txn.category_id, txn.type, txn.currency, txn.date.year, txn.date.month)
+
+
+def _collect(transactions, sign):
+    deltas = defaultdict(lambda: [0, 0])
+    for txn in transactions:
+        delta = deltas[_bucket(txn)]
+        delta[0] += sign * txn.amount
+        delta[1] += sign
+    return deltas
+
+
+def apply_deltas(deltas):
+    """
+    Applies `{bucket: [amount, count]}` changes to the rollup table with one
+    UPDATE per touched bucket, creating buckets that do not exist yet and
+    dropping buckets that no longer hold any transaction. Large batches go
+    through `_apply_bulk`.
+    """
+    deltas = {bucket: delta for bucket, delta in deltas.items() if delta[0] or delta[1]}
+    if len(deltas) >= BULK_MIN_BUCKETS:
+        _apply_bulk(deltas)
+        return
+    with transaction.atomic():
+        for bucket, (amount, count) in deltas.items():
+            filters = dict(zip(BUCKET_FIELDS, bucket))
+            rows = MonthlyRollup.objects.filter(**filters)
+            updated = rows.update(total=F('total') + amount, count=F('count') + count)
+            if not updated:
+                try:
+                    with transaction.atomic():
+                        MonthlyRollup.objects.create(total=amount, count=count, **filters)
+                except IntegrityError:
+                    # Another writer created the bucket in the meantime.
+                    rows.update(total=F('total') + amount, count=F('count') + count)
+            elif count < 0:
+                rows.filter(count__lte=0).delete()
+
+
+def _update_sql(null_category):
+    quote = connection.ops.quote_name
+    category = f"{quote('category_id')} IS NULL" if null_category else f"{quote('category_id')} = %s"
+    filters = ' AND '.join(f'{quote(name)} = %s' for name in ('user_id', 'type', 'currency', 'year', 'month'))
+    return (
+        f"UPDATE {quote(MonthlyRollup._meta.db_table)} "
+        f"SET {quote('total')} = {quote('total')} + %s, {quote('count')} = {quote('count')} + %s "
+        f"WHERE {filters} AND {category}"
+    )
+
+
+def _apply_bulk(deltas):
+    """
+    apply_deltas for many buckets (bulk imports, recurring materialization):
+    one SELECT finds the existing buckets, which are then updated by a single
+    prepared statement run through executemany, and the new ones are inserted
+    with one bulk_create. Increments stay relative (total = total + x), as in
+    the per-bucket path.
+    """
+    users, years, months = ({bucket[i] for bucket in deltas} for i in (0, 4, 5))
+    with transaction.atomic():
+        existing = set(
+            MonthlyRollup.objects.filter(user_id__in=users, year__in=years, month__in=months)
+            .values_list(*BUCKET_FIELDS)
+        )
+        updates = {False: [], True: []}
+        missing = {}
+        for bucket, (amount, count) in deltas.items():
+            if bucket not in existing:
+                missing[bucket] = (amount, count)
+                continue
+            user_id, category_id, type_, currency, year, month = bucket
+            params = [amount, count, user_id, type_, currency, year, month]
+            if category_id is not None:
+                params.append(category_id)
+            updates[category_id is None].append(params)
+        with connection.cursor() as cursor:
+            for null_category, params in updates.items():
+                if params:
+                    cursor.executemany(_update_sql(null_category), params)
+        try:
+            with transaction.atomic():
+                MonthlyRollup.objects.bulk_create(
+                    [
+                        MonthlyRollup(total=amount, count=count, **dict(zip(BUCKET_FIELDS, bucket)))
+                        for bucket, (amount, count) in missing.items()
+                    ],
+                    batch_size=BULK_BATCH_SIZE,
+                )
+        except IntegrityError:
+            # Another writer created some of these buckets in the meantime.
+            for bucket, (amount, count) in missing.items():
+                apply_deltas({bucket: [amount, count]})
+        if any(count < 0 for _, count in deltas.values()):
+            MonthlyRollup.objects.filter(user_id__in=users, year__in=years, month__in=months, count__lte=0).delete()
+
+
+def record(transactions):
+    """
+    Adds the given (saved) transactions to their monthly buckets, then checks
+    the alert rules of the categories whose spending grew.
+    """
+    deltas = _collect(transactions, 1)
+    apply_deltas(deltas)
+    alerts.check_spending(deltas)
+
+
+def discard(transactions):
+    """Removes the given transactions, as currently stored, from their buckets."""
+    apply_deltas(_collect(transactions, -1))
+
+
+def release_category(category):
+    """
+    Moves a category's buckets into the uncategorized buckets before the
+    category is deleted, mirroring the SET_NULL on `Transaction.category`.
+    """
+    with transaction.atomic():
+        rows = list(MonthlyRollup.objects.filter(category=category))
+        deltas = defaultdict(lambda: [0, 0])
+        for row in rows:
+            delta = deltas[(row.user_id, None, row.type, row.currency, row.year, row.month)]
+            delta[0] += row.total
+            delta[1] += row.count
+        MonthlyRollup.objects.filter(pk__in=[row.pk for row in rows]).delete()
+        apply_deltas(deltas)
+
+
+def rebuild(user=None, batch_size=1000):
+    """
+    Recomputes the rollup table from scratch, for one user or for everyone.
+    Returns the number of buckets written.
+    """
+    transactions = Transaction.objects.all()
+    rollups = MonthlyRollup.objects.all()
+    if user is not None:
+        transactions = transactions.filter(user=user)
+        rollups = rollups.filter(user=user)
+    rows = (
+        transactions
+        .annotate(year=ExtractYear('date'), month=ExtractMonth('date'))
+        .values(*BUCKET_FIELDS)
+        .annotate(total=Sum('amount'), count=Count('id'))
+        .order_by()
+    )
+    with transaction.atomic():
+        rollups.delete()
+        created = MonthlyRollup.objects.bulk_create(
+            (MonthlyRollup(**row) for row in rows), batch_size=batch_size
+        )
+    return len(created)
@@ -0,0 +1,68 @@
+# backend/core/search.py
+import re
+
+from django.db import connections
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import SearchFilter
+
+TOKEN = re.compile(r'\w+', re.UNICODE)
+
+SQLITE_MATCH = 'SELECT rowid FROM core_transaction_fts WHERE core_transaction_fts MATCH %s'
+# The user_id column only scopes the match; weight 0 keeps it out of the rank.
+SQLITE_RANK = (
+    'SELECT bm25(core_transaction_fts, 1.0, 1.0, 0.0) FROM core_transaction_fts '
+    'WHERE core_transaction_fts MATCH %s AND rowid = core_transaction.id'
+)
+
+
+def search_tokens(terms):
+    return [token.lower() for term in terms for token in TOKEN.findall(term)]
+
+
+class TransactionSearchFilter(SearchFilter):
+    """
+    Full-text search over transaction descriptions and category names for the
+    `search` parameter. Every term must match, as a word prefix ("gro" finds
+    "Groceries") of the description or the category name, using the FTS5
+    table on SQLite (see migration 0015) or a tsvector over both fields on
+    PostgreSQL. `ordering=relevance` sorts matches by rank instead of date.
+    Other databases fall back to DRF's LIKE search.
+    """
+    relevance_ordering = 'relevance'
+
+    def filter_queryset(self, request, queryset, view):
+        tokens = search_tokens(self.get_search_terms(request))
+        if not tokens:
+            return super().filter_queryset(request, queryset, view)
+        by_relevance = request.query_params.get('ordering') == self.relevance_ordering
+        vendor = connections[queryset.db].vendor
+        if vendor == 'sqlite':
+            return self.filter_sqlite(queryset, tokens, by_relevance, request.user)
+        if vendor == 'postgresql':
+            return self.filter_postgresql(queryset, tokens, by_relevance)
+        return super().filter_queryset(request, queryset, view)
+
+    def filter_sqlite(self, queryset, tokens, by_relevance, user):
+        # Quoted so FTS5 operators in user input stay literal; `*` makes each a prefix query.
+        terms = ' '.join(f'"{token}"*' for token in tokens)
+        # Scoped to the owner inside FTS5, and the terms kept off the user_id column.
+        match = f'user_id : "{user.pk}" AND {{description category_name}} : ({terms})'
+        queryset = queryset.filter(id__in=RawSQL(SQLITE_MATCH, (match,)))
+        if by_relevance:
+            # bm25() is lower for better matches.
+            queryset = queryset.annotate(search_rank=RawSQL(SQLITE_RANK, (match,), output_field=FloatField()))
+            queryset = queryset.order_by('search_rank', '-date', '-id')
+        return queryset
+
+    def filter_postgresql(self, queryset, tokens, by_relevance):
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+        # One vector over both fields, as on SQLite: each term is a word prefix
+        # of either, so "gro lunch" finds a "Lunch" filed under "Groceries".
+        vector = SearchVector('description', 'category__name', config='simple')
+        query = SearchQuery(' & '.join(f'{token}:*' for token in tokens), config='simple', search_type='raw')
+        queryset = queryset.annotate(search_vector=vector).filter(search_vector=query)
+        if by_relevance:
+            queryset = queryset.annotate(search_rank=SearchRank(vector, query)).order_by('-search_rank', '-date', '-id')
+        return queryset
@@ -1,14 +1,59 @@
 # backend/core/serializers.py
 from rest_framework import serializers
-from .models import Category, Transaction, Budget
+from .models import Category, Transaction, Budget, RecurringTransaction, Job, AlertRule, Notification
+from .jobs import HANDLERS as JOB_HANDLERS
+from .utils import resolve_categories
+from . import alerts, versions
 from django.conf import settings
 
+
+class BaseCurrencyMixin:
+    """New rows saved without a currency are in their user's base currency."""
+    def create(self, validated_data):
+        validated_data.setdefault('currency', validated_data['user'].base_currency)
+        return super().create(validated_data)
+
+
 # This serializer is for listing/retrieving detailed budget info
 class BudgetSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     class Meta:
         model = Budget
-        fields = ['id', 'category', 'category_name', 'amount', 'month', 'year']
+        fields = ['id', 'category', 'category_name', 'amount', 'currency', 'month', 'year']
+
+# Bulk version of BudgetCreateSerializer.create, used when saving with many=True
+class BudgetListSerializer(serializers.ListSerializer):
+    def create(self, validated_data):
+        user = self.context['request'].user
+
+        # One lookup for all categories, one INSERT for the missing ones
+        by_name, _ = resolve_categories(user, {item['category_name'] for item in validated_data})
+
+        # One "upsert" for all budgets; the last entry wins for repeated keys
+        budgets = {}
+        for item in validated_data:
+            category = by_name[item['category_name'].lower()]
+            budgets[(category.pk, item['year'], item['month'])] = Budget(
+                user=user,
+                category=category,
+                month=item['month'],
+                year=item['year'],
+                amount=item.get('amount', 0),
+                currency=item.get('currency', user.base_currency),
+            )
+        Budget.objects.bulk_create(
+            budgets.values(),
+            update_conflicts=True,
+            unique_fields=['user', 'category', 'year', 'month'],
+            update_fields=['amount', 'currency', 'updated_at'],
+        )
+        versions.bump(user.pk, versions.BUDGET)
+        # bulk_create sends no post_save for core.signals to check alerts on.
+        alerts.check_budgets(budgets.values())
+        return [
+            budgets[(by_name[item['category_name'].lower()].pk, item['year'], item['month'])]
+            for item in validated_data
+        ]
 
 # This serializer is specifically for creating or updating a budget
 class BudgetCreateSerializer(serializers.ModelSerializer):
@@ -16,7 +61,8 @@ class BudgetCreateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Budget
-        fields = ['category_name', 'amount', 'month', 'year']
+        fields = ['category_name', 'amount', 'currency', 'month', 'year']
+        list_serializer_class = BudgetListSerializer
 
     def create(self, validated_data):
         user = self.context['request'].user
@@ -35,7 +81,10 @@ class BudgetCreateSerializer(serializers.ModelSerializer):
             category=category,
             month=validated_data['month'],
             year=validated_data['year'],
-            defaults={'amount': validated_data.get('amount', 0)}
+            defaults={
+                'amount': validated_data.get('amount', 0),
+                'currency': validated_data.get('currency', user.base_currency),
+            }
         )
         return budget
 
@@ -46,8 +95,86 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name']
 
 # Serializer for Transaction
-class TransactionSerializer(serializers.ModelSerializer):
+class TransactionSerializer(BaseCurrencyMixin, serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     class Meta:
         model = Transaction
-        fields = ['id', 'category', 'category_name', 'amount', 'type', 'date', 'description']
\ No newline at end of file
+        fields = ['id', 'category', 'category_name', 'amount', 'currency', 'type', 'date', 'description']
+
+# Serializer for RecurringTransaction
+class RecurringTransactionSerializer(BaseCurrencyMixin, serializers.ModelSerializer):
+    category_name = serializers.CharField(source='category.name', read_only=True)
+
+    class Meta:
+        model = RecurringTransaction
+        fields = [
+            'id', 'category', 'category_name', 'amount', 'currency', 'type', 'description', 'frequency', 'interval',
+            'day_of_month', 'start_date', 'end_date', 'count', 'next_date',
+        ]
+        read_only_fields = ['next_date']
+        extra_kwargs = {
+            'interval': {'min_value': 1, 'max_value': 366},
+            'day_of_month': {'min_value': 1, 'max_value': 31},
+            'count': {'min_value': 1},
+        }
+
+    def validate_category(self, category):
+        # Materialized transactions inherit the category, so it must be the user's own.
+        if category is not None and category.user_id != self.context['request'].user.pk:
+            raise serializers.ValidationError('Unknown category.')
+        return category
+
+    def validate(self, attrs):
+        start_date = attrs.get('start_date', getattr(self.instance, 'start_date', None))
+        end_date = attrs.get('end_date', getattr(self.instance, 'end_date', None))
+        if start_date and end_date and end_date < start_date:
+            raise serializers.ValidationError({'end_date': 'Must not be before start_date.'})
+        return attrs
+
+
+# Serializer for Job
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ['id', 'kind', 'params', 'status', 'result', 'error', 'attempts', 'created_at', 'finished_at']
+        read_only_fields = ['status', 'result', 'error', 'attempts', 'created_at', 'finished_at']
+
+    def validate_kind(self, kind):
+        if kind not in JOB_HANDLERS:
+            raise serializers.ValidationError(f'Expected one of {", ".join(JOB_HANDLERS)}.')
+        return kind
+
+    def validate_params(self, params):
+        if not isinstance(params, dict):
+            raise serializers.ValidationError('Expected an object.')
+        return params
+
+
+# Serializer for AlertRule
+class AlertRuleSerializer(serializers.ModelSerializer):
+    category_name = serializers.CharField(source='category.name', read_only=True)
+
+    class Meta:
+        model = AlertRule
+        fields = ['id', 'category', 'category_name', 'threshold_percent', 'is_active', 'created_at']
+        read_only_fields = ['created_at']
+        extra_kwargs = {
+            'threshold_percent': {'min_value': 1, 'max_value': 1000},
+            # Form posts omit unchecked boxes, which DRF would read as False.
+            'is_active': {'default': True},
+        }
+
+    def validate_category(self, category):
+        if category is not None and category.user_id != self.context['request'].user.pk:
+            raise serializers.ValidationError('Unknown category.')
+        return category
+
+
+# Serializer for Notification
+class NotificationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Notification
+        fields = [
+            'id', 'rule', 'category', 'year', 'month', 'threshold_percent', 'spent', 'budgeted', 'currency',
+            'message', 'created_at',
+        ]
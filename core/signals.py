@@ -0,0 +1,88 @@
+# backend/core/signals.py
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.backends.signals import connection_created
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import AlertRule, Budget, Category, RecurringTransaction, Transaction
+from .summary import invalidate_summary_for, invalidate_user_summaries
+from . import alerts, metrics, sync, versions
+
+
+def _deleting_user(origin):
+    # Deleting a user cascades to all of their rows; nothing should be written
+    # for them on the way out (the rows would point at the deleted user).
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(model, get_user_model())
+
+
+# The API invalidates from its own write paths; these receivers also catch
+# writes made elsewhere, such as the admin or a shell.
+@receiver(post_save, sender=Transaction, dispatch_uid='transaction_saved_summary')
+@receiver(post_save, sender=Budget, dispatch_uid='budget_saved_summary')
+@receiver(post_save, sender=Category, dispatch_uid='category_saved_summary')
+@receiver(post_delete, sender=Transaction, dispatch_uid='transaction_deleted_summary')
+@receiver(post_delete, sender=Budget, dispatch_uid='budget_deleted_summary')
+@receiver(post_delete, sender=Category, dispatch_uid='category_deleted_summary')
+def invalidate_cached_summary(sender, instance, **kwargs):
+    invalidate_summary_for(instance)
+
+
+# A budget lowered below what is already spent crosses its alert thresholds
+# without any spending.
+@receiver(post_save, sender=Budget, dispatch_uid='budget_saved_alerts')
+def check_budget_alerts(sender, instance, **kwargs):
+    alerts.check_budgets([instance])
+
+
+# Summaries and time series are in the user's base currency. Saves that may
+# change it drop the cached summaries and the time series' validators; logins
+# only save last_login.
+@receiver(post_save, sender=settings.AUTH_USER_MODEL, dispatch_uid='user_saved_summary')
+def invalidate_summaries_in_base_currency(sender, instance, created=False, update_fields=None, **kwargs):
+    if not created and (update_fields is None or 'base_currency' in update_fields):
+        invalidate_user_summaries(instance.pk)
+        versions.bump(instance.pk, versions.TRANSACTION)
+
+
+@receiver(post_save, sender=Transaction, dispatch_uid='transaction_saved_version')
+@receiver(post_save, sender=Budget, dispatch_uid='budget_saved_version')
+@receiver(post_save, sender=Category, dispatch_uid='category_saved_version')
+@receiver(post_save, sender=RecurringTransaction, dispatch_uid='recurring_saved_version')
+@receiver(post_save, sender=AlertRule, dispatch_uid='alertrule_saved_version')
+@receiver(post_delete, sender=Transaction, dispatch_uid='transaction_deleted_version')
+@receiver(post_delete, sender=Budget, dispatch_uid='budget_deleted_version')
+@receiver(post_delete, sender=Category, dispatch_uid='category_deleted_version')
+@receiver(post_delete, sender=RecurringTransaction, dispatch_uid='recurring_deleted_version')
+@receiver(post_delete, sender=AlertRule, dispatch_uid='alertrule_deleted_version')
+def bump_resource_version(sender, instance, origin=None, **kwargs):
+    if not _deleting_user(origin):
+        versions.bump(instance.user_id, sender._meta.model_name)
+
+
+@receiver(post_delete, sender=Transaction, dispatch_uid='transaction_deleted_tombstone')
+@receiver(post_delete, sender=Budget, dispatch_uid='budget_deleted_tombstone')
+@receiver(post_delete, sender=Category, dispatch_uid='category_deleted_tombstone')
+def leave_tombstone(sender, instance, origin=None, **kwargs):
+    if not _deleting_user(origin):
+        sync.record_deletion(instance)
+
+
+@receiver(pre_delete, sender=Category, dispatch_uid='category_deleted_sync')
+def touch_uncategorized_transactions(sender, instance, **kwargs):
+    # The SET_NULL on Transaction.category is a plain UPDATE that leaves
+    # updated_at alone; mark those transactions changed for sync.
+    Transaction.objects.filter(category=instance).update(updated_at=timezone.now())
+
+
+@receiver(connection_created, dispatch_uid='metrics_execute_wrapper')
+def install_metrics_wrapper(sender, connection, **kwargs):
+    # Every connection, in whichever thread opens it, times its statements
+    # into the current request's sample (see core.metrics.current_sample).
+    # Inserted first so `connection.execute_wrapper()` blocks, which pop the
+    # last wrapper on exit, are unaffected.
+    if metrics.execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, metrics.execute_wrapper)
@@ -0,0 +1,301 @@
+# backend/core/summary.py
+import asyncio
+import hashlib
+import json
+import time
+
+from datetime import date
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Budget, Category, MonthlyRollup, Transaction
+from .utils import month_bounds
+from . import fx, versions
+
+
+def summary_period(params, today=None):
+    """
+    The `(year, month)` a summary request asks for, the current month by
+    default. Raises ValidationError for anything but a real calendar month.
+    """
+    today = today or date.today()
+    period = {}
+    for name, default, low, high in (('year', today.year, date.min.year, date.max.year - 1), ('month', today.month, 1, 12)):
+        try:
+            period[name] = int(params.get(name, default))
+        except (TypeError, ValueError):
+            raise ValidationError({name: 'Expected an integer.'})
+        if not low <= period[name] <= high:
+            raise ValidationError({name: f'Expected {low} to {high}.'})
+    return period['year'], period['month']
+
+
+def _grouped(source, amount, **extra):
+    return (
+        source
+        .values('category_id', 'category__name', 'currency')
+        .annotate(
+            income=Sum(amount, filter=Q(type='INCOME')),
+            expenses=Sum(amount, filter=Q(type='EXPENSE')),
+            **extra,
+        )
+        .order_by()
+    )
+
+
+def _rollup_rows(user, year, month):
+    return _grouped(MonthlyRollup.objects.filter(user=user, year=year, month=month), 'total')
+
+
+def _converted_rows(transactions, currency):
+    # Converted in the aggregation itself; `unconverted` counts the rows
+    # lacking a rate, which the sums leave out.
+    return _grouped(
+        transactions.alias(converted=fx.converted_amount(currency)), 'converted',
+        unconverted=Count('pk', filter=Q(converted__isnull=True)),
+    )
+
+
+def _month_transactions(user, year, month):
+    start, end = month_bounds(year, month)
+    return Transaction.objects.filter(user=user, date__gte=start, date__lt=end)
+
+
+def _needs_conversion(rows, currency):
+    # Rollups hold each currency's own totals, but amounts are converted at
+    # their own day's rate, so a month with any other currency is summed
+    # from its transactions instead.
+    return any(row['currency'] != currency for row in rows)
+
+
+def _budgets(user, year, month):
+    return Budget.objects.filter(user=user, year=year, month=month).select_related('category')
+
+
+def _converted_budgets(budgets, currency, year, month):
+    if all(budget.currency == currency for budget in budgets):
+        return [(budget, budget.amount) for budget in budgets]
+    day = fx.rate_date(year, month)
+    return [(budget, fx.convert(budget.amount, budget.currency, currency, day)) for budget in budgets]
+
+
+def _assemble_summary(rows, budgets, currency):
+    """`budgets` are `(budget, amount in currency or None)` pairs."""
+    total_income = 0
+    total_expenses = 0
+    expenses_by_category = {}
+    actual_by_category = {}
+    missing_rates = set()
+    for row in rows:
+        if row.get('unconverted'):
+            missing_rates.add(row['currency'])
+        # Sums of converted amounts may come back from SQLite as floats.
+        income, expenses = (None if value is None else round(value, 2) for value in (row['income'], row['expenses']))
+        if income is not None:
+            total_income += income
+        if expenses is not None:
+            total_expenses += expenses
+            item = expenses_by_category.setdefault(
+                row['category_id'], {'category__name': row['category__name'], 'total': 0},
+            )
+            item['total'] += expenses
+            actual_by_category[row['category_id']] = item['total']
+    expenses_by_category = sorted(expenses_by_category.values(), key=lambda item: item['total'], reverse=True)
+
+    budget_vs_actual = []
+    for budget, amount in budgets:
+        if amount is None:
+            # Left in its own currency, and reported.
+            missing_rates.add(budget.currency)
+            amount = budget.amount
+        actual = actual_by_category.get(budget.category_id, 0)
+        budget_vs_actual.append({
+            'category_name': budget.category.name,
+            'budgeted_amount': amount,
+            'actual_amount': actual,
+            'difference': amount - actual,
+        })
+
+    return {
+        'currency': currency,
+        'total_income': total_income,
+        'total_expenses': total_expenses,
+        'balance': total_income - total_expenses,
+        'expenses_by_category': expenses_by_category,
+        'budget_vs_actual': budget_vs_actual,
+        'missing_rates': sorted(missing_rates),
+    }
+
+
+def build_financial_summary(user, year, month, transactions=None, currency=None):
+    """
+    Builds the dashboard summary for one user and month, in the user's base
+    currency.
+
+    Everything is derived from a single grouped aggregation (conditional sums
+    per type, grouped by category and currency) plus one budget query joined
+    to its category, so the number of queries stays constant no matter how
+    many budgets the user has. By default the aggregation runs over the
+    month's rollup buckets, so its cost depends on the number of categories
+    rather than the size of the transaction history. Passing `transactions`
+    (an already filtered queryset, see TransactionFilterSet) aggregates those
+    rows instead.
+
+    Amounts in other currencies are converted at the rate of their own day,
+    by the database within the aggregation (see core.fx.converted_amount);
+    a month holding any is therefore aggregated from its transactions, one
+    more query. Budgets are converted at the month's rate (see
+    core.fx.rate_date). Currencies lacking a rate are listed in
+    `missing_rates`. The base `currency` is read from the database unless
+    given (see core.fx.base_currency).
+    """
+    currency = currency or fx.base_currency(user)
+    if transactions is None:
+        rows = list(_rollup_rows(user, year, month))
+        if _needs_conversion(rows, currency):
+            rows = list(_converted_rows(_month_transactions(user, year, month), currency))
+    else:
+        rows = _converted_rows(transactions, currency)
+    budgets = _converted_budgets(_budgets(user, year, month), currency, year, month)
+    return _assemble_summary(rows, budgets, currency)
+
+
+async def abuild_financial_summary(user, year, month, transactions=None, currency=None):
+    """Async build_financial_summary: the row and budget queries run concurrently."""
+    currency = currency or await fx.abase_currency(user)
+    source = _rollup_rows(user, year, month) if transactions is None else _converted_rows(transactions, currency)
+    rows, budgets = await asyncio.gather(_alist(source), _alist(_budgets(user, year, month)))
+    if transactions is None and _needs_conversion(rows, currency):
+        rows = await _alist(_converted_rows(_month_transactions(user, year, month), currency))
+    if any(budget.currency != currency for budget in budgets):
+        budgets = await sync_to_async(_converted_budgets)(budgets, currency, year, month)
+    else:
+        budgets = _converted_budgets(budgets, currency, year, month)
+    return _assemble_summary(rows, budgets, currency)
+
+
+async def _alist(queryset):
+    return [item async for item in queryset]
+
+
+# --- Summary cache ---
+# Entries are keyed on (user, generation, year, month). Transaction and budget
+# writes delete the one month they touch; category writes can change every
+# month's names, so they move the user to a new generation instead.
+#
+# Those deletions only reach the cache of the process making the write; with a
+# per-process backend, other workers, runworkers and management commands would
+# go on serving their own copies. Entries therefore also record the user's
+# ResourceVersion counters, which every write path bumps in the database, with
+# the stored base currency and the exchange-rate version, and are rebuilt when
+# any of those has moved on: one small query per cached read.
+SUMMARY_RESOURCES = (versions.TRANSACTION, versions.BUDGET)
+
+
+def _snapshot(state):
+    return state.currency, state.rates_version, tuple(version for version, _ in state.resources.values())
+
+
+def _cache():
+    return caches['summary']
+
+
+def _generation_key(user_id):
+    return f'summary:generation:{user_id}'
+
+
+def _generation(user_id):
+    key = _generation_key(user_id)
+    generation = _cache().get(key)
+    if generation is None:
+        # Seeded with a timestamp rather than 0, so an evicted generation can
+        # never resurrect entries written under an earlier one.
+        _cache().add(key, time.time_ns(), timeout=None)
+        generation = _cache().get(key)
+    return generation
+
+
+async def _ageneration(user_id):
+    key = _generation_key(user_id)
+    generation = await _cache().aget(key)
+    if generation is None:
+        await _cache().aadd(key, time.time_ns(), timeout=None)
+        generation = await _cache().aget(key)
+    return generation
+
+
+def _summary_key(user_id, generation, year, month):
+    return f'summary:{user_id}:{generation}:{year}:{month}'
+
+
+def _cache_entry(data, snapshot):
+    payload = json.dumps(data, cls=JSONEncoder, sort_keys=True).encode()
+    return {
+        'data': data,
+        'etag': f'"{hashlib.md5(payload).hexdigest()}"',
+        'last_modified': int(time.time()),
+        'versions': snapshot,
+    }
+
+
+def get_cached_summary(user, year, month):
+    """
+    Returns `{'data', 'etag', 'last_modified'}` for the user's month, building
+    and caching the summary on a miss or when the user's data has changed
+    since it was cached.
+    """
+    # Read before building, so a write racing the build leaves the entry stale.
+    state = versions.state(user.pk, SUMMARY_RESOURCES)
+    fx.rates.sync(state.rates_version)
+    snapshot = _snapshot(state)
+    key = _summary_key(user.pk, _generation(user.pk), year, month)
+    entry = _cache().get(key)
+    if entry is None or entry.get('versions') != snapshot:
+        entry = _cache_entry(build_financial_summary(user, year, month, currency=state.currency), snapshot)
+        _cache().set(key, entry)
+    return entry
+
+
+async def aget_cached_summary(user, year, month):
+    """Async get_cached_summary, sharing its cache entries."""
+    state = await versions.astate(user.pk, SUMMARY_RESOURCES)
+    fx.rates.sync(state.rates_version)
+    snapshot = _snapshot(state)
+    key = _summary_key(user.pk, await _ageneration(user.pk), year, month)
+    entry = await _cache().aget(key)
+    if entry is None or entry.get('versions') != snapshot:
+        entry = _cache_entry(await abuild_financial_summary(user, year, month, currency=state.currency), snapshot)
+        await _cache().aset(key, entry)
+    return entry
+
+
+def _after_write(action):
+    # Run now and again once the surrounding transaction commits, so a request
+    # that re-cached the pre-commit state in between does not keep it.
+    action()
+    transaction.on_commit(action)
+
+
+def invalidate_summary(user_id, year, month):
+    key = _summary_key(user_id, _generation(user_id), year, month)
+    _after_write(lambda: _cache().delete(key))
+
+
+def invalidate_user_summaries(user_id):
+    key = _generation_key(user_id)
+    _after_write(lambda: _cache().set(key, time.time_ns(), timeout=None))
+
+
+def invalidate_summary_for(instance):
+    """Drops whatever cached summaries a saved or deleted model instance affects."""
+    if isinstance(instance, Transaction):
+        invalidate_summary(instance.user_id, instance.date.year, instance.date.month)
+    elif isinstance(instance, Budget):
+        invalidate_summary(instance.user_id, instance.year, instance.month)
+    elif isinstance(instance, Category):
+        invalidate_user_summaries(instance.user_id)
@@ -0,0 +1,149 @@
+# backend/core/sync.py
+import heapq
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from .fastpath import row_encoder
+from .models import Budget, Category, Tombstone, Transaction
+from .serializers import BudgetSerializer, CategorySerializer, TransactionSerializer
+
+PAGE_SIZE = 500
+MAX_PAGE_SIZE = 1000
+
+# (response key, model, read serializer). Rows changed at the same instant
+# are sent in this order, so a category arrives before the rows naming it.
+RESOURCES = (
+    ('categories', Category, CategorySerializer),
+    ('transactions', Transaction, TransactionSerializer),
+    ('budgets', Budget, BudgetSerializer),
+)
+DELETED_KEYS = {model._meta.model_name: key for key, model, _ in RESOURCES}
+TOMBSTONE_RANK = len(RESOURCES)
+# Ranks after every source: a position at `(time, END_RANK, 0)` is past
+# everything that changed at or before `time`.
+END_RANK = TOMBSTONE_RANK + 1
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+class SyncTokenExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = 'The sync token has expired; sync again without `since`.'
+    default_code = 'sync_token_expired'
+
+
+def record_deletion(instance):
+    """Leaves a tombstone for a deleted category, transaction or budget."""
+    Tombstone.objects.create(user_id=instance.user_id, resource=instance._meta.model_name, object_id=instance.pk)
+
+
+def prune_tombstones(now=None):
+    """Deletes the tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS; returns how many."""
+    cutoff = (now or timezone.now()) - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
+
+
+def encode_token(position, horizon):
+    time, rank, pk = position
+    parts = ((time - EPOCH) // MICROSECOND, rank, pk, (horizon - EPOCH) // MICROSECOND)
+    return urlsafe_b64encode(':'.join(map(str, parts)).encode('ascii')).decode('ascii')
+
+
+def decode_token(token):
+    """Returns the `((time, rank, id), horizon)` a token was encoded from."""
+    try:
+        time, rank, pk, horizon = map(int, urlsafe_b64decode(token.encode('ascii')).decode('ascii').split(':'))
+        return (EPOCH + time * MICROSECOND, rank, pk), EPOCH + horizon * MICROSECOND
+    except (BinasciiError, UnicodeError, ValueError, OverflowError):
+        raise ValidationError({'since': 'Invalid sync token.'})
+
+
+def _after(field, position, rank):
+    """Rows of the source ranked `rank` that come after `position` in sync order."""
+    time, position_rank, pk = position
+    if rank < position_rank:
+        return Q(**{f'{field}__gt': time})
+    if rank > position_rank:
+        return Q(**{f'{field}__gte': time})
+    # The __gte bound keeps this a range seek on the (user, time, id) index.
+    return (Q(**{f'{field}__gt': time}) | Q(id__gt=pk)) & Q(**{f'{field}__gte': time})
+
+
+def changes(user, since=None, limit=PAGE_SIZE, now=None):
+    """
+    The user's categories, transactions and budgets changed after the sync
+    token `since`, and the ids of those deleted after it; without `since`,
+    every row. Changes are sent oldest first, at most `limit` per call, as
+    `{'token', 'has_more', 'categories', 'transactions', 'budgets', 'deleted'}`.
+    Passing the returned token fetches the next batch, or later changes once
+    `has_more` is false.
+
+    A token is a position in the order `(updated_at, resource, id)` (deletions
+    ordered by `deleted_at`, after rows), so each call is one index range seek
+    per resource and costs O(changes), however long the history. Rows carry
+    their category's name as of their own last change; clients should read
+    names from the synced categories.
+
+    Changes younger than SYNC_SETTLE_SECONDS are held back to a later call:
+    `updated_at` is taken before a write commits, so a row committed just
+    after a token was issued could otherwise carry a time the token is
+    already past. That is the bound: a write committed more than
+    SYNC_SETTLE_SECONDS after its `updated_at` can be skipped by a client
+    that synced in between. Rows are stamped as they are saved, and long
+    write transactions re-stamp theirs just before committing (see
+    core.versions.touch()), so only the commit itself has to fit in the
+    window. Tokens older than SYNC_TOMBSTONE_RETENTION_DAYS, whose
+    deletions may have been pruned, raise SyncTokenExpired.
+    """
+    now = now or timezone.now()
+    until = now - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+    if since is None:
+        # A full sync reports no deletion before it started, even while a
+        # later batch resumes from an old `updated_at`.
+        position, horizon = None, until
+    else:
+        position, horizon = decode_token(since)
+        if max(position[0], horizon) < now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS):
+            raise SyncTokenExpired()
+
+    # Each source is read in sync order, `limit + 1` rows at most, and merged.
+    sources = []
+    for rank, (key, model, serializer_class) in enumerate(RESOURCES):
+        encoder = row_encoder(serializer_class)
+        queryset = model.objects.filter(user=user, updated_at__lte=until)
+        if position is not None:
+            queryset = queryset.filter(_after('updated_at', position, rank))
+        rows = encoder.values(queryset.order_by('updated_at', 'id'), 'updated_at')[:limit + 1]
+        sources.append([(row['updated_at'], rank, row['id'], key, encoder.encode(row)) for row in rows])
+    if position is not None:
+        tombstones = Tombstone.objects.filter(
+            _after('deleted_at', position, TOMBSTONE_RANK), user=user, deleted_at__gt=horizon, deleted_at__lte=until,
+        )
+        rows = tombstones.order_by('deleted_at', 'id').values_list('deleted_at', 'id', 'resource', 'object_id')
+        sources.append([
+            (deleted_at, TOMBSTONE_RANK, pk, DELETED_KEYS[resource], object_id)
+            for deleted_at, pk, resource, object_id in rows[:limit + 1]
+        ])
+
+    merged = list(heapq.merge(*sources, key=lambda change: change[:3]))
+    has_more = len(merged) > limit
+    data = {key: [] for key, _, _ in RESOURCES}
+    deleted = {key: [] for key, _, _ in RESOURCES}
+    for _, rank, _, key, payload in merged[:limit]:
+        (deleted if rank == TOMBSTONE_RANK else data)[key].append(payload)
+
+    if has_more:
+        position = merged[limit - 1][:3]
+    else:
+        # Caught up: everything up to `until` has been sent.
+        position = max(position or (until, END_RANK, 0), (until, END_RANK, 0))
+    return {'token': encode_token(position, horizon), 'has_more': has_more, **data, 'deleted': deleted}
@@ -1,3 +1,1944 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, connections, transaction
+from django.db.models import Q, Sum
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import AsyncClient, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from budget_project.database import sqlite_config
+from users.models import CustomUser
+from .compression import GzipCodec, brotli, negotiate_encoding
+from .metrics import RequestSample, current_sample, registry
+from .middleware import AdmissionControlMiddleware
+from .models import (
+    AlertRule, Category, Transaction, Budget, ExchangeRate, Job, MonthlyRollup, Notification, RecurringTransaction,
+    Tombstone,
+)
+from .renderers import FastJSONRenderer
+from .serializers import BudgetSerializer, TransactionSerializer
+from .utils import month_bounds
+from . import alerts, fx, jobs, recurring, rollups, sync, throttling, versions
+
+
+class FinancialSummaryViewTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='alice', email='alice@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('financial-summary')
+        caches['summary'].clear()
+
+    def _seed(self, budget_count, prefix='Category'):
+        for i in range(budget_count):
+            category = Category.objects.create(user=self.user, name=f'{prefix} {i}')
+            Budget.objects.create(user=self.user, category=category, amount=Decimal('100.00'), month=6, year=2025)
+            Transaction.objects.create(
+                user=self.user, category=category, amount=Decimal('40.00'), type='EXPENSE', date=date(2025, 6, 10)
+            )
+        Transaction.objects.create(user=self.user, amount=Decimal('1000.00'), type='INCOME', date=date(2025, 6, 1))
+        # Outside the requested month, must not be counted.
+        Transaction.objects.create(user=self.user, amount=Decimal('999.00'), type='EXPENSE', date=date(2025, 7, 1))
+        rollups.rebuild(self.user)
+
+    def test_summary_totals(self):
+        self._seed(3)
+        response = self.client.get(self.url, {'month': 6, 'year': 2025})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Decimal(response.data['total_income']), Decimal('1000.00'))
+        self.assertEqual(Decimal(response.data['total_expenses']), Decimal('120.00'))
+        self.assertEqual(Decimal(response.data['balance']), Decimal('880.00'))
+        self.assertEqual(len(response.data['expenses_by_category']), 3)
+        self.assertEqual(len(response.data['budget_vs_actual']), 3)
+        for row in response.data['budget_vs_actual']:
+            self.assertEqual(Decimal(row['actual_amount']), Decimal('40.00'))
+            self.assertEqual(Decimal(row['difference']), Decimal('60.00'))
+
+    def test_invalid_periods_are_rejected(self):
+        for params, field in (({'year': 2025, 'month': 13}, 'month'), ({'month': 0}, 'month'),
+                              ({'year': 2025, 'month': 13, 'type': 'EXPENSE'}, 'month'), ({'year': 'soon'}, 'year')):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn(field, response.data)
+
+    def test_summary_query_count_is_constant(self):
+        self._seed(2)
+        # Version check, rollup aggregation, budgets.
+        with self.assertNumQueries(3):
+            self.client.get(self.url, {'month': 6, 'year': 2025})
+        self._seed(10, prefix='More')
+        with self.assertNumQueries(3):
+            self.client.get(self.url, {'month': 6, 'year': 2025})
+
+    def test_cached_summary_and_conditional_get(self):
+        self._seed(2)
+        first = self.client.get(self.url, {'month': 6, 'year': 2025})
+        self.assertIn('ETag', first)
+        self.assertIn('Last-Modified', first)
+        with self.assertNumQueries(1):
+            again = self.client.get(self.url, {'month': 6, 'year': 2025})
+        self.assertEqual(again.data, first.data)
+        with self.assertNumQueries(1):
+            not_modified = self.client.get(self.url, {'month': 6, 'year': 2025}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_writes_from_other_processes_are_seen(self):
+        self._seed(1)
+        params = {'month': 6, 'year': 2025}
+        etag = self.client.get(self.url, params)['ETag']
+        # As another worker would: the database changes, this process's cache does not.
+        with mock.patch('core.summary._after_write'):
+            category = Category.objects.get(user=self.user)
+            Transaction.objects.create(
+                user=self.user, category=category, amount=Decimal('5.00'), type='EXPENSE', date=date(2025, 6, 20),
+            )
+            rollups.rebuild(user=self.user)
+        response = self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Decimal(response.data['total_expenses']), Decimal('45.00'))
+        self.assertEqual(self.client.get(self.url, params, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_writes_invalidate_cached_summary(self):
+        self._seed(1)
+        params = {'month': 6, 'year': 2025}
+        etag = self.client.get(self.url, params)['ETag']
+        category = Category.objects.get(user=self.user)
+
+        response = self.client.post('/api/transactions/', {'amount': '5.00', 'type': 'EXPENSE', 'date': '2025-06-20', 'category': category.pk})
+        transaction_id = response.data['id']
+        refreshed = self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(refreshed.status_code, 200)
+        self.assertEqual(Decimal(refreshed.data['total_expenses']), Decimal('45.00'))
+
+        # Moving a transaction to another month invalidates the month it left.
+        self.client.patch(f'/api/transactions/{transaction_id}/', {'date': '2025-08-01'}, format='json')
+        self.assertEqual(Decimal(self.client.get(self.url, params).data['total_expenses']), Decimal('40.00'))
+
+        self.client.post('/api/budgets/', [{'category_name': category.name, 'amount': '70.00', 'month': 6, 'year': 2025}], format='json')
+        budget_row = self.client.get(self.url, params).data['budget_vs_actual'][0]
+        self.assertEqual(Decimal(budget_row['budgeted_amount']), Decimal('70.00'))
+
+        # Edits made outside the API (admin, shell) are caught by signals.
+        category.name = 'Renamed'
+        category.save()
+        self.assertEqual(self.client.get(self.url, params).data['budget_vs_actual'][0]['category_name'], 'Renamed')
+
+
+class MonthlyRollupTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='bob', email='bob@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.food = Category.objects.create(user=self.user, name='Food')
+        self.rent = Category.objects.create(user=self.user, name='Rent')
+
+    def _snapshot(self):
+        return list(
+            MonthlyRollup.objects.filter(user=self.user)
+            .order_by('category_id', 'type', 'year', 'month')
+            .values_list('category_id', 'type', 'year', 'month', 'total', 'count')
+        )
+
+    def _assert_matches_rebuild(self):
+        incremental = self._snapshot()
+        rollups.rebuild(self.user)
+        self.assertEqual(incremental, self._snapshot())
+
+    def _create(self, **data):
+        payload = {'amount': '10.00', 'type': 'EXPENSE', 'date': '2025-06-05', 'category': self.food.pk}
+        payload.update(data)
+        response = self.client.post('/api/transactions/', payload)
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def test_create_update_delete_keep_rollups_in_step(self):
+        first = self._create()
+        self._create(amount='5.50')
+        self._create(type='INCOME', amount='100.00', category='')
+        self.assertEqual(
+            MonthlyRollup.objects.get(user=self.user, category=self.food, type='EXPENSE').total, Decimal('15.50')
+        )
+        self._assert_matches_rebuild()
+
+        response = self.client.patch(
+            f'/api/transactions/{first}/', {'date': '2025-07-01', 'category': self.rent.pk}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self._assert_matches_rebuild()
+
+        self.assertEqual(self.client.delete(f'/api/transactions/{first}/').status_code, 204)
+        self.assertFalse(MonthlyRollup.objects.filter(user=self.user, year=2025, month=7).exists())
+        self._assert_matches_rebuild()
+
+    def test_deleting_category_moves_totals_to_uncategorized(self):
+        self._create()
+        self._create(category='')
+        self.assertEqual(self.client.delete(f'/api/categories/{self.food.pk}/').status_code, 204)
+        bucket = MonthlyRollup.objects.get(user=self.user, category=None, type='EXPENSE')
+        self.assertEqual((bucket.total, bucket.count), (Decimal('20.00'), 2))
+        self._assert_matches_rebuild()
+
+    def test_rebuild_command(self):
+        Transaction.objects.create(user=self.user, category=self.food, amount=Decimal('3.00'), type='EXPENSE', date=date(2025, 1, 2))
+        Transaction.objects.create(user=self.user, category=self.food, amount=Decimal('4.00'), type='EXPENSE', date=date(2025, 1, 9))
+        call_command('rebuild_rollups', user=self.user.pk, stdout=StringIO())
+        bucket = MonthlyRollup.objects.get(user=self.user)
+        self.assertEqual((bucket.total, bucket.count, bucket.year, bucket.month), (Decimal('7.00'), 2, 2025, 1))
+
+
+class TransactionQueryPlanTests(TestCase):
+    """Fails if a hot Transaction query stops using an index."""
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Query plan assertions are written against SQLite EXPLAIN QUERY PLAN output.')
+        self.user = CustomUser.objects.create_user(username='carol', email='carol@example.com', password='pw')
+
+    def assertUsesIndex(self, queryset):
+        plan = queryset.explain()
+        self.assertIn('SEARCH core_transaction USING', plan)
+        self.assertNotIn('SCAN core_transaction', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_list_query(self):
+        self.assertUsesIndex(Transaction.objects.filter(user=self.user).select_related('category'))
+
+    def test_type_filtered_list_query(self):
+        self.assertUsesIndex(Transaction.objects.filter(user=self.user, type='EXPENSE').select_related('category'))
+
+    def test_monthly_range_query(self):
+        start, end = month_bounds(2025, 12)
+        self.assertEqual(end, date(2026, 1, 1))
+        self.assertUsesIndex(Transaction.objects.filter(user=self.user, date__gte=start, date__lt=end))
+
+    def test_cursor_page_query(self):
+        plan = (
+            Transaction.objects.filter(user=self.user)
+            .filter(Q(date__lt=date(2025, 6, 1)) | Q(id__lt=50), date__lte=date(2025, 6, 1))
+            .order_by('-date', '-id')
+            .explain()
+        )
+        self.assertIn('date<?', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_category_filter_query(self):
+        self.assertUsesIndex(Transaction.objects.filter(user=self.user, category_id__in=[1, 2]).select_related('category'))
+
+    def test_amount_range_query(self):
+        plan = Transaction.objects.filter(user=self.user, amount__gte=10, amount__lte=50).explain()
+        self.assertIn('core_txn_user_amount_idx', plan)
+
+    def test_rollup_summary_query(self):
+        plan = MonthlyRollup.objects.filter(user=self.user, year=2025, month=6).explain()
+        self.assertNotIn('SCAN core_monthlyrollup', plan)
+
+
+class TransactionCursorPaginationTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='dave', email='dave@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        # Several rows share a date so the id tie-breaker is exercised.
+        Transaction.objects.bulk_create([
+            Transaction(user=self.user, amount=Decimal('1.00'), type='EXPENSE', date=date(2025, 1, 1 + i // 3))
+            for i in range(25)
+        ])
+
+    def test_walks_all_rows_without_count_query(self):
+        seen = []
+        url = '/api/transactions/?pagination=cursor&page_size=10'
+        while url:
+            # One query for the resource version, one for the page.
+            with self.assertNumQueries(2):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        expected = list(Transaction.objects.filter(user=self.user).order_by('-date', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_pages_are_stable_under_inserts(self):
+        first = self.client.get('/api/transactions/', {'pagination': 'cursor', 'page_size': 10})
+        Transaction.objects.create(user=self.user, amount=Decimal('9.00'), type='EXPENSE', date=date(2025, 12, 31))
+        second = self.client.get(first.data['next'])
+        first_ids = {row['id'] for row in first.data['results']}
+        self.assertFalse(first_ids & {row['id'] for row in second.data['results']})
+        self.assertEqual(len(second.data['results']), 10)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/api/transactions/', {'cursor': 'not-a-cursor'}).status_code, 404)
+
+    def test_page_number_pagination_remains_default(self):
+        response = self.client.get('/api/transactions/')
+        self.assertEqual(response.data['count'], 25)
+
+
+class TransactionExportTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='erin', email='erin@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        food = Category.objects.create(user=self.user, name='Food')
+        Transaction.objects.create(user=self.user, category=food, amount=Decimal('12.50'), type='EXPENSE', date=date(2025, 6, 2), description='Lunch, with "quotes"')
+        Transaction.objects.create(user=self.user, amount=Decimal('900.00'), type='INCOME', date=date(2025, 6, 1), description='Salary')
+        other = CustomUser.objects.create_user(username='frank', email='frank@example.com', password='pw')
+        Transaction.objects.create(user=other, amount=Decimal('1.00'), type='EXPENSE', date=date(2025, 6, 1))
+
+    def _content(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export(self):
+        response = self.client.get('/api/transactions/export/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(StringIO(self._content(response))))
+        self.assertEqual([row['description'] for row in rows], ['Lunch, with "quotes"', 'Salary'])
+        self.assertEqual(rows[0]['amount'], '12.50')
+        self.assertEqual(rows[0]['category_name'], 'Food')
+        self.assertEqual(rows[1]['category'], '')
+
+    def test_ndjson_export_honors_list_filters(self):
+        response = self.client.get('/api/transactions/export/', {'format': 'ndjson', 'type': 'EXPENSE'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in self._content(response).splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['category_name'], 'Food')
+
+        response = self.client.get('/api/transactions/export/', {'format': 'ndjson', 'search': 'salary'})
+        rows = [json.loads(line) for line in self._content(response).splitlines()]
+        self.assertEqual([row['description'] for row in rows], ['Salary'])
+
+    def test_export_requires_authentication(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/api/transactions/export/').status_code, 401)
+
+
+class TransactionImportTests(TestCase):
+    url = '/api/transactions/import/'
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='gina', email='gina@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.food = Category.objects.create(user=self.user, name='Food')
+
+    def _rows(self, count, **extra):
+        return [
+            dict({'amount': '2.00', 'type': 'EXPENSE', 'date': f'2025-03-{1 + i % 28:02d}', 'category_name': 'food'}, **extra)
+            for i in range(count)
+        ]
+
+    def test_json_import_resolves_and_creates_categories(self):
+        rows = self._rows(3) + self._rows(2, category_name='Travel') + [{'amount': '50.00', 'type': 'INCOME', 'date': '2025-03-01'}]
+        response = self.client.post(self.url, rows, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {'imported': 6, 'categories_created': ['Travel']})
+        self.assertEqual(Transaction.objects.filter(user=self.user, category=self.food).count(), 3)
+        bucket = MonthlyRollup.objects.get(user=self.user, category=self.food)
+        self.assertEqual((bucket.total, bucket.count), (Decimal('6.00'), 3))
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self.client.post(self.url, self._rows(28), format='json')
+        counts = []
+        for size in (10, 100):
+            with CaptureQueriesContext(connection) as queries:
+                self.client.post(self.url, self._rows(size), format='json')
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_invalid_rows_are_reported_and_nothing_is_written(self):
+        rows = self._rows(2) + [{'amount': 'abc', 'type': 'EXPENSE', 'date': '2025-03-01'}, {'type': 'GIFT'}]
+        response = self.client.post(self.url, rows, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(sorted(response.data['rows']), [2, 3])
+        self.assertIn('amount', response.data['rows'][2])
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_idempotency_key_replays_result(self):
+        first = self.client.post(self.url, self._rows(4), format='json', HTTP_IDEMPOTENCY_KEY='sync-42')
+        second = self.client.post(self.url, self._rows(4), format='json', HTTP_IDEMPOTENCY_KEY='sync-42')
+        self.assertEqual((first.status_code, second.status_code), (201, 200))
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 4)
+
+    def test_csv_upload(self):
+        content = b'date,type,amount,category_name,description\n2025-03-02,EXPENSE,4.25,Food,Coffee\n2025-03-03,INCOME,10,,Refund\n'
+        upload = SimpleUploadedFile('bank.csv', content, content_type='text/csv')
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['imported'], 2)
+        self.assertTrue(Transaction.objects.filter(description='Coffee', category=self.food).exists())
+
+    def test_ofx_upload(self):
+        content = (
+            b'OFXHEADER:100\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><CURDEF>GBP<BANKTRANLIST>\n'
+            b'<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20250304120000<TRNAMT>-12.50<NAME>Groceries</STMTTRN>\n'
+            b'<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20250305<TRNAMT>100.00<MEMO>Salary</STMTTRN>\n'
+            b'</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>'
+        )
+        upload = SimpleUploadedFile('statement.ofx', content)
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        expense = Transaction.objects.get(description='Groceries')
+        self.assertEqual((expense.type, expense.amount, expense.date), ('EXPENSE', Decimal('12.50'), date(2025, 3, 4)))
+        self.assertEqual(expense.currency, 'GBP')
+        self.assertEqual(Transaction.objects.get(description='Salary').type, 'INCOME')
+
+
+class BudgetBulkUpsertTests(TestCase):
+    url = '/api/budgets/'
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='hank', email='hank@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _sheet(self, count, amount='100.00'):
+        return [{'category_name': f'Category {i}', 'amount': amount, 'month': 6, 'year': 2025} for i in range(count)]
+
+    def test_bulk_create_then_update(self):
+        food = Category.objects.create(user=self.user, name='Food')
+        sheet = self._sheet(3) + [{'category_name': 'FOOD', 'amount': '50.00', 'month': 6, 'year': 2025}]
+        response = self.client.post(self.url, sheet, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data[3], {'amount': '50.00', 'currency': 'USD', 'month': 6, 'year': 2025})
+        self.assertEqual(Category.objects.filter(user=self.user).count(), 4)
+        self.assertEqual(Budget.objects.get(user=self.user, category=food).amount, Decimal('50.00'))
+
+        response = self.client.post(self.url, self._sheet(3, amount='75.00'), format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Budget.objects.filter(user=self.user).count(), 4)
+        self.assertEqual(
+            set(Budget.objects.filter(user=self.user, category__name__startswith='Category').values_list('amount', flat=True)),
+            {Decimal('75.00')},
+        )
+
+    def test_query_count_does_not_grow_with_sheet_size(self):
+        # The first write also starts the user's resource version counters.
+        self.client.post(self.url, [{'category_name': 'Warm up', 'amount': '1.00', 'month': 1, 'year': 2025}], format='json')
+        counts = []
+        for size, prefix in ((5, 'Small'), (40, 'Large')):
+            sheet = [dict(row, category_name=f"{prefix} {row['category_name']}") for row in self._sheet(size)]
+            with CaptureQueriesContext(connection) as queries:
+                self.client.post(self.url, sheet, format='json')
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        # Savepoint pair, category lookup and insert, budget upsert, version
+        # bumps, alert rules.
+        self.assertLessEqual(counts[1], 8)
+
+    def test_single_budget_create(self):
+        response = self.client.post(self.url, {'category_name': 'Rent', 'amount': '900.00', 'month': 1, 'year': 2026}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Budget.objects.get(user=self.user).category.name, 'Rent')
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='ivy', email='ivy@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.food = Category.objects.create(user=self.user, name='Food')
+        self.txn = Transaction.objects.create(user=self.user, category=self.food, amount=Decimal('3.00'), type='EXPENSE', date=date(2025, 6, 1))
+
+    def test_unchanged_list_returns_304_with_one_query(self):
+        first = self.client.get('/api/transactions/')
+        self.assertEqual(first.status_code, 200)
+        with self.assertNumQueries(1):
+            second = self.client.get('/api/transactions/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_if_modified_since(self):
+        first = self.client.get('/api/categories/')
+        response = self.client.get('/api/categories/', HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_writes_change_the_etag(self):
+        etag = self.client.get('/api/transactions/')['ETag']
+        self.client.post('/api/transactions/', {'amount': '1.00', 'type': 'INCOME', 'date': '2025-06-02'})
+        self.assertEqual(self.client.get('/api/transactions/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_category_rename_changes_transaction_etags(self):
+        detail = f'/api/transactions/{self.txn.pk}/'
+        etag = self.client.get(detail)['ETag']
+        self.client.patch(f'/api/categories/{self.food.pk}/', {'name': 'Groceries'}, format='json')
+        response = self.client.get(detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['category_name'], 'Groceries')
+
+    def test_bulk_writes_change_the_etag(self):
+        etag = self.client.get('/api/budgets/')['ETag']
+        self.client.post('/api/budgets/', [{'category_name': 'Food', 'amount': '10.00', 'month': 6, 'year': 2025}], format='json')
+        self.assertEqual(self.client.get('/api/budgets/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_query_string_is_part_of_the_etag(self):
+        etag = self.client.get('/api/transactions/')['ETag']
+        self.assertNotEqual(self.client.get('/api/transactions/', {'type': 'INCOME'})['ETag'], etag)
+
+    def test_other_users_do_not_share_etags(self):
+        etag = self.client.get('/api/transactions/')['ETag']
+        other = CustomUser.objects.create_user(username='jack', email='jack@example.com', password='pw')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get('/api/transactions/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class SQLiteProfileConcurrencyTests(unittest.TestCase):
+    """
+    Parallel writers against a file database using the production SQLite
+    profile. A plain unittest.TestCase, since Django's test cases only allow
+    connections to the test database.
+    """
+    alias = 'sqlite_profile_test'
+    writers = 8
+    writes_per_writer = 40
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        # configure_settings fills in the keys Django defaults for every alias.
+        connections.settings[self.alias] = connections.configure_settings(
+            {'default': sqlite_config(os.path.join(directory.name, 'profile.sqlite3'), timeout=30)}
+        )['default']
+        self.addCleanup(connections.settings.pop, self.alias)
+        self.addCleanup(self._close)
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute('CREATE TABLE ledger (id INTEGER PRIMARY KEY, seq INTEGER NOT NULL UNIQUE)')
+
+    def _close(self):
+        connections[self.alias].close()
+
+    def _writer(self, errors):
+        try:
+            for _ in range(self.writes_per_writer):
+                # Read-then-write: under DEFERRED transactions two writers
+                # deadlock on the lock upgrade and one gets "database is locked".
+                with transaction.atomic(using=self.alias):
+                    with connections[self.alias].cursor() as cursor:
+                        cursor.execute('SELECT COALESCE(MAX(seq), 0) FROM ledger')
+                        (last,) = cursor.fetchone()
+                        cursor.execute('INSERT INTO ledger (seq) VALUES (%s)', [last + 1])
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            self._close()
+
+    def test_parallel_writers_do_not_hit_lock_errors(self):
+        errors = []
+        threads = [threading.Thread(target=self._writer, args=(errors,)) for _ in range(self.writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('SELECT COUNT(*), MAX(seq) FROM ledger')
+            total = self.writers * self.writes_per_writer
+            self.assertEqual(cursor.fetchone(), (total, total))
+
+
+class TransactionSearchTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='lee', email='lee@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.food = Category.objects.create(user=self.user, name='Groceries')
+        self.lunch = Transaction.objects.create(user=self.user, category=self.food, amount=Decimal('8.00'), type='EXPENSE', date=date(2025, 6, 1), description='Lunch at the café')
+        self.market = Transaction.objects.create(user=self.user, category=self.food, amount=Decimal('30.00'), type='EXPENSE', date=date(2025, 6, 2), description='Farmers market market')
+        self.salary = Transaction.objects.create(user=self.user, amount=Decimal('900.00'), type='INCOME', date=date(2025, 6, 3), description='Salary June')
+        other = CustomUser.objects.create_user(username='max', email='max@example.com', password='pw')
+        Transaction.objects.create(user=other, amount=Decimal('1.00'), type='EXPENSE', date=date(2025, 6, 1), description='Lunch')
+
+    def _search(self, term, **params):
+        response = self.client.get('/api/transactions/', dict(params, search=term))
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_prefix_and_multi_term(self):
+        self.assertEqual(self._search('lun'), [self.lunch.pk])
+        self.assertEqual(self._search('cafe'), [self.lunch.pk])
+        self.assertEqual(self._search('groc market'), [self.market.pk])
+        self.assertEqual(self._search('sal june'), [self.salary.pk])
+        self.assertEqual(self._search('lunch salary'), [])
+
+    def test_terms_are_word_prefixes_of_either_field(self):
+        # The semantics both the FTS5 and the tsvector backends implement.
+        self.assertEqual(self._search('gro lunch'), [self.lunch.pk])
+        self.assertEqual(self._search('farm groceries'), [self.market.pk])
+        self.assertEqual(self._search('ocer'), [])
+        self.assertEqual(self._search('unch'), [])
+
+    def test_index_is_scoped_to_the_user(self):
+        self.assertEqual(self._search(str(self.user.pk)), [])
+        if connection.vendor != 'sqlite':
+            return
+        with CaptureQueriesContext(connection) as queries:
+            self._search('lunch')
+        self.assertIn(f'user_id : "{self.user.pk}"', ' '.join(query['sql'] for query in queries))
+
+    def test_matches_category_names_and_follows_renames(self):
+        self.assertEqual(self._search('groceries'), [self.market.pk, self.lunch.pk])
+        self.food.name = 'Food'
+        self.food.save()
+        self.assertEqual(self._search('groceries'), [])
+        self.assertEqual(self._search('food'), [self.market.pk, self.lunch.pk])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.client.patch(f'/api/transactions/{self.salary.pk}/', {'description': 'Bonus'}, format='json')
+        self.assertEqual(self._search('salary'), [])
+        self.assertEqual(self._search('bonus'), [self.salary.pk])
+        self.client.delete(f'/api/transactions/{self.salary.pk}/')
+        self.assertEqual(self._search('bonus'), [])
+
+    def test_bulk_imported_rows_are_searchable(self):
+        self.client.post('/api/transactions/import/', [{'amount': '5.00', 'type': 'EXPENSE', 'date': '2025-06-04', 'description': 'Bookshop'}], format='json')
+        self.assertEqual(len(self._search('book')), 1)
+
+    def test_relevance_ordering(self):
+        self.assertEqual(self._search('market', ordering='relevance'), [self.market.pk])
+        extra = Transaction.objects.create(user=self.user, amount=Decimal('2.00'), type='EXPENSE', date=date(2025, 6, 30), description='Market stall and other long words here')
+        self.assertEqual(self._search('market', ordering='relevance'), [self.market.pk, extra.pk])
+        self.assertEqual(self._search('market'), [extra.pk, self.market.pk])
+
+    def test_query_syntax_in_input_is_literal(self):
+        self.assertEqual(self._search('"lunch" OR NOT*'), [])
+        self.assertEqual(self._search('lunch)('), [self.lunch.pk])
+
+
+class TransactionFilterTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='nia', email='nia@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.rent = Category.objects.create(user=self.user, name='Rent')
+        self.food = Category.objects.create(user=self.user, name='Food')
+        self.fun = Category.objects.create(user=self.user, name='Fun')
+        make = lambda category, amount, kind, day: Transaction.objects.create(
+            user=self.user, category=category, amount=Decimal(amount), type=kind, date=day,
+        )
+        self.may_rent = make(self.rent, '800.00', 'EXPENSE', date(2025, 5, 31))
+        self.june_rent = make(self.rent, '800.00', 'EXPENSE', date(2025, 6, 1))
+        self.groceries = make(self.food, '45.50', 'EXPENSE', date(2025, 6, 10))
+        self.cinema = make(self.fun, '12.00', 'EXPENSE', date(2025, 6, 20))
+        self.salary = make(None, '2000.00', 'INCOME', date(2025, 6, 30))
+        rollups.rebuild(user=self.user)
+        caches['summary'].clear()
+
+    def _ids(self, **params):
+        response = self.client.get('/api/transactions/', params)
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_filters(self):
+        self.assertEqual(self._ids(type='INCOME'), [self.salary.pk])
+        self.assertEqual(len(self._ids(type='bogus')), 5)
+        self.assertEqual(self._ids(date_from='2025-06-01', date_to='2025-06-10'), [self.groceries.pk, self.june_rent.pk])
+        self.assertEqual(self._ids(year=2025, month=5), [self.may_rent.pk])
+        self.assertEqual(self._ids(category=f'{self.food.pk},{self.fun.pk}'), [self.cinema.pk, self.groceries.pk])
+        self.assertEqual(self._ids(amount_min='10', amount_max='50'), [self.cinema.pk, self.groceries.pk])
+        self.assertEqual(
+            self._ids(type='EXPENSE', year=2025, month=6, amount_min='100'),
+            [self.june_rent.pk],
+        )
+
+    def test_invalid_values_are_rejected(self):
+        self.assertEqual(self.client.get('/api/transactions/', {'date_from': 'June'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/transactions/', {'amount_min': 'ten'}).status_code, 400)
+
+    def test_filters_apply_to_export(self):
+        response = self.client.get('/api/transactions/export/', {'format': 'csv', 'category': self.rent.pk})
+        rows = list(csv.DictReader(StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([int(row['id']) for row in rows], [self.june_rent.pk, self.may_rent.pk])
+
+    def test_summary_honors_filters(self):
+        url = reverse('financial-summary')
+        response = self.client.get(url, {'year': 2025, 'month': 6, 'category': f'{self.food.pk},{self.fun.pk}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_expenses'], Decimal('57.50'))
+        self.assertEqual(response.data['total_income'], 0)
+        self.assertEqual(
+            [row['category__name'] for row in response.data['expenses_by_category']], ['Food', 'Fun'],
+        )
+        response = self.client.get(url, {'year': 2025, 'month': 6, 'amount_max': '100'})
+        self.assertEqual(response.data['total_expenses'], Decimal('57.50'))
+        # Without extra filters the summary still comes from the rollups.
+        response = self.client.get(url, {'year': 2025, 'month': 6})
+        self.assertEqual(response.data['total_expenses'], Decimal('857.50'))
+        self.assertEqual(response.data['total_income'], Decimal('2000.00'))
+
+
+class TimeseriesAnalyticsTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='omar', email='omar@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('analytics-timeseries')
+        self.rent = Category.objects.create(user=self.user, name='Rent')
+        self.food = Category.objects.create(user=self.user, name='Food')
+        rows = [
+            (self.rent, '800.00', 'EXPENSE', date(2025, 1, 1)),
+            (self.food, '40.00', 'EXPENSE', date(2025, 1, 6)),
+            (None, '2000.00', 'INCOME', date(2025, 1, 31)),
+            (self.rent, '800.00', 'EXPENSE', date(2025, 3, 1)),
+            (self.food, '60.00', 'EXPENSE', date(2025, 3, 3)),
+            (self.food, '10.00', 'EXPENSE', date(2026, 2, 1)),
+        ]
+        Transaction.objects.bulk_create([
+            Transaction(user=self.user, category=category, amount=Decimal(amount), type=kind, date=day)
+            for category, amount, kind, day in rows
+        ])
+        rollups.rebuild(user=self.user)
+
+    def _get(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_monthly_series_with_rolling_average_in_one_query(self):
+        # One query for the resource version and base currency, one for the aggregation.
+        with self.assertNumQueries(2):
+            data = self._get(date_from='2025-01-01', date_to='2025-04-30', rolling=2)
+        results = data['results']
+        self.assertEqual([point['period'] for point in results], [date(2025, m, 1) for m in (1, 2, 3, 4)])
+        self.assertEqual([point['expenses'] for point in results], [Decimal('840.00'), 0, Decimal('860.00'), 0])
+        self.assertEqual(results[0]['income'], Decimal('2000.00'))
+        self.assertEqual(results[0]['balance'], Decimal('1160.00'))
+        self.assertEqual([point['expenses_avg'] for point in results], [None, Decimal('420.00'), Decimal('430.00'), Decimal('430.00')])
+        self.assertEqual(
+            [(row['category_name'], row['expenses']) for row in results[2]['categories']],
+            [('Rent', Decimal('800.00')), ('Food', Decimal('60.00'))],
+        )
+
+    def test_rollup_and_transaction_paths_agree(self):
+        # Whole months read the rollups; a mid-month end date or an amount filter reads the transactions.
+        whole = self._get(bucket='year', date_from='2025-01-01', date_to='2026-12-31')['results']
+        partial = self._get(bucket='year', date_from='2025-01-01', date_to='2026-12-30')['results']
+        self.assertEqual(whole, partial)
+        self.assertEqual([point['expenses'] for point in whole], [Decimal('1700.00'), Decimal('10.00')])
+        capped = self._get(bucket='year', date_from='2025-01-01', date_to='2026-12-31', amount_max='100')['results']
+        self.assertEqual([point['expenses'] for point in capped], [Decimal('100.00'), Decimal('10.00')])
+
+    def test_week_and_day_buckets(self):
+        weeks = self._get(bucket='week', date_from='2025-01-01', date_to='2025-01-12')['results']
+        # 2025-01-01 is a Wednesday, so the first bucket starts on Monday 2024-12-30.
+        self.assertEqual([point['period'] for point in weeks], [date(2024, 12, 30), date(2025, 1, 6)])
+        self.assertEqual([point['expenses'] for point in weeks], [Decimal('800.00'), Decimal('40.00')])
+        days = self._get(bucket='day', date_from='2025-01-01', date_to='2025-01-31', density='sparse')['results']
+        self.assertEqual([point['period'] for point in days], [date(2025, 1, 1), date(2025, 1, 6), date(2025, 1, 31)])
+
+    def test_filters_and_density(self):
+        data = self._get(date_from='2025-01-01', date_to='2025-12-31', category=self.food.pk, density='sparse')
+        self.assertEqual([(point['period'], point['expenses']) for point in data['results']], [
+            (date(2025, 1, 1), Decimal('40.00')), (date(2025, 3, 1), Decimal('60.00')),
+        ])
+        self.assertEqual(len(self._get(date_from='2025-01-01', date_to='2025-12-31')['results']), 12)
+
+    def test_invalid_ranges_are_rejected(self):
+        self.assertEqual(self.client.get(self.url, {'date_from': '2025-02-01', 'date_to': '2025-01-01'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'bucket': 'day', 'date_from': '2000-01-01', 'date_to': '2025-01-01'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'bucket': 'hour'}).status_code, 400)
+
+    def test_unchanged_series_returns_304(self):
+        first = self.client.get(self.url, {'date_from': '2025-01-01', 'date_to': '2025-12-31'})
+        response = self.client.get(self.url, {'date_from': '2025-01-01', 'date_to': '2025-12-31'}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_default_range_is_revalidated_when_the_month_changes(self):
+        next_month = (date.today().replace(day=1) + timedelta(days=32)).replace(day=1)
+
+        class NextMonth(date):
+            @classmethod
+            def today(cls):
+                return next_month
+
+        first = self.client.get(self.url)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        with mock.patch('core.views.date', NextMonth), mock.patch('core.analytics.date', NextMonth):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['results'][-1]['period'], next_month.isoformat())
+            response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+            self.assertEqual(response.status_code, 200)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='pia', email='pia@example.com', password='pw')
+        self.staff = CustomUser.objects.create_user(username='ops', email='ops@example.com', password='pw', is_staff=True)
+        self.client = APIClient()
+        Transaction.objects.create(user=self.user, amount=Decimal('5.00'), type='EXPENSE', date=date(2025, 6, 1), description='Tea')
+        registry.reset()
+
+    def _scrape(self):
+        self.client.force_authenticate(self.staff)
+        response = self.client.get('/api/_metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        return response.content.decode()
+
+    def test_records_per_route_histograms(self):
+        self.client.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/transactions/')
+        query_count = len(queries)
+        size = len(self.client.get('/api/transactions/').content)
+        text = self._scrape()
+        labels = 'route="transaction-list",method="GET"'
+        self.assertIn(f'budget_requests_total{{{labels},status="200"}} 2', text)
+        self.assertIn(f'budget_request_duration_seconds_count{{{labels}}} 2', text)
+        self.assertIn(f'budget_db_queries_bucket{{{labels},le="+Inf"}} 2', text)
+        self.assertIn(f'budget_db_queries_sum{{{labels}}} {2 * query_count}', text)
+        self.assertIn(f'budget_serializer_duration_seconds_count{{{labels}}} 2', text)
+        self.assertIn(f'budget_response_size_bytes_sum{{{labels}}} {2 * size}', text)
+        self.assertIn('# TYPE budget_db_duration_seconds histogram', text)
+
+    def test_serializer_time_covers_encoding_and_rendering_only(self):
+        Transaction.objects.bulk_create([
+            Transaction(user=self.user, amount=Decimal('1.00'), type='EXPENSE', date=date(2025, 6, day), description='x' * 100)
+            for day in range(1, 21)
+        ])
+        self.client.force_authenticate(self.user)
+        compress = GzipCodec.compress
+
+        def slow_compress(codec, data):
+            time.sleep(0.05)
+            return compress(codec, data)
+
+        with mock.patch.object(GzipCodec, 'compress', slow_compress), mock.patch.object(registry, 'observe') as observe:
+            response = self.client.get('/api/transactions/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        values = observe.call_args.args[3]
+        self.assertGreater(values['serializer_duration_seconds'], 0)
+        self.assertLess(values['serializer_duration_seconds'], 0.05)
+
+        sample = RequestSample()
+        token = current_sample.set(sample)
+        try:
+            FastJSONRenderer().render({'a': 1})
+        finally:
+            current_sample.reset(token)
+        self.assertGreater(sample.serializer_time, 0)
+
+    def test_streamed_responses_are_recorded_when_sent(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get('/api/transactions/export/', {'format': 'ndjson'})
+        body = b''.join(response.streaming_content)
+        self.assertIn(f'budget_response_size_bytes_sum{{route="transaction-export",method="GET"}} {len(body)}', self._scrape())
+
+    def test_endpoint_is_staff_only(self):
+        self.assertEqual(self.client.get('/api/_metrics').status_code, 401)
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get('/api/_metrics').status_code, 403)
+
+    def test_slow_requests_are_logged_with_their_sql(self):
+        self.client.force_authenticate(self.user)
+        with override_settings(METRICS_SLOW_REQUEST_MS=0, METRICS_SLOW_SAMPLE_RATE=1.0):
+            with self.assertLogs('core.metrics', 'WARNING') as logs:
+                self.client.get('/api/transactions/')
+        self.assertIn('Slow request: GET /api/transactions/ -> 200', logs.output[0])
+        self.assertIn('FROM "core_transaction"', logs.output[0])
+        with override_settings(METRICS_SLOW_REQUEST_MS=0, METRICS_SLOW_SAMPLE_RATE=0.0):
+            with self.assertNoLogs('core.metrics', 'WARNING'):
+                self.client.get('/api/transactions/')
+
+
+class BenchmarkCommandTests(TestCase):
+    def test_generate_data(self):
+        call_command('generate_data', users=2, transactions=300, months=3, prefix='synth', stdout=StringIO())
+        users = CustomUser.objects.filter(username__startswith='synth')
+        self.assertEqual(users.count(), 2)
+        user = users.first()
+        self.assertTrue(user.check_password('benchmark'))
+        self.assertEqual(Transaction.objects.filter(user=user).count(), 300)
+        self.assertEqual(Category.objects.filter(user=user).count(), 12)
+        self.assertEqual(Budget.objects.filter(user=user).count(), 30)
+        self.assertEqual(
+            MonthlyRollup.objects.filter(user=user).aggregate(total=Sum('total'))['total'],
+            Transaction.objects.filter(user=user).aggregate(total=Sum('amount'))['total'],
+        )
+        with self.assertRaises(CommandError):
+            call_command('generate_data', users=1, prefix='synth', stdout=StringIO())
+
+    def test_benchmark_saves_and_compares_baselines(self):
+        call_command('generate_data', users=1, transactions=50, months=2, stdout=StringIO())
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'baseline.json')
+            out = StringIO()
+            call_command(
+                'benchmark', scenario=['transactions', 'summary'], iterations=3, warmup=0, output=path, stdout=out,
+            )
+            self.assertIn('transactions', out.getvalue())
+            with open(path) as handle:
+                baseline = json.load(handle)
+            result = baseline['results']['transactions']
+            self.assertEqual(result['requests'], 3)
+            self.assertEqual(result['errors'], 0)
+            self.assertGreater(result['queries'], 0)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+            # A baseline that was much faster and used fewer queries flags both.
+            result['p95_ms'] = result['p95_ms'] / 100
+            result['queries'] -= 1
+            with open(path, 'w') as handle:
+                json.dump(baseline, handle)
+            with self.assertRaisesMessage(CommandError, 'transactions: queries'):
+                call_command('benchmark', scenario=['transactions'], iterations=3, warmup=0, compare=path, stdout=StringIO())
+
+    def test_benchmark_stops_when_rate_limited(self):
+        responses = iter([(200, b'{"access": "token"}', None), (200, b'[]', None), (429, b'', None)])
+        with mock.patch('core.management.commands.benchmark.HTTPDriver.request', side_effect=lambda *args: next(responses)):
+            with self.assertRaisesMessage(CommandError, 'THROTTLE_ENABLED=False'):
+                call_command(
+                    'benchmark', base_url='http://127.0.0.1:8000', scenario=['categories'], iterations=3, warmup=0,
+                    stdout=StringIO(),
+                )
+
+
+class ValuesFastPathTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='quinn', email='quinn@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        food = Category.objects.create(user=self.user, name='Café "Ünïcode"  ')
+        Transaction.objects.create(user=self.user, category=food, amount=Decimal('1234.50'), type='EXPENSE', date=date(2025, 6, 1), description='Tab\there\x01 ✓ 🍕')
+        Transaction.objects.create(user=self.user, amount=Decimal('0.10'), type='INCOME', date=date(2025, 6, 2), description='')
+        Budget.objects.create(user=self.user, category=food, amount=Decimal('99.00'), year=2025, month=6)
+
+    def _expected(self, serializer_class, queryset, paginated=True):
+        data = serializer_class(queryset, many=True).data
+        if paginated:
+            data = {'count': len(data), 'next': None, 'previous': None, 'results': data}
+        return JSONRenderer().render(data)
+
+    def test_list_and_detail_match_the_serializers_byte_for_byte(self):
+        transactions = Transaction.objects.filter(user=self.user).select_related('category')
+        self.assertEqual(self.client.get('/api/transactions/').content, self._expected(TransactionSerializer, transactions))
+        self.assertEqual(
+            self.client.get('/api/budgets/').content,
+            self._expected(BudgetSerializer, Budget.objects.filter(user=self.user)),
+        )
+        for txn in transactions:
+            response = self.client.get(f'/api/transactions/{txn.pk}/')
+            self.assertEqual(response.content, JSONRenderer().render(TransactionSerializer(txn).data))
+        self.assertNotIn('category_name', self.client.get('/api/transactions/', {'type': 'INCOME'}).data['results'][0])
+
+    def test_detail_lookups_stay_scoped_to_the_user(self):
+        other = CustomUser.objects.create_user(username='rae', email='rae@example.com', password='pw')
+        foreign = Transaction.objects.create(user=other, amount=Decimal('1.00'), type='EXPENSE', date=date(2025, 6, 1))
+        self.assertEqual(self.client.get(f'/api/transactions/{foreign.pk}/').status_code, 404)
+        self.assertEqual(self.client.get('/api/transactions/abc/').status_code, 404)
+
+    def test_renderer_matches_json_renderer(self):
+        payload = {
+            'decimal': Decimal('12.30'),
+            'when': datetime(2025, 6, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+            'day': date(2025, 6, 1),
+            'rows': {0: ['error'], 12: 'x'},
+            'text': 'quote " backslash \\ \x00 \x1f \u2028 \u2029 ✓',
+            'nested': [1, 2.5, None, True, {'a': []}],
+            'huge': 2 ** 70,
+        }
+        self.assertEqual(FastJSONRenderer().render(payload), JSONRenderer().render(payload))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+
+class AsyncReadViewTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='sam', email='sam@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.auth = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        food = Category.objects.create(user=self.user, name='Food')
+        Category.objects.create(user=self.user, name='Travel')
+        for day in range(1, 26):
+            Transaction.objects.create(
+                user=self.user, category=food if day % 2 else None, amount=Decimal(f'{day}.25'),
+                type='EXPENSE' if day % 3 else 'INCOME', date=date(2025, 6, day), description=f'Lunch {day}',
+            )
+        Budget.objects.create(user=self.user, category=food, amount=Decimal('100.00'), year=2025, month=6)
+        caches['summary'].clear()
+        registry.reset()
+
+    def _get(self, path, params=None, headers=None):
+        # AsyncClient only sends headers given per request.
+        return self.async_client.get(path, params, headers={**self.auth, **(headers or {})})
+
+    async def _assert_same_as_sync(self, path, params):
+        expected = await sync_to_async(self.client.get)(path, params)
+        response = await self._get(path.replace('/api/', '/api/async/'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content.replace(b'/api/async/', b'/api/'), expected.content)
+        return response
+
+    async def test_responses_match_the_sync_endpoints(self):
+        await self._assert_same_as_sync('/api/transactions/', {})
+        await self._assert_same_as_sync('/api/transactions/', {'page': 2})
+        await self._assert_same_as_sync('/api/transactions/', {'type': 'EXPENSE', 'search': 'lunch', 'amount_min': '5'})
+        first = await self._assert_same_as_sync('/api/transactions/', {'pagination': 'cursor'})
+        cursor = json.loads(first.content)['next'].split('cursor=')[1].split('&')[0]
+        await self._assert_same_as_sync('/api/transactions/', {'cursor': cursor})
+        await self._assert_same_as_sync('/api/categories/', {})
+        await self._assert_same_as_sync('/api/summary/', {'year': 2025, 'month': 6})
+        await self._assert_same_as_sync('/api/summary/', {'year': 2025, 'month': 6, 'type': 'EXPENSE'})
+
+    async def test_conditional_get(self):
+        for path in ('/api/async/transactions/', '/api/async/categories/', '/api/async/summary/?year=2025&month=6'):
+            first = await self._get(path)
+            second = await self._get(path, headers={'If-None-Match': first['ETag']})
+            self.assertEqual(second.status_code, 304, path)
+            self.assertEqual(second['ETag'], first['ETag'])
+
+    async def test_requires_authentication(self):
+        response = await AsyncClient().get('/api/async/transactions/')
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('Bearer', response['WWW-Authenticate'])
+        response = await AsyncClient().get('/api/async/summary/', headers={'Authorization': 'Bearer nonsense'})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual((await self.async_client.post('/api/async/transactions/', headers=self.auth)).status_code, 405)
+
+    async def test_invalid_filters_and_pages(self):
+        response = await self._get('/api/async/transactions/', {'amount_min': 'lots'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('amount_min', json.loads(response.content))
+        for params in ({'year': 2025, 'month': 13}, {'year': 2025, 'month': 0, 'type': 'EXPENSE'}, {'year': 'x'}):
+            expected = await sync_to_async(self.client.get)('/api/summary/', params)
+            response = await self._get('/api/async/summary/', params)
+            self.assertEqual((expected.status_code, response.status_code), (400, 400), params)
+            self.assertEqual(json.loads(response.content), expected.json())
+        self.assertEqual((await self._get('/api/async/transactions/', {'page': 9})).status_code, 404)
+
+    async def test_queries_are_recorded_in_metrics(self):
+        await self._get('/api/async/transactions/')
+        text = registry.render()
+        self.assertIn('budget_requests_total{route="async-transaction-list",method="GET",status="200"} 1', text)
+        self.assertNotIn('budget_db_queries_sum{route="async-transaction-list",method="GET"} 0', text)
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='tess', email='tess@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        Transaction.objects.bulk_create(
+            Transaction(user=self.user, amount=Decimal('12.50'), type='EXPENSE', date=date(2025, 6, day % 28 + 1), description=f'Groceries {day}')
+            for day in range(60)
+        )
+
+    def test_negotiation(self):
+        self.assertEqual(negotiate_encoding('gzip, deflate, br', ['br', 'gzip']), 'br')
+        self.assertEqual(negotiate_encoding('br;q=0.5, gzip', ['br', 'gzip']), 'gzip')
+        self.assertEqual(negotiate_encoding('br;q=0, *', ['br', 'gzip']), 'gzip')
+        self.assertIsNone(negotiate_encoding('identity', ['br', 'gzip']))
+        self.assertIsNone(negotiate_encoding('', ['br', 'gzip']))
+
+    def test_gzip_and_brotli_round_trip(self):
+        plain = self.client.get('/api/transactions/')
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+        for encoding, decompress in (('gzip', gzip.decompress), ('br', brotli.decompress)):
+            response = self.client.get('/api/transactions/', HTTP_ACCEPT_ENCODING=f'{encoding}, identity')
+            self.assertEqual(response['Content-Encoding'], encoding)
+            self.assertEqual(int(response['Content-Length']), len(response.content))
+            self.assertLess(len(response.content), len(plain.content))
+            self.assertEqual(decompress(response.content), plain.content)
+            self.assertEqual(response['ETag'], 'W/' + plain['ETag'])
+
+    def test_weak_etag_still_matches(self):
+        etag = self.client.get('/api/transactions/', HTTP_ACCEPT_ENCODING='gzip')['ETag']
+        response = self.client.get('/api/transactions/', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertNotIn('Content-Encoding', response)
+
+    def test_small_bodies_are_sent_as_is(self):
+        response = self.client.get('/api/categories/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+
+    def test_streamed_exports_are_compressed_per_chunk(self):
+        plain = b''.join(self.client.get('/api/transactions/export/', {'format': 'csv'}).streaming_content)
+        with mock.patch('core.exports.CHUNK_SIZE', 25):
+            response = self.client.get('/api/transactions/export/', {'format': 'csv'}, HTTP_ACCEPT_ENCODING='gzip')
+            chunks = list(response.streaming_content)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        # One flushed block per batch of rows, plus the gzip trailer.
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(gzip.decompress(b''.join(chunks)), plain)
+
+
+class RecurringTransactionTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='uma', email='uma@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.rent = Category.objects.create(user=self.user, name='Rent')
+        caches['summary'].clear()
+
+    def _rule(self, user=None, **fields):
+        data = {'amount': Decimal('900.00'), 'type': 'EXPENSE', 'frequency': 'MONTHLY', 'start_date': date(2025, 1, 31)}
+        data.update(fields)
+        rule = RecurringTransaction(user=user or self.user, **data)
+        recurring.schedule(rule)
+        rule.save()
+        return rule
+
+    def _rollups(self):
+        fields = ('user_id', 'category_id', 'type', 'year', 'month', 'total', 'count')
+        return list(MonthlyRollup.objects.order_by(*fields[:5]).values_list(*fields))
+
+    def _dates(self, rule, count):
+        return [recurring.occurrence_date(rule, index) for index in range(count)]
+
+    @override_settings(RECURRING_REQUEST_LIMIT=10)
+    def test_requests_write_a_bounded_number_of_occurrences(self):
+        start = date.today() - timedelta(days=29)
+        response = self.client.post('/api/recurring/', {
+            'amount': '1.00', 'type': 'EXPENSE', 'frequency': 'DAILY', 'start_date': start.isoformat(),
+        })
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 10)
+        self.assertEqual(response.data['next_date'], (start + timedelta(days=10)).isoformat())
+        job = Job.objects.get(user=self.user)
+        self.assertEqual(job.kind, jobs.MATERIALIZE_RECURRING)
+        jobs.run(jobs.claim())
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 30)
+        # Within the limit, nothing is queued.
+        self.client.post('/api/recurring/', {
+            'amount': '1.00', 'type': 'EXPENSE', 'frequency': 'WEEKLY', 'start_date': start.isoformat(),
+        })
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_schedules(self):
+        monthly = self._rule()
+        self.assertEqual(self._dates(monthly, 4), [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31), date(2025, 4, 30)])
+        fortnightly = self._rule(frequency='WEEKLY', interval=2, start_date=date(2025, 6, 2))
+        self.assertEqual(self._dates(fortnightly, 3), [date(2025, 6, 2), date(2025, 6, 16), date(2025, 6, 30)])
+        leap = self._rule(frequency='YEARLY', start_date=date(2024, 2, 29))
+        self.assertEqual(self._dates(leap, 2), [date(2024, 2, 29), date(2025, 2, 28)])
+        # A day_of_month before the start date's day begins the following month.
+        payday = self._rule(day_of_month=1, start_date=date(2025, 1, 15))
+        self.assertEqual((payday.next_index, payday.next_date), (1, date(2025, 2, 1)))
+
+        self.assertEqual(recurring.materialize(date(2025, 12, 31), RecurringTransaction.objects.filter(pk=monthly.pk)), (1, 12))
+        limited = self._rule(count=3)
+        ending = self._rule(end_date=date(2025, 2, 28))
+        recurring.materialize(date(2025, 12, 31), RecurringTransaction.objects.filter(pk__in=[limited.pk, ending.pk]))
+        self.assertEqual(Transaction.objects.filter(occurrence_key__startswith=f'{limited.pk}:').count(), 3)
+        self.assertEqual(Transaction.objects.filter(occurrence_key__startswith=f'{ending.pk}:').count(), 2)
+        limited.refresh_from_db()
+        self.assertIsNone(limited.next_date)
+
+    def test_materialize_is_batched_idempotent_and_updates_rollups(self):
+        users = [self.user] + [
+            CustomUser.objects.create_user(username=f'user{n}', email=f'user{n}@example.com', password='pw') for n in range(3)
+        ]
+        for user in users:
+            self._rule(user=user, start_date=date(2025, 1, 1))
+            self._rule(user=user, type='INCOME', amount=Decimal('2500.00'), start_date=date(2025, 1, 25))
+        summary = self.client.get('/api/summary/', {'year': 2025, 'month': 3}).data
+        self.assertEqual(summary['total_expenses'], 0)
+
+        self.assertEqual(recurring.materialize(date(2025, 3, 31), rule_batch_size=3), (8, 24))
+        self.assertEqual(recurring.materialize(date(2025, 3, 31)), (0, 0))
+        self.assertEqual(Transaction.objects.count(), 24)
+        summary = self.client.get('/api/summary/', {'year': 2025, 'month': 3}).data
+        self.assertEqual((summary['total_expenses'], summary['total_income']), (900.0, 2500.0))
+
+        # Occurrences already written (say, by a run that crashed before
+        # saving its rules) are not written twice.
+        RecurringTransaction.objects.update(next_index=0, next_date=date(2025, 1, 1))
+        RecurringTransaction.objects.filter(type='INCOME').update(next_date=date(2025, 1, 25))
+        self.assertEqual(recurring.materialize(date(2025, 4, 30)), (8, 8))
+        self.assertEqual(Transaction.objects.count(), 32)
+
+        snapshot = self._rollups()
+        rollups.rebuild()
+        self.assertEqual(snapshot, self._rollups())
+
+    def test_bulk_rollup_path_matches_rebuild(self):
+        categories = [Category.objects.create(user=self.user, name=f'Bill {n}') for n in range(rollups.BULK_MIN_BUCKETS)]
+        Transaction.objects.create(user=self.user, category=categories[0], amount=Decimal('1.00'), type='EXPENSE', date=date(2025, 1, 1))
+        rollups.rebuild(self.user)
+        for category in categories + [None]:
+            self._rule(category=category, amount=Decimal('10.00'), start_date=date(2025, 1, 1))
+        recurring.materialize(date(2025, 2, 1))
+        objs = list(Transaction.objects.filter(date=date(2025, 2, 1)))
+        rollups.discard(objs)
+        Transaction.objects.filter(pk__in=[obj.pk for obj in objs]).delete()
+        snapshot = self._rollups()
+        self.assertEqual(len(snapshot), len(categories) + 1)
+        rollups.rebuild(self.user)
+        self.assertEqual(snapshot, self._rollups())
+
+    def test_api_materializes_due_occurrences_and_resumes_after_edits(self):
+        today = date.today()
+        start = date(today.year - 1, today.month, 1)
+        response = self.client.post('/api/recurring/', {
+            'amount': '900.00', 'type': 'EXPENSE', 'frequency': 'MONTHLY', 'start_date': start.isoformat(),
+            'category': self.rent.pk, 'description': 'Rent',
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Transaction.objects.filter(user=self.user, description='Rent').count(), 13)
+        self.assertGreater(date.fromisoformat(response.data['next_date']), today)
+
+        response = self.client.patch(f'/api/recurring/{response.data["id"]}/', {'amount': '950.00', 'day_of_month': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Transaction.objects.filter(user=self.user, description='Rent').count(), 13)
+        self.assertEqual(Transaction.objects.filter(user=self.user, amount=Decimal('950.00')).count(), 0)
+
+        other = CustomUser.objects.create_user(username='vic', email='vic@example.com', password='pw')
+        foreign = Category.objects.create(user=other, name='Theirs')
+        response = self.client.post('/api/recurring/', {
+            'amount': '1.00', 'type': 'EXPENSE', 'frequency': 'DAILY', 'start_date': '2025-01-01', 'category': foreign.pk,
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('category', response.data)
+
+    def test_command(self):
+        self._rule(start_date=date(2025, 1, 1))
+        out = StringIO()
+        call_command('materialize_recurring', date='2025-03-01', stdout=out)
+        self.assertIn('Materialized 3 transactions from 1 recurring transactions', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('materialize_recurring', date='March', stdout=StringIO())
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class SyncTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='sam', email='sam@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.food = Category.objects.create(user=self.user, name='Food')
+        self.rent = Category.objects.create(user=self.user, name='Rent')
+        self.lunch = Transaction.objects.create(
+            user=self.user, category=self.food, amount=Decimal('12.50'), type='EXPENSE', date=date(2025, 3, 4),
+        )
+        self.salary = Transaction.objects.create(user=self.user, amount=Decimal('3000'), type='INCOME', date=date(2025, 3, 1))
+        self.budget = Budget.objects.create(user=self.user, category=self.food, amount=Decimal('300'), month=3, year=2025)
+        other = CustomUser.objects.create_user(username='oli', email='oli@example.com', password='pw')
+        Category.objects.create(user=other, name='Food')
+
+    def _sync(self, since=None, **params):
+        if since is not None:
+            params['since'] = since
+        response = self.client.get(reverse('sync'), params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def _ids(self, data, key):
+        return [row['id'] for row in data[key]]
+
+    def test_full_then_incremental(self):
+        data = self._sync()
+        self.assertFalse(data['has_more'])
+        self.assertEqual(self._ids(data, 'categories'), [self.food.pk, self.rent.pk])
+        self.assertEqual(self._ids(data, 'transactions'), [self.lunch.pk, self.salary.pk])
+        self.assertEqual(data['transactions'][0], TransactionSerializer(self.lunch).data)
+        self.assertEqual(data['budgets'], [BudgetSerializer(self.budget).data])
+        self.assertEqual(data['deleted'], {'categories': [], 'transactions': [], 'budgets': []})
+
+        empty = self._sync(data['token'])
+        self.assertEqual(empty['categories'] + empty['transactions'] + empty['budgets'], [])
+
+        self.salary.amount = Decimal('3100')
+        self.salary.save()
+        lunch_id = self.lunch.pk
+        self.lunch.delete()
+        # The bulk budget upsert updates existing rows in place.
+        response = self.client.post(
+            reverse('budget-list'), [{'category_name': 'Food', 'amount': '350', 'month': 3, 'year': 2025}], format='json',
+        )
+        self.assertEqual(response.status_code, 201)
+        changed = self._sync(empty['token'])
+        self.assertEqual(changed['transactions'], [TransactionSerializer(self.salary).data])
+        self.assertEqual([row['amount'] for row in changed['budgets']], ['350.00'])
+        self.assertEqual(changed['deleted']['transactions'], [lunch_id])
+        self.assertEqual(changed['categories'], [])
+        self.assertEqual(self._sync(changed['token'])['deleted']['transactions'], [])
+
+    def test_batches_cover_every_change_once(self):
+        Transaction.objects.bulk_create([
+            Transaction(user=self.user, amount=Decimal(day), type='EXPENSE', date=date(2025, 3, day)) for day in range(1, 11)
+        ])
+        seen, token, batches = [], None, 0
+        while True:
+            data = self._sync(token, limit=3)
+            batches += 1
+            self.assertLessEqual(sum(len(data[key]) for key in ('categories', 'transactions', 'budgets')), 3)
+            seen += [(key, row['id']) for key in ('categories', 'transactions', 'budgets') for row in data[key]]
+            token = data['token']
+            if not data['has_more']:
+                break
+        self.assertEqual(batches, 5)
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(len(seen), 2 + 12 + 1)
+        # One range query per resource, plus one for tombstones.
+        with self.assertNumQueries(4):
+            sync.changes(self.user, token)
+
+    def test_deleting_a_category(self):
+        token = self._sync()['token']
+        self.client.delete(reverse('category-detail', args=[self.food.pk]))
+        data = self._sync(token)
+        self.assertEqual(data['deleted'], {'categories': [self.food.pk], 'transactions': [], 'budgets': [self.budget.pk]})
+        # SET_NULL moved the lunch out of the category.
+        self.assertEqual(self._ids(data, 'transactions'), [self.lunch.pk])
+        self.assertIsNone(data['transactions'][0]['category'])
+
+    def test_recent_changes_wait_to_settle(self):
+        with override_settings(SYNC_SETTLE_SECONDS=60):
+            data = self._sync()
+            self.assertEqual(data['transactions'], [])
+            later = sync.changes(self.user, data['token'], now=timezone.now() + timedelta(minutes=2))
+        self.assertEqual(self._ids(later, 'transactions'), [self.lunch.pk, self.salary.pk])
+
+    def test_long_writes_are_stamped_at_commit(self):
+        # Rows carry the time the import commits, not the time it started.
+        token = self._sync()['token']
+        committing = timezone.now() + timedelta(minutes=1)
+        with mock.patch('core.versions.timezone.now', return_value=committing):
+            self.client.post('/api/transactions/import/', [
+                {'amount': '5.00', 'type': 'EXPENSE', 'date': '2025-03-05', 'category_name': 'Books'},
+            ], format='json')
+        imported = Transaction.objects.get(category__name='Books')
+        self.assertEqual((imported.updated_at, imported.category.updated_at), (committing, committing))
+        data = sync.changes(self.user, token, now=committing)
+        self.assertEqual(self._ids(data, 'transactions'), [imported.pk])
+        self.assertEqual(self._ids(data, 'categories'), [imported.category_id])
+
+    def test_invalid_and_expired_tokens(self):
+        self.assertEqual(self.client.get(reverse('sync'), {'since': 'nope'}).status_code, 400)
+        old = timezone.now() - timedelta(days=365)
+        response = self.client.get(reverse('sync'), {'since': sync.encode_token((old, sync.END_RANK, 0), old)})
+        self.assertEqual(response.status_code, 410)
+
+    def test_prune_and_user_deletion(self):
+        self.lunch.delete()
+        Tombstone.objects.update(deleted_at=timezone.now() - timedelta(days=365))
+        salary_id = self.salary.pk
+        self.salary.delete()
+        out = StringIO()
+        call_command('prune_tombstones', stdout=out)
+        self.assertIn('Pruned 1 tombstones', out.getvalue())
+        self.assertEqual(list(Tombstone.objects.values_list('object_id', flat=True)), [salary_id])
+
+        self.user.delete()
+        self.assertFalse(Tombstone.objects.exists())
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='jo', email='jo@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.files = tempfile.TemporaryDirectory()
+        self.addCleanup(self.files.cleanup)
+        settings_override = override_settings(JOB_FILES_ROOT=self.files.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        caches['summary'].clear()
+
+    def _work(self):
+        return jobs.work(threading.Event(), burst=True)
+
+    def test_async_import(self):
+        rows = [{'amount': '12.50', 'type': 'EXPENSE', 'date': '2025-03-04', 'category_name': 'Food'}]
+        response = self.client.post(
+            reverse('transaction-bulk-import'), rows, format='json', headers={'Prefer': 'respond-async'},
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response['Location'], reverse('job-detail', args=[response.data['id']]))
+        self.assertEqual(response.data['status'], Job.PENDING)
+        self.assertFalse(Transaction.objects.exists())
+
+        self.assertEqual(self._work(), 1)
+        job = self.client.get(response['Location']).data
+        self.assertEqual((job['status'], job['attempts']), (Job.SUCCEEDED, 1))
+        self.assertEqual(job['result'], {'imported': 1, 'categories_created': ['Food']})
+        self.assertEqual(Transaction.objects.get().category.name, 'Food')
+        summary = self.client.get(reverse('financial-summary'), {'year': 2025, 'month': 3}).data
+        self.assertEqual(summary['total_expenses'], 12.5)
+
+    def test_invalid_rows_fail_without_retry(self):
+        job = jobs.enqueue(jobs.IMPORT, self.user, {'rows': [{'amount': 'x', 'type': 'EXPENSE', 'date': '2025-03-04'}]})
+        self._work()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 1))
+        self.assertIn('amount', job.result['rows']['0'])
+
+    def test_retries_with_backoff(self):
+        job = jobs.enqueue(jobs.REBUILD_ROLLUPS, self.user)
+        failing = mock.patch.object(rollups, 'rebuild', side_effect=RuntimeError('boom'))
+        with override_settings(JOB_RETRY_DELAY=60), failing, self.assertLogs('core.jobs', 'ERROR'):
+            self.assertEqual(self._work(), 1)
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), (Job.PENDING, 1))
+            self.assertIn('boom', job.error)
+            self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=50))
+            # Not due yet; then due, twice more, until max_attempts.
+            self.assertEqual(self._work(), 0)
+            for attempt in (2, 3):
+                Job.objects.update(run_at=timezone.now())
+                self._work()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 3))
+        Job.objects.update(run_at=timezone.now())
+        self.assertEqual(self._work(), 0)
+
+    def test_claims_are_exclusive_and_leases_expire(self):
+        job = jobs.enqueue(jobs.REBUILD_ROLLUPS, self.user)
+        first = jobs.claim()
+        self.assertEqual((first.pk, first.attempts), (job.pk, 1))
+        self.assertIsNone(jobs.claim())
+        # A worker that died mid-job: its lease runs out and the job is taken over.
+        later = timezone.now() + timedelta(seconds=settings.JOB_TIMEOUT + 1)
+        taken_over = jobs.claim(now=later)
+        self.assertEqual((taken_over.pk, taken_over.attempts), (job.pk, 2))
+        # The first attempt's outcome is ignored once it has been taken over.
+        jobs.run(first)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.RUNNING, 2))
+        jobs.run(taken_over)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+
+    def test_export_and_download(self):
+        food = Category.objects.create(user=self.user, name='Food')
+        Transaction.objects.create(user=self.user, category=food, amount=Decimal('4.20'), type='EXPENSE',
+                                   date=date(2025, 3, 2), description='Coffee beans')
+        Transaction.objects.create(user=self.user, amount=Decimal('100'), type='INCOME', date=date(2025, 3, 1))
+        response = self.client.post(reverse('job-list'), {
+            'kind': jobs.EXPORT, 'params': {'format': 'ndjson', 'filters': {'type': 'EXPENSE', 'search': 'coffee'}},
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        download = reverse('job-download', args=[response.data['id']])
+        self.assertEqual(self.client.get(download).status_code, 404)
+
+        self._work()
+        response = self.client.get(download)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['description'] for row in rows], ['Coffee beans'])
+
+        other = APIClient()
+        other.force_authenticate(CustomUser.objects.create_user(username='ed', email='ed@example.com', password='pw'))
+        self.assertEqual(other.get(download).status_code, 404)
+        self.assertEqual(other.get(reverse('job-list')).data['results'], [])
+
+    def test_unknown_kind(self):
+        response = self.client.post(reverse('job-list'), {'kind': 'rm -rf', 'params': {}}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_commands(self):
+        call_command('materialize_recurring', '--enqueue', stdout=StringIO())
+        call_command('rebuild_rollups', '--enqueue', stdout=StringIO())
+        self.assertEqual(list(Job.objects.order_by('id').values_list('kind', 'user')), [
+            (jobs.MATERIALIZE_RECURRING, None), (jobs.REBUILD_ROLLUPS, None),
+        ])
+        out = StringIO()
+        call_command('runworkers', '--workers', '0', '--burst', stdout=out)
+        self.assertIn('Ran 2 jobs', out.getvalue())
+        self.assertEqual(set(Job.objects.values_list('status', flat=True)), {Job.SUCCEEDED})
+
+
+def throttle_rates(**rates):
+    return override_settings(REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], **rates},
+    })
+
+
+class ThrottlingTests(TestCase):
+    def setUp(self):
+        throttling.store.clear()
+        self.user = CustomUser.objects.create_user(username='rae', email='rae@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        throttling.store.clear()
+
+    def test_bucket_allows_a_burst_then_refills(self):
+        store = throttling.TokenBucketStore(maxsize=2)
+        self.assertEqual([store.take('a', 3, 1.0, now=0) for _ in range(3)], [0, 0, 0])
+        self.assertEqual(store.take('a', 3, 1.0, now=0), 1.0)
+        self.assertEqual(store.take('a', 3, 1.0, now=0.5), 0.5)
+        self.assertEqual(store.take('a', 3, 1.0, now=1.5), 0)
+        # The least recently used bucket is evicted, and starts over full.
+        store.take('b', 1, 1.0, now=1.5)
+        store.take('c', 1, 1.0, now=1.5)
+        self.assertEqual(store.take('a', 3, 1.0, now=1.5), 0)
+
+    @throttle_rates(auth_ip='3/min')
+    def test_login_is_limited_per_address(self):
+        client = APIClient()
+        for n in range(3):
+            response = client.post('/api/token/', {'email': f'guess{n}@example.com', 'password': 'x'})
+            self.assertEqual(response.status_code, 401)
+        response = client.post('/api/token/', {'email': 'rae@example.com', 'password': 'pw'})
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        # A forged X-Forwarded-For does not get a fresh bucket...
+        response = client.post(
+            '/api/token/', {'email': 'rae@example.com', 'password': 'pw'}, HTTP_X_FORWARDED_FOR='203.0.113.7',
+        )
+        self.assertEqual(response.status_code, 429)
+        # ...but another address has its own.
+        response = client.post('/api/token/', {'email': 'rae@example.com', 'password': 'pw'}, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, 200)
+
+    @throttle_rates(auth_user='2/min')
+    def test_login_is_limited_per_account_across_addresses(self):
+        client = APIClient()
+        for n in range(2):
+            response = client.post('/api/token/', {'email': 'Rae@example.com', 'password': 'x'}, REMOTE_ADDR=f'10.0.0.{n}')
+            self.assertEqual(response.status_code, 401)
+        response = client.post('/api/token/', {'email': 'rae@example.com', 'password': 'pw'}, REMOTE_ADDR='10.0.0.9')
+        self.assertEqual(response.status_code, 429)
+        response = client.post('/api/token/', {'email': 'other@example.com', 'password': 'x'}, REMOTE_ADDR='10.0.0.9')
+        self.assertEqual(response.status_code, 401)
+
+    @throttle_rates(auth_ip='1/min')
+    def test_registration_and_refresh_are_limited(self):
+        client = APIClient()
+        payload = {'username': 'new', 'email': 'new@example.com', 'password': 'a-Long-pass-123', 'password2': 'a-Long-pass-123'}
+        client.post('/api/user/register/', payload)
+        self.assertEqual(client.post('/api/user/register/', payload).status_code, 429)
+        client.post('/api/token/refresh/', {'refresh': 'x'}, REMOTE_ADDR='10.0.0.3')
+        self.assertEqual(client.post('/api/token/refresh/', {'refresh': 'x'}, REMOTE_ADDR='10.0.0.3').status_code, 429)
+
+    @throttle_rates(read_user='2/min', write_user='1/min')
+    def test_reads_and_writes_are_limited_separately(self):
+        for _ in range(2):
+            self.assertEqual(self.client.get('/api/categories/').status_code, 200)
+        self.assertEqual(self.client.get('/api/summary/').status_code, 429)
+        self.assertEqual(self.client.post('/api/categories/', {'name': 'Rent'}).status_code, 201)
+        self.assertEqual(self.client.post('/api/categories/', {'name': 'Fuel'}).status_code, 429)
+        # Another user on the same address is not affected.
+        other = CustomUser.objects.create_user(username='lee', email='lee@example.com', password='pw')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get('/api/categories/').status_code, 200)
+
+    @throttle_rates(read_ip='1/min')
+    def test_every_request_is_limited_per_address(self):
+        self.assertEqual(self.client.get('/api/categories/').status_code, 200)
+        self.assertEqual(self.client.get('/api/categories/').status_code, 429)
+        self.assertEqual(self.client.get('/api/categories/', REMOTE_ADDR='10.0.0.4').status_code, 200)
+
+    @throttle_rates(read_user='1/min')
+    def test_disabled(self):
+        with override_settings(THROTTLE_ENABLED=False):
+            for _ in range(3):
+                self.assertEqual(self.client.get('/api/categories/').status_code, 200)
+
+    @throttle_rates(read_user='1/min')
+    async def test_async_views_are_limited(self):
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        response = await self.async_client.get('/api/async/categories/', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        response = await self.async_client.get('/api/async/transactions/', headers=headers)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+
+@override_settings(ADMISSION_MAX_CONCURRENCY=1, ADMISSION_MAX_QUEUE_MS=0, ADMISSION_RETRY_AFTER=2)
+class AdmissionControlTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.nested = []
+
+        def get_response(request):
+            # A second request arriving while this one is in progress.
+            if request.path == '/api/outer/':
+                self.nested.append(self.middleware(self.factory.get('/api/inner/')))
+                self.nested.append(self.middleware(self.factory.get('/admin/')))
+            return HttpResponse('ok')
+
+        self.middleware = AdmissionControlMiddleware(get_response)
+
+    def test_sheds_requests_beyond_the_concurrency_limit(self):
+        self.assertEqual(self.middleware(self.factory.get('/api/outer/')).status_code, 200)
+        inner, admin = self.nested
+        self.assertEqual(inner.status_code, 429)
+        self.assertEqual(inner['Retry-After'], '2')
+        # Only API requests are counted.
+        self.assertEqual(admin.status_code, 200)
+        self.assertEqual(self.middleware.in_flight, 0)
+        self.assertEqual(self.middleware(self.factory.get('/api/inner/')).status_code, 200)
+
+    def test_releases_the_slot_when_the_view_raises(self):
+        middleware = AdmissionControlMiddleware(mock.Mock(side_effect=RuntimeError))
+        with self.assertRaises(RuntimeError):
+            middleware(self.factory.get('/api/categories/'))
+        self.assertEqual(middleware.in_flight, 0)
+
+    def test_streamed_responses_hold_the_slot_until_closed(self):
+        middleware = AdmissionControlMiddleware(lambda request: StreamingHttpResponse(iter([b'a', b'b'])))
+        response = middleware(self.factory.get('/api/transactions/export/'))
+        self.assertEqual(next(iter(response)), b'a')
+        self.assertEqual(middleware(self.factory.get('/api/inner/')).status_code, 429)
+        response.close()
+        self.assertEqual(middleware.in_flight, 0)
+        # A client gone before the first chunk: the server still closes it.
+        middleware(self.factory.get('/api/transactions/export/')).close()
+        self.assertEqual(middleware.in_flight, 0)
+
+    async def test_async_streamed_responses_hold_the_slot_until_closed(self):
+        async def chunks():
+            yield b'a'
+
+        async def get_response(request):
+            return StreamingHttpResponse(chunks())
+
+        middleware = AdmissionControlMiddleware(get_response)
+        response = await middleware(self.factory.get('/api/transactions/export/'))
+        self.assertTrue(response.is_async)
+        self.assertEqual([chunk async for chunk in response], [b'a'])
+        self.assertEqual(middleware.in_flight, 1)
+        await sync_to_async(response.close)()
+        self.assertEqual(middleware.in_flight, 0)
+
+    @override_settings(ADMISSION_MAX_QUEUE_MS=500)
+    def test_sheds_requests_queued_too_long(self):
+        now = time.time()
+        for header, status_code in (
+            (f't={int((now - 2) * 1e6)}', 429),
+            (f'{(now - 2) * 1e3:.0f}', 429),
+            (f't={now - 0.1:.3f}', 200),
+            ('garbage', 200),
+        ):
+            request = self.factory.get('/api/inner/', HTTP_X_REQUEST_START=header)
+            self.assertEqual(self.middleware(request).status_code, status_code, header)
+
+
+RATES_CSV = """date,currency,rate
+2025-06-01,USD,1.10
+2025-06-01,GBP,0.85
+2025-06-15,USD,1.20
+"""
+
+
+class CurrencyTests(TestCase):
+    def setUp(self):
+        fx.rates.clear()
+        caches['summary'].clear()
+        self.user = CustomUser.objects.create_user(username='ines', email='ines@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.food = Category.objects.create(user=self.user, name='Food')
+        self.travel = Category.objects.create(user=self.user, name='Travel')
+
+    def _load_rates(self, text=RATES_CSV):
+        return fx.load_rates(fx.parse_rates(StringIO(text)))
+
+    def _add(self, amount, currency, day, type='EXPENSE', category=None):
+        response = self.client.post('/api/transactions/', {
+            'amount': amount, 'currency': currency, 'type': type, 'date': f'2025-06-{day:02d}',
+            'category': (category or self.food).pk,
+        })
+        self.assertEqual(response.status_code, 201, response.data)
+        return response
+
+    def _summary(self, **params):
+        return self.client.get('/api/summary/', {'year': 2025, 'month': 6, **params}).json()
+
+    def test_new_rows_default_to_the_base_currency(self):
+        self.user.base_currency = 'EUR'
+        self.user.save()
+        response = self.client.post(
+            '/api/transactions/', {'amount': '5.00', 'type': 'EXPENSE', 'date': '2025-06-01'},
+        )
+        self.assertEqual(response.data['currency'], 'EUR')
+        response = self.client.post('/api/budgets/', {'category_name': 'Food', 'amount': '9', 'month': 6, 'year': 2025})
+        self.assertEqual(Budget.objects.get(user=self.user).currency, 'EUR')
+        response = self.client.post('/api/transactions/', {'amount': '5', 'type': 'EXPENSE', 'date': '2025-06-01', 'currency': 'eur'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('currency', response.data)
+
+    def test_summary_converts_at_each_days_rate(self):
+        self._load_rates()
+        self._add('100.00', 'USD', 2)
+        self._add('100.00', 'EUR', 10)    # 110.00 USD
+        self._add('50.00', 'EUR', 20, category=self.travel)    # 60.00 USD
+        self._add('85.00', 'GBP', 3, type='INCOME')    # 100 EUR, 110.00 USD
+        Budget.objects.create(user=self.user, category=self.food, amount=Decimal('200.00'), currency='EUR', year=2025, month=6)
+
+        summary = self._summary()
+        self.assertEqual(summary['currency'], 'USD')
+        self.assertEqual(Decimal(summary['total_expenses']), Decimal('270.00'))
+        self.assertEqual(Decimal(summary['total_income']), Decimal('110.00'))
+        self.assertEqual(
+            [(item['category__name'], Decimal(item['total'])) for item in summary['expenses_by_category']],
+            [('Food', Decimal('210.00')), ('Travel', Decimal('60.00'))],
+        )
+        # The budget is converted at the month-end rate.
+        self.assertEqual(Decimal(summary['budget_vs_actual'][0]['budgeted_amount']), Decimal('240.00'))
+        self.assertEqual(summary['missing_rates'], [])
+        # The filtered path, aggregating transactions directly, agrees.
+        filtered = self._summary(date_from='2025-06-01')
+        self.assertEqual(Decimal(filtered['total_expenses']), Decimal('270.00'))
+
+    def test_rollups_keep_currencies_apart(self):
+        self._add('10.00', 'USD', 2)
+        self._add('20.00', 'EUR', 3)
+        self._add('5.00', 'EUR', 4)
+        buckets = dict(MonthlyRollup.objects.filter(user=self.user).values_list('currency', 'total'))
+        self.assertEqual(buckets, {'USD': Decimal('10.00'), 'EUR': Decimal('25.00')})
+        rollups.rebuild(user=self.user)
+        self.assertEqual(dict(MonthlyRollup.objects.filter(user=self.user).values_list('currency', 'total')), buckets)
+
+    def test_single_currency_months_read_the_rollups(self):
+        self._add('10.00', 'USD', 2)
+        caches['summary'].clear()
+        # Base currency, rollups, budgets.
+        with self.assertNumQueries(3):
+            summary = fx.summary.build_financial_summary(self.user, 2025, 6)
+        self.assertEqual(summary['total_expenses'], Decimal('10.00'))
+        self._add('10.00', 'GBP', 2)
+        with self.assertNumQueries(4):
+            fx.summary.build_financial_summary(self.user, 2025, 6)
+        with self.assertNumQueries(3):
+            fx.summary.build_financial_summary(self.user, 2025, 6, currency='USD')
+
+    def test_timeseries_converts_other_currencies(self):
+        self._load_rates()
+        self._add('100.00', 'USD', 2)
+        params = {'bucket': 'month', 'date_from': '2025-06-01', 'date_to': '2025-06-30'}
+        first = self.client.get('/api/analytics/timeseries/', params)
+        self.assertEqual(Decimal(first.json()['results'][0]['expenses']), Decimal('100.00'))
+        self._add('100.00', 'EUR', 20)
+        response = self.client.get('/api/analytics/timeseries/', params)
+        self.assertEqual(Decimal(response.json()['results'][0]['expenses']), Decimal('220.00'))
+        # A new base currency changes the validators.
+        self.client.patch('/api/user/me/', {'base_currency': 'EUR'})
+        response = self.client.get('/api/analytics/timeseries/', params, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_missing_rates_are_reported_and_loading_refreshes_summaries(self):
+        self._add('100.00', 'USD', 2)
+        self._add('100.00', 'EUR', 10)
+        Budget.objects.create(user=self.user, category=self.food, amount=Decimal('10.00'), currency='GBP', year=2025, month=6)
+        summary = self._summary()
+        self.assertEqual(summary['missing_rates'], ['EUR', 'GBP'])
+        self.assertEqual(Decimal(summary['total_expenses']), Decimal('100.00'))
+
+        out = StringIO()
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as file:
+            file.write(RATES_CSV)
+        try:
+            call_command('load_exchange_rates', file.name, stdout=out)
+        finally:
+            os.unlink(file.name)
+        self.assertIn('Loaded 3 exchange rates', out.getvalue())
+        summary = self._summary()
+        self.assertEqual(summary['missing_rates'], [])
+        self.assertEqual(Decimal(summary['total_expenses']), Decimal('210.00'))
+
+    def test_changing_the_base_currency_refreshes_summaries(self):
+        self._load_rates()
+        self._add('110.00', 'USD', 2)
+        self.assertEqual(Decimal(self._summary()['total_expenses']), Decimal('110.00'))
+        response = self.client.patch('/api/user/me/', {'base_currency': 'EUR'})
+        self.assertEqual(response.data['base_currency'], 'EUR')
+        self.user.refresh_from_db()
+        summary = self._summary()
+        self.assertEqual((summary['currency'], Decimal(summary['total_expenses'])), ('EUR', Decimal('100.00')))
+
+    def test_base_currency_changed_by_another_process(self):
+        self._load_rates()
+        self._add('110.00', 'USD', 2)
+        params = {'bucket': 'month', 'date_from': '2025-06-01', 'date_to': '2025-06-30'}
+        series = self.client.get('/api/analytics/timeseries/', params)
+        self.assertEqual(self._summary()['currency'], 'USD')
+        # Another worker saves the profile: the database and version counters
+        # change, while this process's request.user keeps the old currency.
+        CustomUser.objects.filter(pk=self.user.pk).update(base_currency='EUR')
+        versions.bump(self.user.pk, versions.TRANSACTION)
+        summary = self._summary()
+        self.assertEqual((summary['currency'], Decimal(summary['total_expenses'])), ('EUR', Decimal('100.00')))
+        response = self.client.get('/api/analytics/timeseries/', params, HTTP_IF_NONE_MATCH=series['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Decimal(response.json()['results'][0]['expenses']), Decimal('100.00'))
+
+    def test_rates_loaded_by_another_process(self):
+        self._add('10.00', 'USD', 2)
+        Budget.objects.create(user=self.user, category=self.food, amount=Decimal('100.00'), currency='EUR', year=2025, month=6)
+        summary = self._summary()
+        self.assertEqual(summary['missing_rates'], ['EUR'])
+        # Loaded elsewhere: this process's memo still holds "no rate".
+        with mock.patch.object(fx.rates, 'clear'):
+            self._load_rates()
+        summary = self._summary()
+        self.assertEqual(summary['missing_rates'], [])
+        self.assertEqual(Decimal(summary['budget_vs_actual'][0]['budgeted_amount']), Decimal('120.00'))
+
+    def test_parse_rates(self):
+        wide = 'Date,USD,JPY,\n2025-06-02,1.1,N/A,\n2025-06-01,1.05,160.5,\n'
+        self.assertEqual(list(fx.parse_rates(StringIO(wide))), [
+            ('USD', date(2025, 6, 2), Decimal('1.1')),
+            ('USD', date(2025, 6, 1), Decimal('1.05')),
+            ('JPY', date(2025, 6, 1), Decimal('160.5')),
+        ])
+        for text in ('date,currency,rate\n2025-06-01,usd,0\n', 'date,currency,rate\n2025-13-01,USD,1\n',
+                     'date,currency,rate\n2025-06-01,DOLLARS,1\n'):
+            with self.assertRaisesMessage(ValueError, 'Line 2'):
+                list(fx.parse_rates(StringIO(text)))
+        # Reloading a day replaces its rate.
+        self._load_rates()
+        self._load_rates('date,currency,rate\n2025-06-01,USD,1.25\n')
+        self.assertEqual(ExchangeRate.objects.count(), 3)
+        self.assertEqual(fx.rate('USD', date(2025, 6, 3)), (Decimal('1.25'), Decimal('0.8')))
+        self.assertIsNone(fx.rate('USD', date(2025, 5, 31)))
+        self.assertEqual(fx.convert(Decimal('10.00'), 'GBP', 'USD', date(2025, 6, 3)), Decimal('14.71'))
+
+    def test_rate_cache(self):
+        cache = fx.RateCache(maxsize=10, ttl=60)
+        for day in range(1, 12):
+            cache.set('USD', date(2025, 6, day), day)
+        # The oldest days went first.
+        self.assertIs(cache.get('USD', date(2025, 6, 1)), fx._MISSING)
+        self.assertIs(cache.get('USD', date(2025, 6, 2)), fx._MISSING)
+        self.assertEqual(cache.get('USD', date(2025, 6, 11)), 11)
+        cache.set('GBP', date(2025, 6, 1), None)
+        self.assertIsNone(cache.get('GBP', date(2025, 6, 1)))
+        with mock.patch('core.fx.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertIs(cache.get('USD', date(2025, 6, 11)), fx._MISSING)
+
+        ExchangeRate.objects.create(currency='USD', date=date(2025, 6, 1), rate=Decimal('1.1'), inverse=fx.inverse(Decimal('1.1')))
+        fx.rate('USD', date(2025, 6, 5))
+        with self.assertNumQueries(0):
+            self.assertEqual(fx.rate('USD', date(2025, 6, 5))[0], Decimal('1.1'))
+
+
+class AlertTests(TestCase):
+    def setUp(self):
+        fx.rates.clear()
+        self.user = CustomUser.objects.create_user(username='jonas', email='jonas@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.food = Category.objects.create(user=self.user, name='Food')
+        self.budget = Budget.objects.create(user=self.user, category=self.food, amount=Decimal('100.00'), year=2025, month=6)
+        self.rule = AlertRule.objects.create(user=self.user, category=self.food, threshold_percent=80)
+
+    def _spend(self, amount, day=1, category=None):
+        response = self.client.post('/api/transactions/', {
+            'amount': amount, 'type': 'EXPENSE', 'date': f'2025-06-{day:02d}', 'category': (category or self.food).pk,
+        })
+        self.assertEqual(response.status_code, 201, response.data)
+        return response
+
+    def _poll(self, **params):
+        response = self.client.get('/api/notifications/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_a_rule_fires_once_when_its_threshold_is_crossed(self):
+        self._spend('50.00')
+        self.assertFalse(Notification.objects.exists())
+        self._spend('30.00')
+        self._spend('5.00')
+        AlertRule.objects.create(user=self.user, threshold_percent=100)
+        self._spend('15.00')
+        notifications = list(Notification.objects.values_list('threshold_percent', 'spent', 'budgeted'))
+        self.assertEqual(notifications, [
+            (80, Decimal('80.00'), Decimal('100.00')),
+            (100, Decimal('100.00'), Decimal('100.00')),
+        ])
+        self.assertEqual(Notification.objects.first().message, 'Food: 80% of the 2025-06 budget spent.')
+        # Income, other months and unbudgeted categories do not count.
+        self.client.post('/api/transactions/', {'amount': '500', 'type': 'INCOME', 'date': '2025-06-02', 'category': self.food.pk})
+        self._spend('500.00', category=Category.objects.create(user=self.user, name='Travel'))
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_edits_and_lowered_budgets_are_checked(self):
+        response = self._spend('10.00')
+        self.client.patch(f'/api/transactions/{response.data["id"]}/', {'amount': '90.00'})
+        self.assertEqual(Notification.objects.count(), 1)
+        Notification.objects.all().delete()
+        self.client.delete(f'/api/transactions/{response.data["id"]}/')
+        self._spend('60.00')
+        self.assertFalse(Notification.objects.exists())
+        self.client.post('/api/budgets/', {'category_name': 'food', 'amount': '70', 'month': 6, 'year': 2025})
+        self.assertEqual(Notification.objects.get().budgeted, Decimal('70.00'))
+        self.rule.is_active = False
+        self.rule.save()
+        self.client.post('/api/budgets/', [{'category_name': 'food', 'amount': '10', 'month': 6, 'year': 2025}], format='json')
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_bulk_writes_are_checked(self):
+        rows = [{'amount': '20.00', 'type': 'EXPENSE', 'date': f'2025-06-{day:02d}', 'category_name': 'food'} for day in range(1, 5)]
+        response = self.client.post('/api/transactions/import/', rows, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Notification.objects.get().spent, Decimal('80.00'))
+
+    def test_new_rules_check_the_current_month(self):
+        today = date.today()
+        Budget.objects.create(user=self.user, category=self.food, amount=Decimal('10.00'), year=today.year, month=today.month)
+        Transaction.objects.create(user=self.user, category=self.food, amount=Decimal('9.00'), type='EXPENSE', date=today)
+        rollups.rebuild(user=self.user)
+        response = self.client.post('/api/alert-rules/', {'category': self.food.pk, 'threshold_percent': 90})
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(set(Notification.objects.values_list('rule_id', flat=True)), {self.rule.pk, response.data['id']})
+        self.assertTrue(AlertRule.objects.get(pk=response.data['id']).is_active)
+        self.assertEqual(self.client.get('/api/alert-rules/').json()['count'], 2)
+        other = CustomUser.objects.create_user(username='kira', email='kira@example.com', password='pw')
+        theirs = Category.objects.create(user=other, name='Food')
+        response = self.client.post('/api/alert-rules/', {'category': theirs.pk})
+        self.assertEqual(response.status_code, 400)
+
+    def test_polling_after_an_id(self):
+        AlertRule.objects.create(user=self.user, threshold_percent=50)
+        self._spend('60.00')
+        self._spend('30.00')
+        first = self._poll(limit=1)
+        self.assertEqual([item['threshold_percent'] for item in first['results']], [50])
+        rest = self._poll(after=first['last_id'])
+        self.assertEqual([item['threshold_percent'] for item in rest['results']], [80])
+        self.assertEqual(self._poll(after=rest['last_id']), {'results': [], 'last_id': rest['last_id']})
+        self.assertEqual(self.client.get('/api/notifications/', {'after': 'x'}).status_code, 400)
+        other = CustomUser.objects.create_user(username='kira', email='kira@example.com', password='pw')
+        self.client.force_authenticate(other)
+        self.assertEqual(self._poll(), {'results': [], 'last_id': None})
+
+    def test_checks_cost_the_same_few_queries(self):
+        counts = []
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as queries:
+                alerts.check({(self.user.pk, self.food.pk, 2025, 6)})
+            counts.append(len(queries))
+            self._spend('10.00')
+            self._spend('10.00', day=2)
+        # Rules, budgets, buckets; the INSERT only once something fires.
+        self.assertEqual(counts, [3, 3])
+        self._spend('70.00')
+        with self.assertNumQueries(4):
+            alerts.check({(self.user.pk, self.food.pk, 2025, 6)})
+        with self.assertNumQueries(1):
+            alerts.check({(self.user.pk + 1, self.food.pk, 2025, 6)})
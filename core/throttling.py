@@ -0,0 +1,129 @@
+# backend/core/throttling.py
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketStore:
+    """
+    Token buckets by key in a thread-safe LRU, kept in each worker process
+    like users.authentication.UserCache. A bucket is two numbers, the tokens
+    left and when they were counted, refilled lazily when next used: one
+    dict operation per check, where DRF's cache throttles read and rewrite a
+    list of request timestamps. An evicted bucket starts over full.
+    """
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, refill_rate, now=None):
+        """
+        Takes a token from the bucket `key` (holding up to `capacity` tokens,
+        refilled at `refill_rate` per second). Returns 0 if one was left,
+        otherwise the seconds until one will be.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, counted_at = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - counted_at) * refill_rate)
+            if tokens >= 1:
+                tokens, wait = tokens - 1, 0
+            else:
+                wait = (1 - tokens) / refill_rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+store = TokenBucketStore(maxsize=settings.THROTTLE_STORE_SIZE)
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    A DRF throttle on `store`. A rate of 'N/period' (DEFAULT_THROTTLE_RATES,
+    by scope) allows bursts of N requests and refills N per period, so a
+    client pacing itself is never cut off at a window boundary. Rates are
+    read per request; a scope without one, or THROTTLE_ENABLED = False,
+    leaves requests unlimited. Limits apply per worker process.
+    """
+    wait_seconds = 0
+
+    def __init__(self):
+        # SimpleRateThrottle resolves a fixed scope's rate here; ours can
+        # depend on the request.
+        pass
+
+    def get_scope(self, request):
+        return self.scope
+
+    def allow_request(self, request, view):
+        if not getattr(settings, 'THROTTLE_ENABLED', True):
+            return True
+        scope = self.get_scope(request)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        key = self.get_cache_key(request, view) if rate else None
+        if key is None:
+            return True
+        num_requests, duration = self.parse_rate(rate)
+        self.wait_seconds = store.take(f'{scope}:{key}', num_requests, num_requests / duration)
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class ReadWriteScopeMixin:
+    """`read_<kind>` scope for safe methods, `write_<kind>` for the others."""
+    kind = None
+
+    def get_scope(self, request):
+        return f'{"read" if request.method in SAFE_METHODS else "write"}_{self.kind}'
+
+
+class UserRateThrottle(ReadWriteScopeMixin, TokenBucketThrottle):
+    """Authenticated requests, per user (`read_user`, `write_user`)."""
+    kind = 'user'
+
+    def get_cache_key(self, request, view):
+        user = request.user
+        return user.pk if user and user.is_authenticated else None
+
+
+class IPRateThrottle(ReadWriteScopeMixin, TokenBucketThrottle):
+    """Every request, per client address (`read_ip`, `write_ip`); see NUM_PROXIES."""
+    kind = 'ip'
+
+    def get_cache_key(self, request, view):
+        return self.get_ident(request)
+
+
+class AuthIPThrottle(TokenBucketThrottle):
+    """Login, token refresh and registration, per client address (`auth_ip`)."""
+    scope = 'auth_ip'
+
+    def get_cache_key(self, request, view):
+        return self.get_ident(request)
+
+
+class AuthUserThrottle(TokenBucketThrottle):
+    """
+    Login attempts per account (`auth_user`), keyed by the submitted login,
+    so guessing one account's password from many addresses is limited too.
+    """
+    scope = 'auth_user'
+
+    def get_cache_key(self, request, view):
+        login = request.data.get(get_user_model().USERNAME_FIELD) if hasattr(request.data, 'get') else None
+        return login.strip().lower() if isinstance(login, str) and login.strip() else None
@@ -1,15 +1,30 @@
 # core/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CategoryViewSet, TransactionViewSet, BudgetViewSet, FinancialSummaryView
+from .views import (
+    CategoryViewSet, TransactionViewSet, BudgetViewSet, RecurringTransactionViewSet, FinancialSummaryView, MetricsView,
+    TimeseriesView, SyncView, JobViewSet, AlertRuleViewSet, NotificationView,
+)
+from .async_views import AsyncCategoryListView, AsyncFinancialSummaryView, AsyncTransactionListView
 
 # The router automatically creates the URLs for our ViewSets (list, create, detail, update, delete)
 router = DefaultRouter()
 router.register(r'categories', CategoryViewSet, basename='category')
 router.register(r'transactions', TransactionViewSet, basename='transaction')
 router.register(r'budgets', BudgetViewSet, basename='budget')
+router.register(r'recurring', RecurringTransactionViewSet, basename='recurring')
+router.register(r'jobs', JobViewSet, basename='job')
+router.register(r'alert-rules', AlertRuleViewSet, basename='alert-rule')
 
 urlpatterns = [
     path('', include(router.urls)),
     path('summary/', FinancialSummaryView.as_view(), name='financial-summary'),
+    path('analytics/timeseries/', TimeseriesView.as_view(), name='analytics-timeseries'),
+    path('sync/', SyncView.as_view(), name='sync'),
+    path('notifications/', NotificationView.as_view(), name='notifications'),
+    path('_metrics', MetricsView.as_view(), name='metrics'),
+    # Async (ASGI) versions of the hottest read endpoints; see "ASGI Deployment" in the README.
+    path('async/summary/', AsyncFinancialSummaryView.as_view(), name='async-financial-summary'),
+    path('async/transactions/', AsyncTransactionListView.as_view(), name='async-transaction-list'),
+    path('async/categories/', AsyncCategoryListView.as_view(), name='async-category-list'),
 ]
\ No newline at end of file
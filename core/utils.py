@@ -0,0 +1,35 @@
+# backend/core/utils.py
+from datetime import date
+
+from .models import Category
+from . import versions
+
+
+def month_bounds(year, month):
+    """
+    Returns the half-open `[start, end)` date range of a calendar month, so
+    month filters can be written as `date__gte=start, date__lt=end` and use
+    the (user, date) indexes instead of per-row year/month extraction.
+    """
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+def resolve_categories(user, names):
+    """
+    Maps case-insensitive category names to the user's categories with one
+    lookup, creating the missing ones in a single INSERT. Returns the
+    `{lowercased name: category}` map and the names that were created.
+    """
+    by_name = {category.name.lower(): category for category in Category.objects.filter(user=user)}
+    missing = {}
+    for name in names:
+        if name and name.lower() not in by_name:
+            missing.setdefault(name.lower(), name)
+    created = Category.objects.bulk_create([Category(user=user, name=name) for name in missing.values()])
+    if created:
+        # bulk_create sends no signals.
+        versions.bump(user.pk, versions.CATEGORY)
+    by_name.update((category.name.lower(), category) for category in created)
+    return by_name, [category.name for category in created]
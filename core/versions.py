@@ -0,0 +1,124 @@
+# backend/core/versions.py
+import hashlib
+from collections import defaultdict, namedtuple
+
+from django.contrib.auth import get_user_model
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+
+from .models import ExchangeRateVersion, ResourceVersion
+
+CATEGORY = 'category'
+TRANSACTION = 'transaction'
+BUDGET = 'budget'
+RECURRING = 'recurringtransaction'
+ALERT_RULE = 'alertrule'
+
+# Rows re-stamped per UPDATE statement by touch().
+TOUCH_BATCH_SIZE = 500
+
+# Transactions, budgets and alert rules embed their category's name, so
+# category writes change how those resources render too.
+DEPENDENT_RESOURCES = {
+    CATEGORY: (CATEGORY, TRANSACTION, BUDGET, RECURRING, ALERT_RULE),
+    TRANSACTION: (TRANSACTION,),
+    BUDGET: (BUDGET,),
+    RECURRING: (RECURRING,),
+    ALERT_RULE: (ALERT_RULE,),
+}
+
+
+def bump(user_id, resource):
+    """Marks `resource`, and every resource rendering it, as changed for the user."""
+    bump_many([user_id], resource)
+
+
+def bump_many(user_ids, resource):
+    """`bump` for several users at once, in two statements."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    resources = DEPENDENT_RESOURCES[resource]
+    rows = ResourceVersion.objects.filter(user_id__in=user_ids, resource__in=resources)
+    if rows.update(version=F('version') + 1, updated_at=timezone.now()) < len(user_ids) * len(resources):
+        # First write to some of these resources: start their counters. Rows
+        # that already exist (just bumped above) are left alone.
+        ResourceVersion.objects.bulk_create(
+            [ResourceVersion(user_id=user_id, resource=name, version=1) for user_id in user_ids for name in resources],
+            ignore_conflicts=True,
+        )
+
+
+def touch(objs):
+    """
+    Sets `updated_at` to now on categories, transactions or budgets written
+    earlier in the current transaction. Long write transactions (bulk
+    imports, recurring materialization) call it last, so delta sync sees
+    their rows stamped close to their commit; see core.sync.changes().
+    """
+    now = timezone.now()
+    pks = defaultdict(list)
+    for obj in objs:
+        obj.updated_at = now
+        pks[type(obj)].append(obj.pk)
+    for model, ids in pks.items():
+        for start in range(0, len(ids), TOUCH_BATCH_SIZE):
+            model.objects.filter(pk__in=ids[start:start + TOUCH_BATCH_SIZE]).update(updated_at=now)
+
+
+def _current(user_id, resource):
+    return ResourceVersion.objects.filter(user_id=user_id, resource=resource).values_list('version', 'updated_at')
+
+
+def current(user_id, resource):
+    """Returns `(version, updated_at)`, or `(0, None)` for a resource never written."""
+    return _current(user_id, resource).first() or (0, None)
+
+
+async def acurrent(user_id, resource):
+    return await _current(user_id, resource).afirst() or (0, None)
+
+
+# What core.fx and the summary cache check per request; see state().
+State = namedtuple('State', 'currency rates_version resources')
+
+
+def _state(user_id, resources):
+    versions = ResourceVersion.objects.filter(user=OuterRef('pk'))
+    fields = {'rates_version': Subquery(ExchangeRateVersion.objects.values('version')[:1])}
+    for index, resource in enumerate(resources):
+        fields[f'version_{index}'] = Subquery(versions.filter(resource=resource).values('version')[:1])
+        fields[f'updated_at_{index}'] = Subquery(versions.filter(resource=resource).values('updated_at')[:1])
+    return get_user_model().objects.filter(pk=user_id).annotate(**fields).values_list('base_currency', *fields)
+
+
+def _as_state(row, resources):
+    currency, rates_version, *rest = row
+    return State(currency, rates_version or 0, {
+        resource: (rest[2 * index] or 0, rest[2 * index + 1]) for index, resource in enumerate(resources)
+    })
+
+
+def state(user_id, resources=()):
+    """
+    The user's base currency as stored, the exchange-rate version and the
+    `(version, updated_at)` of each of `resources`, in one query. Read where
+    the per-process copies of these (the authenticated user, core.fx.rates)
+    may lag behind writes made by other processes.
+    """
+    return _as_state(_state(user_id, resources).get(), resources)
+
+
+async def astate(user_id, resources=()):
+    return _as_state(await _state(user_id, resources).aget(), resources)
+
+
+def validators(user_id, resource, version, updated_at, path):
+    """
+    The `(etag, last_modified)` pair for a response rendering `resource` at
+    `version`. The full path keeps pages, filters and detail ids apart.
+    """
+    tag = f'{resource}:{user_id}:{version}:{path}'
+    etag = f'"{hashlib.md5(tag.encode()).hexdigest()}"'
+    last_modified = int(updated_at.timestamp()) if updated_at else None
+    return etag, last_modified
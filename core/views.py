@@ -1,22 +1,78 @@
 # backend/core/views.py
+from django.conf import settings
 from django.db import transaction
-from rest_framework import viewsets, permissions, status
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework import mixins, viewsets, permissions, status
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.db.models import Sum
-from datetime import datetime
-from rest_framework.filters import SearchFilter
+from datetime import date, datetime, time
 
-from .models import Category, Transaction, Budget
+from .models import Category, Transaction, Budget, RecurringTransaction, Job, AlertRule
 from .serializers import (
     CategorySerializer, 
     TransactionSerializer, 
     BudgetSerializer, 
-    BudgetCreateSerializer
+    BudgetCreateSerializer,
+    RecurringTransactionSerializer,
+    JobSerializer,
+    AlertRuleSerializer,
+    NotificationSerializer,
 )
+from .analytics import build_timeseries
+from .fastpath import ValuesReadMixin
+from .filters import TransactionFilterSet
+from .exports import CSVExportRenderer, NDJSONExportRenderer
+from .imports import import_transactions, parse_upload
+from .pagination import TransactionCursorPagination
+from .search import TransactionSearchFilter
+from .summary import build_financial_summary, get_cached_summary, invalidate_summary_for, summary_period
+from .metrics import registry
+from . import alerts, jobs, recurring, rollups, sync, versions
+
+# --- Conditional GET support for list and detail routes ---
+class ConditionalGetMixin:
+    """
+    Answers list and detail GETs with ETag/Last-Modified headers derived from
+    the user's version counter for the resource, and returns 304 for a
+    matching If-None-Match/If-Modified-Since after one small query, without
+    loading or serializing any rows.
+    """
+    def get_resource_name(self):
+        return self.queryset.model._meta.model_name
+
+    def get_validators(self, request):
+        resource = self.get_resource_name()
+        version, updated_at = versions.current(request.user.pk, resource)
+        return versions.validators(request.user.pk, resource, version, updated_at, request.get_full_path())
+
+    def conditional_response(self, request, handler, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().retrieve, *args, **kwargs)
+
 
 # --- THE CORRECTED AND FINAL BaseViewSet ---
-class BaseViewSet(viewsets.ModelViewSet):
+class BaseViewSet(ConditionalGetMixin, ValuesReadMixin, viewsets.ModelViewSet):
     """
     A base viewset that automatically handles user-specific data.
     - Filters querysets to only the logged-in user's data.
@@ -37,6 +93,17 @@ class BaseViewSet(viewsets.ModelViewSet):
         e.g., Transaction.objects.create(user=self.request.user, ...other_data)
         """
         serializer.save(user=self.request.user)
+        invalidate_summary_for(serializer.instance)
+
+    def perform_update(self, serializer):
+        # Invalidate both the period the object is leaving and the one it lands in.
+        invalidate_summary_for(serializer.instance)
+        serializer.save()
+        invalidate_summary_for(serializer.instance)
+
+    def perform_destroy(self, instance):
+        invalidate_summary_for(instance)
+        instance.delete()
 
 
 # --- Category ViewSet (Inherits the working BaseViewSet) ---
@@ -44,27 +111,86 @@ class CategoryViewSet(BaseViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
 
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            rollups.release_category(instance)
+            super().perform_destroy(instance)
+
 
 # --- Transaction ViewSet (Inherits the working BaseViewSet) ---
 class TransactionViewSet(BaseViewSet):
     queryset = Transaction.objects.all().select_related('category')
     serializer_class = TransactionSerializer
-    filter_backends = [SearchFilter]
+    read_serializer_class = TransactionSerializer
+    filter_backends = [DjangoFilterBackend, TransactionSearchFilter]
+    filterset_class = TransactionFilterSet
     search_fields = ['description', 'category__name']
 
-    def get_queryset(self):
-        # We start with the user-filtered queryset from the base class
-        queryset = super().get_queryset() 
-        # Then we apply additional filters
-        transaction_type = self.request.query_params.get('type')
-        if transaction_type in ['INCOME', 'EXPENSE']:
-            queryset = queryset.filter(type=transaction_type)
-        return queryset
+    @property
+    def paginator(self):
+        # Cursor (keyset) pagination is opt-in: `?pagination=cursor` for the
+        # first page, after which the `next` links carry the cursor.
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if params.get('pagination') == 'cursor' or 'cursor' in params:
+                self._paginator = TransactionCursorPagination()
+        return super().paginator
+
+    @action(detail=False, methods=['get'], renderer_classes=[CSVExportRenderer, NDJSONExportRenderer])
+    def export(self, request):
+        """
+        Streams every transaction matching the list filters (TransactionFilterSet
+        and `search`) as CSV (`?format=csv`, the default) or NDJSON (`?format=ndjson`).
+        """
+        renderer = request.accepted_renderer
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(renderer.stream(queryset), content_type=renderer.media_type)
+        response['Content-Disposition'] = f'attachment; filename="transactions.{renderer.format}"'
+        return response
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[JSONParser, MultiPartParser])
+    def bulk_import(self, request):
+        """
+        Imports many transactions at once, from a JSON list of rows or an
+        uploaded CSV/OFX `file`. Send an `Idempotency-Key` header to make
+        retries safe: a repeated key replays the first result. With a
+        `Prefer: respond-async` header the import is queued as a job instead
+        (202, with the job's URL in `Location`).
+        """
+        upload = request.FILES.get('file')
+        data = parse_upload(upload) if upload is not None else request.data
+        if 'respond-async' in request.headers.get('Prefer', ''):
+            job = jobs.enqueue(jobs.IMPORT, request.user, {
+                'rows': data, 'idempotency_key': request.headers.get('Idempotency-Key'),
+            })
+            location = reverse('job-detail', args=[job.pk])
+            return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED, headers={'Location': location})
+        created, result = import_transactions(request.user, data, request.headers.get('Idempotency-Key'))
+        return Response(result, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+    # Keep the monthly rollups in step with every write.
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            super().perform_create(serializer)
+            rollups.record([serializer.instance])
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            # serializer.instance still holds the stored values until save() runs.
+            rollups.discard([serializer.instance])
+            super().perform_update(serializer)
+            rollups.record([serializer.instance])
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            rollups.discard([instance])
+            super().perform_destroy(instance)
 
 
 # --- Budget ViewSet (Needs special handling, so it overrides create) ---
 class BudgetViewSet(BaseViewSet):
     queryset = Budget.objects.all()
+    read_serializer_class = BudgetSerializer
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -86,26 +212,199 @@ class BudgetViewSet(BaseViewSet):
                 serializer.save(context={'request': request})
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        for budget in serializer.instance if is_many else [serializer.instance]:
+            invalidate_summary_for(budget)
             
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
         
-# --- Financial Summary View (Unaffected, but included for completeness) ---
+# --- Recurring Transaction ViewSet ---
+class RecurringTransactionViewSet(BaseViewSet):
+    """
+    Schedules for repeating transactions. `manage.py materialize_recurring`
+    writes their due occurrences; creating or editing a schedule writes the
+    ones already due straight away, up to RECURRING_REQUEST_LIMIT, and queues
+    a job for any more.
+    """
+    queryset = RecurringTransaction.objects.all().select_related('category')
+    serializer_class = RecurringTransactionSerializer
+    read_serializer_class = RecurringTransactionSerializer
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            super().perform_create(serializer)
+            self.reschedule(serializer.instance)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            # Occurrences already written stay; the new schedule starts after them.
+            since = recurring.resume_date(serializer.instance)
+            super().perform_update(serializer)
+            self.reschedule(serializer.instance, since)
+
+    def reschedule(self, rule, since=None):
+        if recurring.reschedule(rule, since, limit=settings.RECURRING_REQUEST_LIMIT):
+            # A schedule starting long ago: the rest is written off the request path.
+            jobs.enqueue(jobs.MATERIALIZE_RECURRING, user=rule.user)
+
+
+# --- Alert Rule ViewSet ---
+class AlertRuleViewSet(BaseViewSet):
+    """
+    Budget alert rules: a notification is written to /api/notifications/
+    once a category's spending reaches `threshold_percent`% of its monthly
+    budget (see core.alerts). A new or edited rule is checked against the
+    current month straight away.
+    """
+    queryset = AlertRule.objects.all().select_related('category')
+    serializer_class = AlertRuleSerializer
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        alerts.check_user(self.request.user.pk)
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        alerts.check_user(self.request.user.pk)
+
+
+# --- Job ViewSet ---
+class JobViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Background jobs (see core.jobs): create one with a `kind` and its
+    `params`, then poll it until its `status` is SUCCEEDED or FAILED. The
+    file of a finished export job is served by its `download` route.
+    """
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return self.queryset.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user, max_attempts=settings.JOB_MAX_ATTEMPTS)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        job = self.get_object()
+        if job.kind != jobs.EXPORT or job.status != Job.SUCCEEDED:
+            raise Http404
+        renderer = jobs.EXPORT_RENDERERS[job.result['format']]
+        try:
+            file = open(jobs.export_path(job), 'rb')
+        except FileNotFoundError:
+            raise Http404
+        return FileResponse(
+            file, as_attachment=True, filename=f'transactions.{renderer.format}', content_type=renderer.media_type,
+        )
+
+
+# --- Financial Summary View ---
 class FinancialSummaryView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     def get(self, request):
-        # ... (logic remains the same)
-        today = datetime.today()
-        month = int(request.query_params.get('month', today.month))
-        year = int(request.query_params.get('year', today.year))
-        user = request.user
-        total_income = Transaction.objects.filter(user=user, type='INCOME', date__year=year, date__month=month).aggregate(total=Sum('amount'))['total'] or 0
-        total_expenses = Transaction.objects.filter(user=user, type='EXPENSE', date__year=year, date__month=month).aggregate(total=Sum('amount'))['total'] or 0
-        expenses_by_category = Transaction.objects.filter(user=user, type='EXPENSE', date__year=year, date__month=month).values('category__name').annotate(total=Sum('amount')).order_by('-total')
-        budgets = Budget.objects.filter(user=user, year=year, month=month)
-        budget_vs_actual = []
-        for budget in budgets:
-            actual = Transaction.objects.filter(user=user, type='EXPENSE', date__year=year, date__month=month, category=budget.category).aggregate(total=Sum('amount'))['total'] or 0
-            budget_vs_actual.append({ 'category_name': budget.category.name, 'budgeted_amount': budget.amount, 'actual_amount': actual, 'difference': budget.amount - actual })
-        summary = { 'total_income': total_income, 'total_expenses': total_expenses, 'balance': total_income - total_expenses, 'expenses_by_category': list(expenses_by_category), 'budget_vs_actual': budget_vs_actual }
-        return Response(summary)
\ No newline at end of file
+        year, month = summary_period(request.query_params)
+        if TransactionFilterSet.narrows_period(request.query_params):
+            # Narrowed with the transaction list's filters: aggregate the
+            # matching rows directly instead of the rollups (and skip the cache).
+            params = request.query_params.copy()
+            params['year'], params['month'] = year, month
+            filterset = TransactionFilterSet(params, queryset=Transaction.objects.filter(user=request.user), request=request)
+            if not filterset.is_valid():
+                raise ValidationError(filterset.errors)
+            return Response(build_financial_summary(request.user, year, month, transactions=filterset.qs))
+        entry = get_cached_summary(request.user, year, month)
+        response = get_conditional_response(request, etag=entry['etag'], last_modified=entry['last_modified'])
+        if response is None:
+            response = Response(entry['data'])
+        response['ETag'] = entry['etag']
+        response['Last-Modified'] = http_date(entry['last_modified'])
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+# --- Time-series Analytics View ---
+class TimeseriesView(ConditionalGetMixin, APIView):
+    """
+    Income, expense and per-category totals over a date range in day, week,
+    month or year buckets, for trend charts (see core.analytics.build_timeseries).
+    Takes the transaction list's filters too.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_resource_name(self):
+        return versions.TRANSACTION
+
+    def get_validators(self, request):
+        resource = self.get_resource_name()
+        # Amounts are converted to the stored base currency at the current
+        # rates, neither of which request.user reliably reflects.
+        state = versions.state(request.user.pk, [resource])
+        self.currency = state.currency
+        version, updated_at = state.resources[resource]
+        path = f'{request.get_full_path()}#{state.currency}:{state.rates_version}'
+        if 'date_to' not in request.query_params:
+            # The default range ends with the current month, so once a month
+            # starts the same path covers a new range without any write.
+            month = date.today().replace(day=1)
+            path = f'{path}:{month:%Y-%m}'
+            etag, last_modified = versions.validators(request.user.pk, resource, version, updated_at, path)
+            return etag, max(last_modified or 0, int(datetime.combine(month, time.min).timestamp()))
+        return versions.validators(request.user.pk, resource, version, updated_at, path)
+
+    def get(self, request):
+        return self.conditional_response(request, self.build)
+
+    def build(self, request):
+        queryset = Transaction.objects.filter(user=request.user)
+        return Response(build_timeseries(request.user, request.query_params, queryset, currency=self.currency))
+
+
+# --- Delta Sync View ---
+class SyncView(APIView):
+    """
+    Categories, transactions and budgets changed or deleted since a sync
+    token, for offline-capable clients (see core.sync.changes). Without
+    `since` every row is sent; `limit` bounds each batch.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params['limit']), 1), sync.MAX_PAGE_SIZE)
+        except (KeyError, ValueError):
+            limit = sync.PAGE_SIZE
+        return Response(sync.changes(request.user, request.query_params.get('since') or None, limit))
+
+
+# --- Notification View ---
+class NotificationView(APIView):
+    """
+    The user's alert notifications after the id `after`, oldest first, with
+    the `last_id` to poll with next (see core.alerts.poll); `limit` bounds
+    each batch.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params['limit']), 1), alerts.MAX_PAGE_SIZE)
+        except (KeyError, ValueError):
+            limit = alerts.PAGE_SIZE
+        after = request.query_params.get('after') or None
+        if after is not None:
+            try:
+                after = int(after)
+            except ValueError:
+                raise ValidationError({'after': 'Expected a notification id.'})
+        notifications, last_id = alerts.poll(request.user, after, limit)
+        return Response({'results': NotificationSerializer(notifications, many=True).data, 'last_id': last_id})
+
+
+# --- Metrics View ---
+class MetricsView(APIView):
+    """Request metrics of this worker process in the Prometheus text format (staff only)."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.3 on 2026-10-17 01:45
+
+import core.models
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='base_currency',
+            field=models.CharField(default=core.models.default_currency, max_length=3, validators=[django.core.validators.RegexValidator('^[A-Z]{3}\\Z', 'Expected a three-letter ISO 4217 currency code, e.g. USD.')]),
+        ),
+    ]
@@ -3,11 +3,15 @@ from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from core.models import currency_field
+
 class CustomUser(AbstractUser):
     """
     Custom User model where email is the unique identifier for authentication.
     """
     email = models.EmailField(_('email address'), unique=True)
+    # Summaries are converted to this currency (see core.fx).
+    base_currency = currency_field()
 
     # The field used for login
     USERNAME_FIELD = 'email'
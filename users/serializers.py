@@ -6,7 +6,7 @@ class UserRegisterSerializer(serializers.ModelSerializer):
     password2 = serializers.CharField(style={'input_type': 'password'}, write_only=True)
     class Meta:
         model = CustomUser
-        fields = ['username', 'email', 'password', 'password2']
+        fields = ['username', 'email', 'password', 'password2', 'base_currency']
         extra_kwargs = {'password': {'write_only': True}}
 
     def validate(self, attrs):
@@ -18,10 +18,18 @@ class UserRegisterSerializer(serializers.ModelSerializer):
         user = CustomUser.objects.create_user(
             username=validated_data['username'],
             email=validated_data['email'],
-            password=validated_data['password']
+            password=validated_data['password'],
+            **({'base_currency': validated_data['base_currency']} if 'base_currency' in validated_data else {}),
         )
         return user
     
+class UserProfileSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CustomUser
+        fields = ['id', 'username', 'email', 'base_currency']
+        read_only_fields = ['id', 'email']
+
+
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
     """Custom token serializer to include username and email in the JWT payload."""
     @classmethod
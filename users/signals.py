@@ -0,0 +1,13 @@
+# backend/users/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import user_cache
+from .models import CustomUser
+
+
+# Deactivation and password changes are saves, so any save drops the cached user.
+@receiver(post_save, sender=CustomUser, dispatch_uid='user_saved_auth_cache')
+@receiver(post_delete, sender=CustomUser, dispatch_uid='user_deleted_auth_cache')
+def evict_cached_user(sender, instance, **kwargs):
+    user_cache.evict(instance.pk)
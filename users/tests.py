@@ -1,3 +1,77 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from .authentication import CachedJWTAuthentication, user_cache
+from .models import CustomUser
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = CustomUser.objects.create_user(username='kim', email='kim@example.com', password='old-password')
+        self.header = f'Bearer {AccessToken.for_user(self.user)}'
+
+    def _request(self):
+        return APIRequestFactory().get('/api/categories/', HTTP_AUTHORIZATION=self.header)
+
+    def test_cached_lookup_skips_the_user_query(self):
+        with self.assertNumQueries(1):
+            JWTAuthentication().authenticate(self._request())
+        with self.assertNumQueries(1):
+            JWTAuthentication().authenticate(self._request())
+
+        with self.assertNumQueries(1):
+            user, _ = CachedJWTAuthentication().authenticate(self._request())
+        with self.assertNumQueries(0):
+            cached, _ = CachedJWTAuthentication().authenticate(self._request())
+        self.assertEqual(cached.pk, self.user.pk)
+        self.assertIsNot(cached, user)
+
+    def test_per_request_query_count_drops_by_one(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=self.header)
+        client.get('/api/categories/')
+        with CaptureQueriesContext(connection) as uncached:
+            user_cache.clear()
+            client.get('/api/categories/')
+        with CaptureQueriesContext(connection) as cached:
+            client.get('/api/categories/')
+        self.assertEqual(len(cached), len(uncached) - 1)
+
+    def test_deactivation_is_seen_immediately(self):
+        CachedJWTAuthentication().authenticate(self._request())
+        self.user.is_active = False
+        self.user.save()
+        response = APIClient().get('/api/categories/', HTTP_AUTHORIZATION=self.header)
+        self.assertEqual(response.status_code, 401)
+
+    def test_password_change_evicts_the_cached_user(self):
+        CachedJWTAuthentication().authenticate(self._request())
+        self.user.set_password('new-password')
+        self.user.save()
+        with self.assertNumQueries(1):
+            user, _ = CachedJWTAuthentication().authenticate(self._request())
+        self.assertTrue(user.check_password('new-password'))
+
+    def test_entries_expire(self):
+        cache_ttl = user_cache.ttl
+        user_cache.ttl = 0
+        self.addCleanup(setattr, user_cache, 'ttl', cache_ttl)
+        CachedJWTAuthentication().authenticate(self._request())
+        with self.assertNumQueries(1):
+            CachedJWTAuthentication().authenticate(self._request())
+
+    def test_profile_update_does_not_write_back_the_cached_user(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=self.header)
+        client.get('/api/user/me/')
+        # Deactivated elsewhere (another worker) without evicting this cache.
+        CustomUser.objects.filter(pk=self.user.pk).update(is_active=False)
+        response = client.patch('/api/user/me/', {'base_currency': 'EUR'})
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.is_active, self.user.base_currency), (False, 'EUR'))
@@ -1,7 +1,8 @@
 # backend/users/urls.py
 from django.urls import path
-from .views import UserRegisterView
+from .views import UserProfileView, UserRegisterView
 
 urlpatterns = [
     path('register/', UserRegisterView.as_view(), name='user-register'),
+    path('me/', UserProfileView.as_view(), name='user-profile'),
 ]
\ No newline at end of file
@@ -1,15 +1,29 @@
 # backend/users/views.py
 from rest_framework import generics
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.views import TokenObtainPairView
-from .serializers import UserRegisterSerializer, MyTokenObtainPairSerializer
+from core.throttling import AuthIPThrottle, AuthUserThrottle
+from .serializers import UserRegisterSerializer, UserProfileSerializer, MyTokenObtainPairSerializer
 from .models import CustomUser
 
 class UserRegisterView(generics.CreateAPIView):
     queryset = CustomUser.objects.all()
     permission_classes = (AllowAny,)
     serializer_class = UserRegisterSerializer
+    throttle_classes = (AuthIPThrottle,)
+
+class UserProfileView(generics.RetrieveUpdateAPIView):
+    """The logged-in user's profile, including the base currency summaries are shown in."""
+    permission_classes = (IsAuthenticated,)
+    serializer_class = UserProfileSerializer
+
+    def get_object(self):
+        # request.user may be CachedJWTAuthentication's copy, up to
+        # AUTH_USER_CACHE_TTL old; saving it would write back stale fields.
+        return CustomUser.objects.get(pk=self.request.user.pk)
 
 class MyTokenObtainPairView(TokenObtainPairView):
     """Custom login view that uses our custom serializer."""
-    serializer_class = MyTokenObtainPairSerializer
\ No newline at end of file
+    serializer_class = MyTokenObtainPairSerializer
+    # Password hashing makes each attempt expensive: limited per address and per account.
+    throttle_classes = (AuthIPThrottle, AuthUserThrottle)